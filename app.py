@@ -1,26 +1,35 @@
-from flask import Flask
-from pymongo import MongoClient
+from flask import Flask, g, jsonify, request
 from config import Config
+from database import circuit_breaker, get_db
+from bootstrap import run_bootstrap
+from services.ticket_archive_service import TicketArchiveService
 from dotenv import load_dotenv
 from flask_jwt_extended import JWTManager
 import os
-from routes.auth_routes import auth_routes
+from routes.auth_routes import auth_routes, auth_service
 from routes.user_routes import user_routes
 from routes.betting_center_routes import betting_center_routes
 from routes.taquilla_routes import taquilla_routes
 from routes.role_default_permissions_routes import role_default_permissions_routes
 from routes.configuration_routes import configuration_routes
 from routes.permission_routes import permission_routes
+from routes.race_routes import race_routes
+from routes.ticket_routes import ticket_routes
+from routes.export_routes import export_routes
+from routes.job_routes import job_routes
+from routes.metrics_routes import metrics_routes
+from routes.health_routes import health_routes
+from utils.admission_control import AdmissionController
+from utils.compression import init_compression
+from logging_config import setup_logging, init_request_id
 from flask_cors import CORS
-import logging
-from models.role_default_permissions_model import RoleDefaultPermissionsModel
-from models.permission_model import (
-    PermissionModel,
-)  # Asegúrate de importar tu modelo de permisos
+import click
+import pymongo
+import time
 
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Configurar logging estructurado con escritura en segundo plano
+setup_logging(Config)
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
@@ -34,42 +43,15 @@ app.config.from_object(Config)
 # Configurar JWT
 jwt = JWTManager(app)
 
-# Configurar CORS
-CORS(app)
 
-# Conexión a MongoDB usando la URI de las variables de entorno
-client = MongoClient(app.config["MONGO_URI"])
-db = client.get_database()
+# Rechazar tokens revocados consultando el filtro en memoria
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return auth_service.is_token_revoked(jwt_payload)
 
-# Inicializar el modelo de permisos
-role_permissions_model = RoleDefaultPermissionsModel(db)
 
-# Verificar y inicializar permisos predeterminados
-try:
-    existing_permissions = role_permissions_model.get_all_role_permissions()
-    if not existing_permissions:
-        logging.info("Inicializando permisos predeterminados...")
-        role_permissions_model.initialize_default_permissions()
-    else:
-        logging.info(
-            "Los permisos predeterminados ya existen, no es necesario inicializar."
-        )
-except Exception as e:
-    logging.error(f"Error al inicializar permisos: {e}")
-
-    # Inicializar permisos generales
-permission_model = PermissionModel(db)
-
-# Verificar y cargar los permisos generales
-try:
-    existing_permissions = permission_model.get_all_permissions()
-    if not existing_permissions:
-        logging.info("Inicializando permisos generales...")
-        permission_model.initialize_permissions()  # Esta función debe cargar los permisos generales
-    else:
-        logging.info("Los permisos generales ya existen, no es necesario inicializar.")
-except Exception as e:
-    logging.error(f"Error al inicializar los permisos generales: {e}")
+# Configurar CORS
+CORS(app)
 
 # Registrar las rutas de la aplicación
 app.register_blueprint(auth_routes)
@@ -79,6 +61,88 @@ app.register_blueprint(taquilla_routes)
 app.register_blueprint(role_default_permissions_routes)
 app.register_blueprint(configuration_routes)
 app.register_blueprint(permission_routes)
+app.register_blueprint(race_routes)
+app.register_blueprint(ticket_routes)
+app.register_blueprint(export_routes)
+app.register_blueprint(job_routes)
+app.register_blueprint(metrics_routes)
+app.register_blueprint(health_routes)
+
+# Identificador de petición para los registros
+init_request_id(app)
+init_compression(app)
+
+# Endpoints que responden aunque la base de datos no esté disponible
+BREAKER_EXEMPT_BLUEPRINTS = ("health_routes", "metrics_routes")
+
+
+# Con el disyuntor abierto se responde 503 al momento en lugar de esperar a
+# que venza el tiempo de selección de servidor de MongoDB
+@app.before_request
+def check_database_breaker():
+    if request.blueprint in BREAKER_EXEMPT_BLUEPRINTS:
+        return None
+    if not circuit_breaker.allow():
+        return (
+            jsonify({"error": "Base de datos no disponible, inténtalo de nuevo en unos segundos"}),
+            503,
+            {"Retry-After": str(int(circuit_breaker.reset_timeout))},
+        )
+
+
+# Control de admisión por clase de endpoint
+admission_controller = AdmissionController.from_config(Config)
+app.extensions["admission_controller"] = admission_controller
+
+
+@app.before_request
+def admit_request():
+    class_name = app.config["ADMISSION_ENDPOINTS"].get(request.endpoint, "default")
+    if not admission_controller.acquire(class_name):
+        return (
+            jsonify({"error": "Servidor ocupado, inténtalo de nuevo en unos segundos"}),
+            503,
+            {"Retry-After": "1"},
+        )
+    g.admission_class = class_name
+    g.admission_started = time.perf_counter()
+    # Plazo para todas las operaciones de MongoDB de la petición
+    if request.endpoint in Config.MONGO_LONG_TIMEOUT_ENDPOINTS:
+        timeout_ms = Config.MONGO_LONG_TIMEOUT_MS
+    else:
+        timeout_ms = Config.MONGO_REQUEST_TIMEOUT_MS
+    g.mongo_deadline = pymongo.timeout(timeout_ms / 1000)
+    g.mongo_deadline.__enter__()
+
+
+@app.teardown_request
+def release_request(exc):
+    deadline = g.pop("mongo_deadline", None)
+    if deadline is not None:
+        deadline.__exit__(None, None, None)
+    class_name = g.pop("admission_class", None)
+    if class_name is not None:
+        elapsed_ms = (time.perf_counter() - g.pop("admission_started")) * 1000
+        admission_controller.release(class_name, elapsed_ms)
+
+
+# Comando para preparar la base de datos: flask seed
+@app.cli.command("seed")
+@click.option("--force", is_flag=True, help="Ejecutar aunque la versión ya esté aplicada.")
+def seed_command(force):
+    """Crea los índices y carga los permisos iniciales."""
+    if run_bootstrap(get_db(), force=force):
+        click.echo("Base de datos preparada.")
+    else:
+        click.echo("La base de datos ya estaba preparada.")
+
+
+@app.cli.command("archive-tickets")
+@click.option("--days", type=int, default=None, help="Antigüedad mínima en días (por defecto TICKET_ARCHIVE_AFTER_DAYS).")
+def archive_tickets_command(days):
+    """Archiva los tickets antiguos en ficheros Parquet. Pensado para cron."""
+    archived = TicketArchiveService(get_db()).archive_older_than(days)
+    click.echo(f"Tickets archivados: {archived}")
 
 
 # Ruta de ejemplo para verificar que la aplicación está corriendo
@@ -88,4 +152,8 @@ def home():
 
 
 if __name__ == "__main__":
+    from warmup import warm_worker
+
+    run_bootstrap(get_db())
+    warm_worker()
     app.run(debug=True)
@@ -0,0 +1,228 @@
+from datetime import datetime, timezone
+import logging
+
+from bson import Int64, ObjectId
+from pymongo import UpdateOne
+
+from config import Config
+from models.betting_center_model import BettingCenterModel
+from models.center_member_model import CenterMemberModel
+from models.configuration_model import ConfigurationModel
+from models.configuration_template_model import ConfigurationTemplateModel
+from models.export_model import ExportModel
+from models.job_model import JobModel
+from models.liability_model import LiabilityModel
+from models.permission_model import PermissionModel, permissions_to_mask
+from models.race_model import RaceModel
+from models.revoked_token_model import RevokedTokenModel
+from models.role_default_permissions_model import RoleDefaultPermissionsModel
+from models.runner_model import RunnerModel
+from models.taquilla_model import TaquillaModel
+from models.ticket_model import TicketModel
+from models.ticket_rollup_model import TicketRollupModel
+from models.user_model import UserModel, search_fields
+from sharding import shard_collections
+from utils.search import normalize_search_text
+
+logger = logging.getLogger(__name__)
+
+# Incrementar cuando cambien los índices o los datos iniciales
+BOOTSTRAP_VERSION = 18
+
+
+def ensure_indexes(db):
+    """
+    Crea los índices de todas las colecciones.
+    """
+    user_model = UserModel(db)
+    taquilla_model = TaquillaModel(db)
+    models = [
+        user_model,
+        taquilla_model,
+        BettingCenterModel(db, user_model, taquilla_model),
+        PermissionModel(db),
+        RoleDefaultPermissionsModel(db),
+        ConfigurationModel(db),
+        ConfigurationTemplateModel(db),
+        CenterMemberModel(db),
+        RevokedTokenModel(db),
+        RaceModel(db),
+        RunnerModel(db),
+        TicketModel(db),
+        LiabilityModel(db),
+        TicketRollupModel(db),
+        ExportModel(db),
+        JobModel(db),
+    ]
+    for model in models:
+        model.ensure_indexes()
+
+    # Consultas del registro de auditoría por objeto modificado y por autor
+    db["audit_log"].create_index([("target_id", 1), ("ts", -1)])
+    db["audit_log"].create_index([("actor_id", 1), ("ts", -1)])
+
+
+def dedupe_configurations(db):
+    """
+    Deja una sola configuración por centro, la de mayor versión (o la más
+    reciente), para poder crear el índice único sobre center_id.
+    """
+    duplicates = db["configurations"].aggregate(
+        [
+            {"$sort": {"version": -1, "_id": -1}},
+            {"$group": {"_id": "$center_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+    )
+    removed = 0
+    for duplicate in duplicates:
+        removed += db["configurations"].delete_many({"_id": {"$in": duplicate["ids"][1:]}}).deleted_count
+    if removed:
+        logger.info("Eliminadas %s configuraciones duplicadas.", removed)
+    return removed
+
+
+def seed_database(db):
+    """
+    Carga los permisos predeterminados de los roles y los permisos generales
+    si todavía no existen.
+    """
+    role_permissions_model = RoleDefaultPermissionsModel(db)
+    if not role_permissions_model.get_all_role_permissions():
+        logger.info("Inicializando permisos predeterminados...")
+        role_permissions_model.initialize_default_permissions()
+    else:
+        logger.info("Los permisos predeterminados ya existen, no es necesario inicializar.")
+
+    permission_model = PermissionModel(db)
+    if not permission_model.collection.find_one({}, {"_id": 1}):
+        logger.info("Inicializando permisos generales...")
+    # initialize_permissions ignora los permisos que ya existen
+    permission_model.initialize_permissions()
+
+
+def migrate_user_permissions(db, batch_size=1000):
+    """
+    Convierte la lista de permisos de los usuarios antiguos (nombres u
+    ObjectId) en la máscara permission_mask. Solo toca los documentos que aún
+    tienen el campo permissions, así que se puede repetir sin efectos.
+    """
+    permission_model = PermissionModel(db)
+    permission_model.warm_cache()
+    names_by_id = {
+        permission["_id"]: permission["name"]
+        for permission in permission_model.collection.find({}, {"name": 1})
+    }
+
+    users = db["users"]
+    cursor = users.find(
+        {"permissions": {"$exists": True}},
+        {"permissions": 1, "permission_mask": 1},
+        batch_size=batch_size,
+    )
+    migrated = 0
+    operations = []
+    for user in cursor:
+        names = [
+            names_by_id.get(permission) if isinstance(permission, ObjectId) else permission
+            for permission in user.get("permissions") or []
+        ]
+        mask = int(user.get("permission_mask", 0)) | permissions_to_mask(
+            [name for name in names if name]
+        )
+        operations.append(
+            UpdateOne(
+                {"_id": user["_id"]},
+                {"$set": {"permission_mask": Int64(mask)}, "$unset": {"permissions": ""}},
+            )
+        )
+        if len(operations) >= batch_size:
+            migrated += users.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        migrated += users.bulk_write(operations, ordered=False).modified_count
+    if migrated:
+        logger.info("Migrados los permisos de %s usuarios a máscaras de bits.", migrated)
+    return migrated
+
+
+def rebuild_center_members(db):
+    """
+    Reconstruye el índice de miembros de los centros con los usuarios
+    existentes y elimina las membresías sin centro asignado ni taquilla.
+    """
+    users = db["users"].find(
+        {"$or": [{"assigned_centers.0": {"$exists": True}}, {"assigned_taquilla": {"$ne": None}}]},
+        {"assigned_centers": 1, "assigned_taquilla": 1},
+    )
+    written = CenterMemberModel(db).rebuild(users)
+    logger.info("Índice de miembros de los centros actualizado: %s entradas.", written)
+    return written
+
+
+def backfill_search_fields(db, batch_size=1000):
+    """
+    Calcula los campos normalizados de búsqueda de los usuarios y centros
+    creados antes de que existieran. Solo toca los documentos sin ellos.
+    """
+    targets = [
+        (db["users"], "username_search", ("username", "email"), search_fields),
+        (
+            db["betting_centers"],
+            "name_search",
+            ("name",),
+            lambda center: {"name_search": normalize_search_text(center.get("name"))},
+        ),
+    ]
+    updated = 0
+    for collection, marker, stored, build in targets:
+        operations = []
+        projection = {field: 1 for field in stored}
+        for document in collection.find({marker: {"$exists": False}}, projection, batch_size=batch_size):
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": build(document)}))
+            if len(operations) >= batch_size:
+                updated += collection.bulk_write(operations, ordered=False).modified_count
+                operations = []
+        if operations:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+    if updated:
+        logger.info("Campos de búsqueda calculados en %s documentos.", updated)
+    return updated
+
+
+def run_bootstrap(db, force=False):
+    """
+    Prepara la base de datos una sola vez por versión: índices y datos iniciales.
+    Todos los pasos son idempotentes, así que ejecutarlo en paralelo desde
+    varios procesos no tiene efectos adversos. Devuelve True si se ejecutó.
+    """
+    meta = db["meta"]
+    marker = meta.find_one({"_id": "bootstrap"})
+    if not force and marker and marker.get("version") == BOOTSTRAP_VERSION:
+        logger.info("Bootstrap v%s ya aplicado, no es necesario repetirlo.", BOOTSTRAP_VERSION)
+        return False
+
+    if Config.MONGO_SHARDED:
+        # Fragmentar antes de crear los índices para que las colecciones vacías
+        # se creen ya con la clave de fragmentación
+        shard_collections(db)
+    # Antes de los índices: el de center_id es único
+    dedupe_configurations(db)
+    ensure_indexes(db)
+    seed_database(db)
+    migrate_user_permissions(db)
+    rebuild_center_members(db)
+    backfill_search_fields(db)
+
+    meta.update_one(
+        {"_id": "bootstrap"},
+        {
+            "$set": {
+                "version": BOOTSTRAP_VERSION,
+                "applied_at": datetime.now(timezone.utc),
+            }
+        },
+        upsert=True,
+    )
+    logger.info("Bootstrap v%s aplicado correctamente.", BOOTSTRAP_VERSION)
+    return True
@@ -8,8 +8,180 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     MONGO_URI = os.getenv('MONGODB_URI')
+    MONGO_DB_NAME = os.getenv('MONGODB_DB_NAME', 'bet_db')
+    # Activar cuando MONGODB_URI apunta a un mongos: el bootstrap fragmenta las
+    # colecciones de alto volumen según sharding.SHARD_KEYS
+    MONGO_SHARDED = os.getenv('MONGODB_SHARDED', 'false').lower() == 'true'
+    # Tiempos de espera cortos para que una caída de MongoDB falle rápido en
+    # lugar de retener los hilos del worker
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 2000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', 2000))
+    # Sin límite por socket en el cliente compartido: cada petición y cada
+    # trabajo tiene en su lugar un plazo total para sus operaciones de MongoDB
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', 0)) or None
+    # Plazo de las operaciones de MongoDB de cada petición y de la cola de trabajos
+    MONGO_REQUEST_TIMEOUT_MS = int(os.getenv('MONGODB_REQUEST_TIMEOUT_MS', 3000))
+    # Plazo de las peticiones que recorren muchos documentos (exportación en
+    # streaming y archivo) y de la ejecución de cada trabajo
+    MONGO_LONG_TIMEOUT_MS = int(os.getenv('MONGODB_LONG_TIMEOUT_MS', 1800000))
+    MONGO_LONG_TIMEOUT_ENDPOINTS = (
+        'export_routes.export_center_data',
+        'ticket_routes.get_archived_tickets',
+        'ticket_routes.restore_archived_tickets',
+    )
+    # Disyuntor: fallos de conexión seguidos para abrirlo y segundos hasta la prueba
+    MONGO_BREAKER_FAILURE_THRESHOLD = int(os.getenv('MONGODB_BREAKER_FAILURE_THRESHOLD', 5))
+    MONGO_BREAKER_RESET_TIMEOUT = float(os.getenv('MONGODB_BREAKER_RESET_TIMEOUT', 10))
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')  # Cambia esto a tu variable de entorno si la tienes
 
     # Configuración de la duración de los tokens
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)  # Duración del token de acceso
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)  # Duración del token de refresco
+
+    # Revocación de tokens: sincronización del filtro de Bloom en memoria
+    REVOCATION_SYNC_SECONDS = int(os.getenv('REVOCATION_SYNC_SECONDS', 5))
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', 100000))
+    REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('REVOCATION_BLOOM_ERROR_RATE', 0.001))
+    # Segundos que cada sincronización repite hacia atrás, para cubrir
+    # escrituras confirmadas tarde y relojes desfasados entre servidores
+    REVOCATION_SYNC_OVERLAP_SECONDS = int(os.getenv('REVOCATION_SYNC_OVERLAP_SECONDS', 60))
+
+    # Control de admisión: límite de concurrencia y prioridad por clase de endpoint
+    ADMISSION_LATENCY_TARGET_MS = int(os.getenv('ADMISSION_LATENCY_TARGET_MS', 250))
+    ADMISSION_PROTECTED_PRIORITY = 3  # Las clases con esta prioridad nunca se descartan por latencia
+    ADMISSION_CLASSES = {
+        'auth': {'limit': 32, 'priority': 3, 'max_queue': 64, 'queue_timeout': 2.0},
+        'sales': {'limit': 64, 'priority': 3, 'max_queue': 128, 'queue_timeout': 2.0},
+        'default': {'limit': 32, 'priority': 2, 'max_queue': 32, 'queue_timeout': 1.0},
+        'admin_read': {'limit': 4, 'priority': 1, 'max_queue': 8, 'queue_timeout': 0.5},
+    }
+    ADMISSION_ENDPOINTS = {
+        'auth_routes.login': 'auth',
+        'race_routes.get_race_card': 'sales',
+        'ticket_routes.sell_ticket': 'sales',
+        'ticket_routes.reprint_ticket': 'sales',
+        'ticket_routes.void_ticket': 'sales',
+        'ticket_routes.get_liabilities': 'admin_read',
+        'ticket_routes.get_race_payouts': 'sales',
+        'user_routes.get_all_users': 'admin_read',
+        'betting_center_routes.get_all_betting_centers': 'admin_read',
+        'export_routes.export_center_data': 'admin_read',
+        'user_routes.search_users': 'admin_read',
+        'betting_center_routes.search_betting_centers': 'admin_read',
+    }
+
+    # Cachés en memoria por proceso (segundos de vida de cada entrada)
+    PERMISSION_CACHE_TTL = int(os.getenv('PERMISSION_CACHE_TTL', 300))
+    ROLE_CACHE_TTL = int(os.getenv('ROLE_CACHE_TTL', 300))
+    CONFIGURATION_CACHE_TTL = int(os.getenv('CONFIGURATION_CACHE_TTL', 60))
+
+    # Política de lectura por endpoint. Los endpoints GET listados aquí pueden
+    # leer de un secundario con un retraso máximo de READ_MAX_STALENESS_SECONDS;
+    # el resto, y todas las escrituras, usan el primario.
+    READ_MAX_STALENESS_SECONDS = int(os.getenv('READ_MAX_STALENESS_SECONDS', 90))
+    READ_POLICIES = {
+        'user_routes.get_all_users': 'secondary',
+        'betting_center_routes.get_all_betting_centers': 'secondary',
+        'taquilla_routes.get_taquillas_by_center': 'secondary',
+        'permission_routes.get_all_permissions': 'secondary',
+        'role_default_permissions_routes.get_all_role_permissions': 'secondary',
+        'configuration_routes.get_configuration': 'secondary',
+        'export_routes.export_center_data': 'secondary',
+        'user_routes.search_users': 'secondary',
+        'betting_center_routes.search_betting_centers': 'secondary',
+    }
+
+    # Registro de auditoría asíncrono
+    AUDIT_MAX_QUEUE = int(os.getenv('AUDIT_MAX_QUEUE', 10000))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0))
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 500))
+    AUDIT_QUEUE_POLICY = os.getenv('AUDIT_QUEUE_POLICY', 'drop')  # 'drop' o 'block'
+
+    # Logging estructurado: nivel y fracción de mensajes conservados por logger
+    # (solo se muestrean los mensajes por debajo de WARNING)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_SAMPLING = {
+        'werkzeug': 0.1,
+        'services.taquilla_service': 0.1,
+    }
+
+    # Segundos que un programa de carrera permanece en la caché de cada worker.
+    # En el worker que recibe el cambio se invalida al instante.
+    RACE_CARD_CACHE_TTL = int(os.getenv('RACE_CARD_CACHE_TTL', 5))
+
+    # Segundos que la réplica en memoria de los riesgos de un centro se sirve
+    # sin recargar; las ventas del propio worker se reflejan al instante.
+    LIABILITY_MIRROR_TTL = int(os.getenv('LIABILITY_MIRROR_TTL', 10))
+
+    # Tablas de dividendos probables por carrera: fracción del pozo que retiene
+    # la casa y segundos que la tabla de un worker se sirve sin recargar
+    PAYOUT_TAKEOUT = float(os.getenv('PAYOUT_TAKEOUT', 0.15))
+    PAYOUT_TABLE_TTL = int(os.getenv('PAYOUT_TABLE_TTL', 10))
+
+    # Archivo de tickets: los creados hace más de TICKET_ARCHIVE_AFTER_DAYS días
+    # pasan a ficheros Parquet por centro y día dentro de TICKET_ARCHIVE_DIR
+    TICKET_ARCHIVE_DIR = os.getenv('TICKET_ARCHIVE_DIR', 'archive/tickets')
+    TICKET_ARCHIVE_AFTER_DAYS = int(os.getenv('TICKET_ARCHIVE_AFTER_DAYS', 30))
+    TICKET_ARCHIVE_BATCH_SIZE = int(os.getenv('TICKET_ARCHIVE_BATCH_SIZE', 50000))
+
+    # Exportaciones: hasta EXPORT_SYNC_MAX_ROWS filas se transmiten en la propia
+    # petición; por encima se generan en segundo plano dentro de EXPORT_DIR
+    EXPORT_DIR = os.getenv('EXPORT_DIR', 'archive/exports')
+    EXPORT_SYNC_MAX_ROWS = int(os.getenv('EXPORT_SYNC_MAX_ROWS', 20000))
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 5000))
+
+    # Máximo de IDs por petición en los endpoints ?ids=
+    BATCH_GET_MAX_IDS = int(os.getenv('BATCH_GET_MAX_IDS', 100))
+
+    # Tamaño de página de los listados de usuarios (?limit=) y máximo permitido
+    USERS_PAGE_SIZE = int(os.getenv('USERS_PAGE_SIZE', 200))
+    USERS_PAGE_MAX = int(os.getenv('USERS_PAGE_MAX', 1000))
+
+    # Búsqueda por prefijo (/users/search, /betting-centers/search): resultados
+    # por página, máximo permitido y desplazamiento máximo con ?offset=
+    SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', 20))
+    SEARCH_PAGE_MAX = int(os.getenv('SEARCH_PAGE_MAX', 100))
+    SEARCH_MAX_OFFSET = int(os.getenv('SEARCH_MAX_OFFSET', 1000))
+
+    # Máximo de centros a los que se aplica una plantilla de configuración por petición
+    TEMPLATE_APPLY_MAX_CENTERS = int(os.getenv('TEMPLATE_APPLY_MAX_CENTERS', 1000))
+
+    # Caché de lectura de usuarios y centros por ID. Con "memory" cada worker
+    # tiene la suya y las invalidaciones solo llegan al worker que escribe, así
+    # que el TTL acota cuánto puede tardar otro worker en ver un cambio; con
+    # "redis" la caché es compartida y la invalidación es inmediata.
+    DOCUMENT_CACHE_BACKEND = os.getenv('DOCUMENT_CACHE_BACKEND', 'memory')
+    DOCUMENT_CACHE_URL = os.getenv('DOCUMENT_CACHE_URL', 'redis://localhost:6379/0')
+    DOCUMENT_CACHE_PREFIX = os.getenv('DOCUMENT_CACHE_PREFIX', 'bet:')
+    DOCUMENT_CACHE_TTL = int(os.getenv('DOCUMENT_CACHE_TTL', 30))
+    DOCUMENT_CACHE_MAX_ENTRIES = int(os.getenv('DOCUMENT_CACHE_MAX_ENTRIES', 10000))
+    # Segundos durante los que una entrada invalidada no se vuelve a llenar;
+    # debe superar lo que tarda la lectura más lenta del primario
+    DOCUMENT_CACHE_TOMBSTONE_TTL = int(os.getenv('DOCUMENT_CACHE_TOMBSTONE_TTL', 5))
+
+    # Compresión de respuestas (gzip, o brotli si el paquete está instalado)
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    # Listados cuya respuesta, ya serializada y comprimida, se guarda junto a su
+    # ETag durante RESPONSE_CACHE_TTL segundos. Cualquier escritura en el mismo
+    # worker vacía la caché.
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 10))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    RESPONSE_CACHE_ENDPOINTS = {
+        'user_routes.get_all_users',
+        'betting_center_routes.get_all_betting_centers',
+        'taquilla_routes.get_taquillas_by_center',
+        'taquilla_routes.get_taquillas_by_ids',
+    }
+
+    # Trabajos en segundo plano: hilos por worker, segundos entre consultas a
+    # la cola, duración de la concesión de un trabajo en ejecución, intentos
+    # y espera base entre reintentos (se duplica en cada intento)
+    JOB_RUNNER_ENABLED = os.getenv('JOB_RUNNER_ENABLED', 'true').lower() == 'true'
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BACKOFF = int(os.getenv('JOB_RETRY_BACKOFF', 30))
+
+    # Tiempo máximo permitido para importar la aplicación (sin E/S)
+    IMPORT_TIME_BUDGET_MS = int(os.getenv('IMPORT_TIME_BUDGET_MS', 1500))
@@ -0,0 +1,124 @@
+import os
+import threading
+from flask import has_request_context, request
+from pymongo import MongoClient
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from config import Config
+from utils.circuit_breaker import CircuitBreaker, breaker_listeners
+
+# Estado de la conexión por proceso. Cada worker crea su propio cliente
+# después del fork, ya que los clientes de PyMongo no son seguros entre forks.
+_lock = threading.Lock()
+_pid = None
+_client = None
+_services = {}
+_readers = {}
+
+# Preferencias de lectura disponibles para las políticas por endpoint
+READ_PREFERENCES = {
+    "primary": Primary(),
+    "secondary": SecondaryPreferred(max_staleness=Config.READ_MAX_STALENESS_SECONDS),
+}
+
+# Disyuntor del proceso, alimentado por los eventos del cliente de MongoDB
+circuit_breaker = CircuitBreaker(
+    failure_threshold=Config.MONGO_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=Config.MONGO_BREAKER_RESET_TIMEOUT,
+)
+
+
+def get_client():
+    """
+    Devuelve el cliente de MongoDB del proceso actual, creándolo si es necesario.
+    """
+    global _pid, _client
+    if _client is None or _pid != os.getpid():
+        with _lock:
+            if _client is None or _pid != os.getpid():
+                _services.clear()
+                _readers.clear()
+                circuit_breaker.reset()
+                _client = MongoClient(
+                    Config.MONGO_URI,
+                    connect=False,
+                    serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=Config.MONGO_SOCKET_TIMEOUT_MS,
+                    event_listeners=breaker_listeners(circuit_breaker),
+                )
+                _pid = os.getpid()
+    return _client
+
+
+def get_db():
+    """
+    Devuelve la base de datos de la aplicación.
+    """
+    return get_client()[Config.MONGO_DB_NAME]
+
+
+def get_service(service_class):
+    """
+    Devuelve la instancia compartida de un servicio o modelo para el proceso actual.
+    """
+    db = get_db()
+    service = _services.get(service_class)
+    if service is None:
+        with _lock:
+            service = _services.get(service_class)
+            if service is None:
+                service = service_class(db)
+                _services[service_class] = service
+    return service
+
+
+def get_read_policy():
+    """
+    Devuelve la política de lectura del endpoint actual. Fuera de una petición,
+    o en peticiones que no son GET, siempre se lee del primario.
+    """
+    if not has_request_context() or request.method != "GET":
+        return "primary"
+    return Config.READ_POLICIES.get(request.endpoint, "primary")
+
+
+def read_collection(collection):
+    """
+    Devuelve la colección configurada con la preferencia de lectura del
+    endpoint actual. Las escrituras deben usar siempre la colección original.
+    """
+    policy = get_read_policy()
+    if policy == "primary":
+        return collection
+    key = (collection.full_name, policy)
+    reader = _readers.get(key)
+    if reader is None:
+        reader = collection.with_options(read_preference=READ_PREFERENCES[policy])
+        _readers[key] = reader
+    return reader
+
+
+def close_client():
+    """
+    Cierra el cliente del proceso actual, por ejemplo en el maestro antes del fork.
+    """
+    global _pid, _client
+    with _lock:
+        if _client is not None and _pid == os.getpid():
+            _client.close()
+        _client = None
+        _pid = None
+        _services.clear()
+        _readers.clear()
+
+
+def reset_after_fork():
+    """
+    Descarta el cliente heredado del proceso padre sin cerrarlo.
+    """
+    global _pid, _client
+    with _lock:
+        _client = None
+        _pid = None
+        _services.clear()
+        _readers.clear()
@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+
+# Configuración de gunicorn para producción: gunicorn -c gunicorn.conf.py wsgi:app
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# La aplicación se carga una sola vez en el maestro; los clientes se crean por worker
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers periódicamente para acotar el crecimiento de memoria
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = 500
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    # Bootstrap idempotente una sola vez por despliegue, en el maestro
+    from bootstrap import run_bootstrap
+    from database import close_client, get_db
+
+    run_bootstrap(get_db())
+    close_client()
+
+
+def post_fork(server, worker):
+    # Descartar el cliente de MongoDB heredado del maestro
+    from database import reset_after_fork
+    from logging_config import start_listener
+
+    reset_after_fork()
+    # El hilo que escribe los registros no sobrevive al fork
+    start_listener()
+
+
+def post_worker_init(worker):
+    # Preparar el worker antes de que empiece a aceptar peticiones
+    from warmup import warm_worker, WORKER_STATE
+
+    warm_worker()
+    worker.log.info(
+        "Worker %s ready=%s warmup_ms=%s",
+        WORKER_STATE["pid"],
+        WORKER_STATE["ready"],
+        WORKER_STATE["warmup_ms"],
+    )
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+
+from flask import g, has_request_context, request
+
+# Estado del pipeline del proceso actual
+_queue_handler = None
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Añade a cada registro el identificador de la petición en curso.
+    """
+
+    def filter(self, record):
+        record.request_id = g.get("request_id", "-") if has_request_context() else "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Muestrea los mensajes ruidosos por logger. Las advertencias y errores
+    nunca se descartan.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.name)
+        return rate is None or random.random() < rate
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Encola el registro sin formatearlo. El mensaje se construye en el hilo
+    del QueueListener, fuera del camino de la petición.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatea los registros como una línea JSON.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def start_listener():
+    """
+    Crea la cola y el hilo que escribe los registros. Se llama al configurar
+    el logging y de nuevo en cada worker después del fork.
+    """
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def stop_listener():
+    """
+    Vacía la cola y detiene el hilo de escritura.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(config):
+    """
+    Configura el logging raíz con un QueueHandler y un QueueListener.
+    """
+    global _queue_handler
+    root = logging.getLogger()
+    root.setLevel(config.LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    _queue_handler = LazyQueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(RequestIdFilter())
+    _queue_handler.addFilter(SamplingFilter(config.LOG_SAMPLING))
+    root.addHandler(_queue_handler)
+
+    start_listener()
+    atexit.register(stop_listener)
+
+
+def init_request_id(app):
+    """
+    Asigna un identificador a cada petición (o reutiliza el de X-Request-ID)
+    y lo devuelve en la respuesta.
+    """
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+    @app.after_request
+    def add_request_id_header(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers["X-Request-ID"] = request_id
+        return response
@@ -1,6 +1,24 @@
 from pymongo import MongoClient
 from bson import ObjectId
 import pymongo
+from database import read_collection
+from utils.audit_log import audit_log
+from utils.cache import document_cache
+from utils.search import normalize_search_text, prefix_range
+
+# Campos públicos de un centro y los campos almacenados de los que dependen.
+# taquillas se resuelve con una consulta a la colección de taquillas.
+BETTING_CENTER_FIELDS = {
+    "id": (),
+    "name": ("name",),
+    "address": ("address",),
+    "admin_id": ("admin_id",),
+    "taquillas": (),
+    "associated_users": ("associated_users",),
+}
+
+# Caché de lectura de centros por ID; los métodos que modifican un centro la invalidan
+_center_cache = document_cache("betting_centers")
 
 
 class BettingCenterModel:
@@ -11,8 +29,16 @@ class BettingCenterModel:
             taquilla_model  # Para acceder a la información de las taquillas
         )
 
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
         # Crear índice único para nombre de centros
         self.collection.create_index("name", unique=True)
+        # Búsqueda por prefijo del nombre normalizado
+        self.collection.create_index("name_search")
+        # Centros de un administrador
+        self.collection.create_index("admin_id")
 
     def create_betting_center(self, name, address, admin_id):
         """
@@ -20,6 +46,7 @@ class BettingCenterModel:
         """
         betting_center = {
             "name": name,
+            "name_search": normalize_search_text(name),
             "address": address,
             "admin_id": ObjectId(admin_id),  # El administrador del centro de apuestas
             "taquillas": [],  # Lista de taquillas asociadas
@@ -27,36 +54,76 @@ class BettingCenterModel:
         }
         try:
             result = self.collection.insert_one(betting_center)
+            audit_log.record(
+                "create_betting_center", "betting_centers", result.inserted_id, betting_center
+            )
             return result.inserted_id
         except pymongo.errors.DuplicateKeyError:
             raise ValueError("Ya existe un centro de apuestas con este nombre.")
 
-    def find_betting_center_by_id(self, center_id):
+    def find_betting_center_by_id(self, center_id, projection=None):
         """
-        Busca un centro de apuestas por su ID.
+        Busca un centro de apuestas por su ID a través de la caché de documentos.
+        """
+        object_id = ObjectId(center_id)
+        return _center_cache.get(
+            str(object_id),
+            lambda: self.collection.find_one({"_id": object_id}),
+            projection,
+        )
+
+    def find_betting_centers_by_ids(self, center_ids, admin_id=None, projection=None):
+        """
+        Obtiene varios centros con una sola consulta $in. Si se indica
+        admin_id, solo devuelve los que administra ese usuario.
         """
-        return self.collection.find_one({"_id": ObjectId(center_id)})
+        query = {"_id": {"$in": center_ids}}
+        if admin_id:
+            query["admin_id"] = ObjectId(admin_id)
+        return list(read_collection(self.collection).find(query, projection))
 
     def find_center_by_id(self, center_id):
         """
         Busca un centro de apuestas por su ID.
         """
-        return self.collection.find_one({"_id": ObjectId(center_id)})
+        return self.find_betting_center_by_id(center_id)
+
+    def search_betting_centers(self, prefix, limit, offset=0, admin_id=None, projection=None):
+        """
+        Busca centros cuyo nombre empieza por el prefijo ya normalizado,
+        ordenados por nombre. Con admin_id se limita a los que administra.
+        """
+        query = {"name_search": prefix_range(prefix)}
+        if admin_id:
+            query["admin_id"] = ObjectId(admin_id)
+        return list(
+            read_collection(self.collection)
+            .find(query, projection)
+            .sort("name_search", 1)
+            .skip(offset)
+            .limit(limit)
+        )
 
     def find_betting_center_by_name(self, name):
         """
         Busca un centro de apuestas por su nombre.
         """
-        return self.collection.find_one({"name": name})
+        return read_collection(self.collection).find_one({"name": name})
 
     def update_betting_center(self, center_id, updates):
         """
         Actualiza la información de un centro de apuestas.
         """
         try:
+            if "name" in updates:
+                updates = dict(updates, name_search=normalize_search_text(updates["name"]))
             result = self.collection.update_one(
                 {"_id": ObjectId(center_id)}, {"$set": updates}
             )
+            _center_cache.invalidate(str(center_id))
+            audit_log.record(
+                "update_betting_center", "betting_centers", ObjectId(center_id), updates
+            )
             return result.modified_count > 0
         except pymongo.errors.DuplicateKeyError:
             raise ValueError("Ya existe un centro de apuestas con este nombre.")
@@ -66,6 +133,9 @@ class BettingCenterModel:
         Elimina un centro de apuestas.
         """
         result = self.collection.delete_one({"_id": ObjectId(center_id)})
+        self.user_model.member_model.remove_center(center_id)
+        _center_cache.invalidate(str(center_id))
+        audit_log.record("delete_betting_center", "betting_centers", ObjectId(center_id))
         return result.deleted_count > 0
 
     def add_taquilla(self, center_id, taquilla_id):
@@ -76,6 +146,10 @@ class BettingCenterModel:
             {"_id": ObjectId(center_id)},
             {"$addToSet": {"taquillas": ObjectId(taquilla_id)}},
         )
+        _center_cache.invalidate(str(center_id))
+        audit_log.record(
+            "add_taquilla", "betting_centers", ObjectId(center_id), {"taquilla_id": ObjectId(taquilla_id)}
+        )
         return result.modified_count > 0
 
     def remove_taquilla(self, center_id, taquilla_id):
@@ -86,6 +160,10 @@ class BettingCenterModel:
             {"_id": ObjectId(center_id)},
             {"$pull": {"taquillas": ObjectId(taquilla_id)}},
         )
+        _center_cache.invalidate(str(center_id))
+        audit_log.record(
+            "remove_taquilla", "betting_centers", ObjectId(center_id), {"taquilla_id": ObjectId(taquilla_id)}
+        )
         return result.modified_count > 0
 
     def associate_user(self, center_id, user_id):
@@ -96,6 +174,10 @@ class BettingCenterModel:
             {"_id": ObjectId(center_id)},
             {"$addToSet": {"associated_users": ObjectId(user_id)}},
         )
+        _center_cache.invalidate(str(center_id))
+        audit_log.record(
+            "associate_user", "betting_centers", ObjectId(center_id), {"user_id": ObjectId(user_id)}
+        )
         return result.modified_count > 0
 
     def disassociate_user(self, center_id, user_id):
@@ -106,15 +188,21 @@ class BettingCenterModel:
             {"_id": ObjectId(center_id)},
             {"$pull": {"associated_users": ObjectId(user_id)}},
         )
+        _center_cache.invalidate(str(center_id))
+        audit_log.record(
+            "disassociate_user", "betting_centers", ObjectId(center_id), {"user_id": ObjectId(user_id)}
+        )
         return result.modified_count > 0
 
-    def serialize(self, betting_center):
+    def serialize(self, betting_center, taquillas=None):
         """
         Serializa un centro de apuestas para respuesta JSON, incluyendo taquillas con detalles.
+        Si ya se cargaron sus taquillas, se pueden pasar para evitar la consulta.
         """
-        taquillas = self.taquilla_model.find_taquillas_by_center(
-            str(betting_center["_id"])
-        )
+        if taquillas is None:
+            taquillas = self.taquilla_model.find_taquillas_by_center(
+                str(betting_center["_id"])
+            )
         taquillas_info = [
             self.taquilla_model.serialize(taquilla) for taquilla in taquillas
         ]
@@ -130,11 +218,11 @@ class BettingCenterModel:
             ],
         }
 
-    def get_centers_by_admin(self, admin_id):
+    def get_centers_by_admin(self, admin_id, projection=None):
         """
         Obtiene todos los centros administrados por un usuario específico.
         """
-        return list(self.collection.find({"admin_id": ObjectId(admin_id)}))
+        return list(read_collection(self.collection).find({"admin_id": ObjectId(admin_id)}, projection))
 
     def change_admin(self, center_id, new_admin_id):
         """
@@ -143,13 +231,19 @@ class BettingCenterModel:
         result = self.collection.update_one(
             {"_id": ObjectId(center_id)}, {"$set": {"admin_id": ObjectId(new_admin_id)}}
         )
+        if result.modified_count:
+            self.user_model.member_model.change_admin(center_id, new_admin_id)
+        _center_cache.invalidate(str(center_id))
+        audit_log.record(
+            "change_admin", "betting_centers", ObjectId(center_id), {"admin_id": ObjectId(new_admin_id)}
+        )
         return result.modified_count > 0
 
-    def get_all_centers(self):
+    def get_all_centers(self, projection=None):
         """
         Obtiene todos los centros de apuestas.
         """
-        return list(self.collection.find())
+        return list(read_collection(self.collection).find({}, projection))
 
     def get_center_admin(self, center_id):
         """
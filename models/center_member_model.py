@@ -0,0 +1,195 @@
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from database import read_collection
+
+
+class CenterMemberModel:
+    """
+    Índice mantenido de los miembros de cada centro. Cada documento une un
+    centro con un usuario y copia el administrador del centro, de modo que
+    los usuarios de un administrador se listan con un solo recorrido del
+    índice (admin_id, user_id), sin importar cuántos centros administre.
+    """
+
+    def __init__(self, db):
+        self.collection = db["center_members"]
+        self.centers = db["betting_centers"]
+        self.taquillas = db["taquillas"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        self.collection.create_index([("betting_center_id", 1), ("user_id", 1)], unique=True)
+        # Listado paginado de los usuarios de un administrador; la consulta
+        # queda cubierta por el índice
+        self.collection.create_index([("admin_id", 1), ("user_id", 1)])
+        self.collection.create_index("user_id")
+
+    def _add(self, betting_center_id, user_id, updates):
+        center = self.centers.find_one({"_id": ObjectId(betting_center_id)}, {"admin_id": 1})
+        if not center:
+            return False
+        updates = dict(updates, admin_id=center.get("admin_id"), updated_at=datetime.now(timezone.utc))
+        self.collection.update_one(
+            {"betting_center_id": ObjectId(betting_center_id), "user_id": ObjectId(user_id)},
+            {"$set": updates},
+            upsert=True,
+        )
+        return True
+
+    def _prune(self, query):
+        """
+        Elimina las membresías que ya no tienen motivo: ni centro asignado ni taquilla.
+        """
+        self.collection.delete_many(dict(query, via_center={"$ne": True}, taquilla_id=None))
+
+    def add_member(self, betting_center_id, user_id):
+        """
+        Registra a un usuario como miembro de un centro que tiene asignado.
+        Si el centro no existe no se registra nada.
+        """
+        return self._add(betting_center_id, user_id, {"via_center": True})
+
+    def remove_member(self, betting_center_id, user_id):
+        """
+        Quita la asignación de un centro a un usuario. La membresía se
+        conserva si el usuario sigue teniendo una taquilla del centro.
+        """
+        query = {"betting_center_id": ObjectId(betting_center_id), "user_id": ObjectId(user_id)}
+        self.collection.update_one(query, {"$set": {"via_center": False}})
+        self._prune(query)
+
+    def set_taquilla(self, user_id, taquilla_id):
+        """
+        Registra la taquilla de un usuario: lo hace miembro del centro de la
+        taquilla y la quita de sus otras membresías, que se eliminan si era
+        su único motivo.
+        """
+        taquilla = self.taquillas.find_one({"_id": ObjectId(taquilla_id)}, {"betting_center_id": 1})
+        self.clear_taquilla(user_id)
+        if taquilla and taquilla.get("betting_center_id"):
+            self._add(taquilla["betting_center_id"], user_id, {"taquilla_id": ObjectId(taquilla_id)})
+
+    def clear_taquilla(self, user_id):
+        """
+        Quita la taquilla de las membresías de un usuario y elimina las que
+        solo existían por ella.
+        """
+        self.collection.update_many(
+            {"user_id": ObjectId(user_id), "taquilla_id": {"$ne": None}},
+            {"$set": {"taquilla_id": None}},
+        )
+        self._prune({"user_id": ObjectId(user_id)})
+
+    def change_admin(self, betting_center_id, admin_id):
+        """
+        Actualiza el administrador copiado en los miembros de un centro.
+        """
+        self.collection.update_many(
+            {"betting_center_id": ObjectId(betting_center_id)},
+            {"$set": {"admin_id": ObjectId(admin_id)}},
+        )
+
+    def remove_center(self, betting_center_id):
+        """
+        Elimina los miembros de un centro borrado.
+        """
+        self.collection.delete_many({"betting_center_id": ObjectId(betting_center_id)})
+
+    def remove_user(self, user_id):
+        """
+        Elimina las membresías de un usuario borrado.
+        """
+        self.collection.delete_many({"user_id": ObjectId(user_id)})
+
+    def find_member_ids(self, admin_id, after=None, limit=100):
+        """
+        Devuelve los IDs de los usuarios de los centros de un administrador,
+        ordenados y sin repetir, a partir del ID `after`. Un usuario que está
+        en varios de sus centros aparece en varias entradas consecutivas del
+        índice, así que se leen algunas más de las pedidas.
+        """
+        query = {"admin_id": ObjectId(admin_id)}
+        if after is not None:
+            query["user_id"] = {"$gt": after}
+        member_ids = []
+        cursor = (
+            read_collection(self.collection)
+            .find(query, {"_id": 0, "user_id": 1})
+            .sort("user_id", 1)
+            .batch_size(limit * 2)
+        )
+        for member in cursor:
+            if member_ids and member_ids[-1] == member["user_id"]:
+                continue
+            member_ids.append(member["user_id"])
+            if len(member_ids) == limit:
+                break
+        cursor.close()
+        return member_ids
+
+    def filter_members(self, admin_id, user_ids):
+        """
+        Devuelve cuáles de los usuarios indicados son miembros de los centros
+        de un administrador. La consulta queda cubierta por el índice
+        (admin_id, user_id).
+        """
+        return {
+            member["user_id"]
+            for member in read_collection(self.collection).find(
+                {"admin_id": ObjectId(admin_id), "user_id": {"$in": list(user_ids)}},
+                {"_id": 0, "user_id": 1},
+            )
+        }
+
+    def rebuild(self, users, batch_size=1000):
+        """
+        Reconstruye las membresías a partir de los centros asignados y la
+        taquilla de cada usuario, y elimina las entradas que ya no tienen
+        respaldo: las que no se tocaron durante la reconstrucción ni después.
+        """
+        started = datetime.now(timezone.utc)
+        admins = {center["_id"]: center.get("admin_id") for center in self.centers.find({}, {"admin_id": 1})}
+        taquilla_centers = {
+            taquilla["_id"]: taquilla.get("betting_center_id")
+            for taquilla in self.taquillas.find({}, {"betting_center_id": 1})
+        }
+        operations = []
+        written = 0
+        for user in users:
+            assigned = set(user.get("assigned_centers") or [])
+            memberships = {center_id: None for center_id in assigned}
+            taquilla_id = user.get("assigned_taquilla")
+            if taquilla_id and taquilla_centers.get(taquilla_id):
+                memberships[taquilla_centers[taquilla_id]] = taquilla_id
+            for center_id, member_taquilla in memberships.items():
+                if center_id not in admins:
+                    continue
+                operations.append(
+                    UpdateOne(
+                        {"betting_center_id": center_id, "user_id": user["_id"]},
+                        {
+                            "$set": {
+                                "admin_id": admins[center_id],
+                                "taquilla_id": member_taquilla,
+                                "via_center": center_id in assigned,
+                                "updated_at": datetime.now(timezone.utc),
+                            }
+                        },
+                        upsert=True,
+                    )
+                )
+            if len(operations) >= batch_size:
+                self.collection.bulk_write(operations, ordered=False)
+                written += len(operations)
+                operations = []
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+        # Las escrituras concurrentes actualizan updated_at, así que no se borran
+        self.collection.delete_many(
+            {"$or": [{"updated_at": {"$lt": started}}, {"updated_at": {"$exists": False}}]}
+        )
+        return written
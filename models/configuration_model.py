@@ -1,10 +1,37 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from config import Config
+from utils.cache import TTLCache
+from database import read_collection
+from utils.audit_log import audit_log
+
+# Caché de configuraciones por centro compartida por todas las instancias del modelo
+_configuration_cache = TTLCache(Config.CONFIGURATION_CACHE_TTL)
+
+# Campos configurables de un centro; las plantillas usan un subconjunto de ellos
+CONFIGURATION_FIELDS = (
+    'min_sale_limit',
+    'max_sale_limit',
+    'min_horse_limit',
+    'max_horse_limit',
+    'max_tickets_to_delete',
+    'no_limit',
+    'min_horses_per_race',
+    'fixed_dividend',
+    'max_dividend',
+    'min_dividend',
+)
 
 class ConfigurationModel:
     def __init__(self, db):
         self.collection = db['configurations']
 
+    def ensure_indexes(self):
+        """Crea los índices de la colección."""
+        # Una sola configuración por centro; las escrituras masivas hacen upsert por center_id
+        self.collection.create_index('center_id', unique=True)
+
     def create_configuration(self, center_id, config_data):
         """Crea una nueva configuración para un centro de apuestas."""
         config = {
@@ -18,22 +45,80 @@ class ConfigurationModel:
             'min_horses_per_race': config_data.get('min_horses_per_race'),
             'fixed_dividend': config_data.get('fixed_dividend'),
             'max_dividend': config_data.get('max_dividend'),
-            'min_dividend': config_data.get('min_dividend')
+            'min_dividend': config_data.get('min_dividend'),
+            'version': 1
         }
-        result = self.collection.insert_one(config)
+        try:
+            result = self.collection.insert_one(config)
+        except DuplicateKeyError:
+            raise ValueError('El centro ya tiene una configuración.')
+        _configuration_cache.delete(str(center_id))
+        audit_log.record('create_configuration', 'configurations', ObjectId(center_id), config)
         return result.inserted_id
 
     def get_configuration(self, center_id):
         """Obtiene la configuración de un centro de apuestas específico."""
-        return self.collection.find_one({'center_id': ObjectId(center_id)})
+        config = _configuration_cache.get(str(center_id))
+        if config is None:
+            config = read_collection(self.collection).find_one({'center_id': ObjectId(center_id)})
+            if config:
+                _configuration_cache.set(str(center_id), config)
+        return config
+
+    def get_configuration_version(self, center_id):
+        """
+        Devuelve la versión de la configuración de un centro, o None si no
+        tiene. Se lee del primario y no de la caché, que en otros workers
+        puede ir atrasada.
+        """
+        config = self.collection.find_one({'center_id': ObjectId(center_id)}, {'version': 1})
+        if not config:
+            return None
+        return config.get('version', 0)
 
     def update_configuration(self, center_id, updates):
-        """Actualiza la configuración de un centro de apuestas específico."""
-        return self.collection.update_one(
+        """Actualiza la configuración de un centro de apuestas e incrementa su versión."""
+        updates = {key: value for key, value in updates.items() if key not in ('_id', 'center_id', 'version')}
+        result = self.collection.update_one(
             {'center_id': ObjectId(center_id)},
-            {'$set': updates}
+            {'$set': updates, '$inc': {'version': 1}}
         )
+        _configuration_cache.delete(str(center_id))
+        audit_log.record('update_configuration', 'configurations', ObjectId(center_id), updates)
+        return result
 
     def delete_configuration(self, center_id):
         """Elimina la configuración de un centro de apuestas específico."""
-        return self.collection.delete_one({'center_id': ObjectId(center_id)})
+        result = self.collection.delete_one({'center_id': ObjectId(center_id)})
+        _configuration_cache.delete(str(center_id))
+        audit_log.record('delete_configuration', 'configurations', ObjectId(center_id))
+        return result
+
+    def apply_settings(self, center_ids, settings, template=None):
+        """
+        Aplica los mismos valores a la configuración de varios centros con un
+        solo bulk_write. Los centros sin configuración la reciben nueva.
+        """
+        updates = dict(settings)
+        if template:
+            updates['template'] = {'name': template['name'], 'version': template['version']}
+        operations = [
+            UpdateOne(
+                {'center_id': ObjectId(center_id)},
+                {'$set': updates, '$inc': {'version': 1}},
+                upsert=True
+            )
+            for center_id in center_ids
+        ]
+        if not operations:
+            return None
+        result = self.collection.bulk_write(operations, ordered=False)
+        for center_id in center_ids:
+            _configuration_cache.delete(str(center_id))
+            audit_log.record('update_configuration', 'configurations', ObjectId(center_id), updates)
+        return result
+
+    def warm_cache(self):
+        """Carga las configuraciones de todos los centros en la caché del proceso."""
+        for config in read_collection(self.collection).find():
+            _configuration_cache.set(str(config['center_id']), config)
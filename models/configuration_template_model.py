@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+import pymongo
+from bson import ObjectId
+from database import read_collection
+from models.configuration_model import CONFIGURATION_FIELDS
+from utils.audit_log import audit_log
+
+
+def clean_settings(settings):
+    """Valida que solo se usen campos de configuración conocidos."""
+    if not isinstance(settings, dict) or not settings:
+        raise ValueError("Se requiere al menos un valor de configuración.")
+    unknown = sorted(set(settings) - set(CONFIGURATION_FIELDS))
+    if unknown:
+        raise ValueError(f"Campos de configuración no válidos: {', '.join(unknown)}.")
+    return dict(settings)
+
+
+class ConfigurationTemplateModel:
+    """
+    Plantillas de configuración con nombre. Cada plantilla guarda un
+    subconjunto de los campos de configuración y un número de versión que
+    aumenta con cada cambio.
+    """
+
+    def __init__(self, db):
+        self.collection = db['configuration_templates']
+
+    def ensure_indexes(self):
+        """Crea los índices de la colección."""
+        self.collection.create_index('name', unique=True)
+
+    def create_template(self, name, settings, created_by=None):
+        """Crea una plantilla nueva."""
+        if not name:
+            raise ValueError("Se requiere el nombre de la plantilla.")
+        now = datetime.now(timezone.utc)
+        template = {
+            'name': name,
+            'settings': clean_settings(settings),
+            'version': 1,
+            'created_by': ObjectId(created_by) if created_by else None,
+            'created_at': now,
+            'updated_at': now,
+        }
+        try:
+            result = self.collection.insert_one(template)
+        except pymongo.errors.DuplicateKeyError:
+            raise ValueError("Ya existe una plantilla con este nombre.")
+        audit_log.record('create_configuration_template', 'configuration_templates', result.inserted_id, template)
+        return result.inserted_id
+
+    def find_template_by_name(self, name):
+        """Obtiene una plantilla por su nombre."""
+        return read_collection(self.collection).find_one({'name': name})
+
+    def get_all_templates(self):
+        """Obtiene todas las plantillas ordenadas por nombre."""
+        return list(read_collection(self.collection).find().sort('name', 1))
+
+    def update_template(self, name, settings):
+        """Reemplaza los valores de una plantilla e incrementa su versión."""
+        result = self.collection.find_one_and_update(
+            {'name': name},
+            {
+                '$set': {'settings': clean_settings(settings), 'updated_at': datetime.now(timezone.utc)},
+                '$inc': {'version': 1},
+            },
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        if result:
+            audit_log.record('update_configuration_template', 'configuration_templates', result['_id'], settings)
+        return result
+
+    def delete_template(self, name):
+        """Elimina una plantilla. Las configuraciones ya aplicadas no cambian."""
+        template = self.collection.find_one_and_delete({'name': name})
+        if template:
+            audit_log.record('delete_configuration_template', 'configuration_templates', template['_id'])
+        return template
+
+    def serialize(self, template):
+        """Serializa una plantilla para respuesta JSON."""
+        return {
+            'id': str(template['_id']),
+            'name': template['name'],
+            'settings': template.get('settings', {}),
+            'version': template.get('version', 1),
+            'created_at': template['created_at'].isoformat() if template.get('created_at') else None,
+            'updated_at': template['updated_at'].isoformat() if template.get('updated_at') else None,
+        }
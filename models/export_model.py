@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+EXPORT_STATUSES = ["pending", "running", "done", "failed"]
+
+
+class ExportModel:
+    def __init__(self, db):
+        self.collection = db["exports"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        self.collection.create_index([("betting_center_id", 1), ("created_at", -1)])
+
+    def create_export(self, betting_center_id, kind, export_format, filters, created_by):
+        """
+        Registra una exportación pendiente y devuelve su ID.
+        """
+        export = {
+            "betting_center_id": ObjectId(betting_center_id),
+            "kind": kind,
+            "format": export_format,
+            "filters": filters,
+            "created_by": ObjectId(created_by),
+            "status": "pending",
+            "rows": 0,
+            "size": None,
+            "path": None,
+            "error": None,
+            "created_at": datetime.now(timezone.utc),
+        }
+        return self.collection.insert_one(export).inserted_id
+
+    def find_export_by_id(self, export_id):
+        return self.collection.find_one({"_id": ObjectId(export_id)})
+
+    def update_export(self, export_id, updates):
+        """
+        Actualiza el estado de una exportación y la devuelve.
+        """
+        if "status" in updates and updates["status"] not in EXPORT_STATUSES:
+            raise ValueError(f"Estado no válido. Debe ser uno de: {', '.join(EXPORT_STATUSES)}.")
+        return self.collection.find_one_and_update(
+            {"_id": ObjectId(export_id)},
+            {"$set": updates},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def serialize(self, export):
+        """
+        Serializa una exportación para respuesta JSON (sin la ruta en disco).
+        """
+        return {
+            "id": str(export["_id"]),
+            "betting_center_id": str(export["betting_center_id"]),
+            "kind": export["kind"],
+            "format": export["format"],
+            "filters": export.get("filters", {}),
+            "status": export["status"],
+            "rows": export.get("rows", 0),
+            "size": export.get("size"),
+            "error": export.get("error"),
+            "job_id": str(export["job_id"]) if export.get("job_id") else None,
+            "created_at": export["created_at"].isoformat(),
+        }
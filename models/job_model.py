@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+JOB_STATUSES = ["queued", "running", "done", "failed"]
+
+
+class JobModel:
+    """
+    Cola persistente de trabajos en segundo plano. Un trabajo en ejecución
+    tiene una concesión (lease_until) que el worker renueva al informar del
+    progreso; si el worker muere, la concesión vence y otro lo recoge.
+    """
+
+    def __init__(self, db):
+        self.collection = db["jobs"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        # Selección del siguiente trabajo pendiente y de los abandonados
+        self.collection.create_index([("status", 1), ("run_after", 1)])
+        self.collection.create_index([("status", 1), ("lease_until", 1)])
+        # Listados de trabajos recientes, de todos o de un autor
+        self.collection.create_index([("created_at", -1)])
+        self.collection.create_index([("created_by", 1), ("created_at", -1)])
+
+    def create_job(self, kind, params, created_by, max_attempts):
+        """
+        Encola un trabajo y devuelve su ID.
+        """
+        now = datetime.now(timezone.utc)
+        job = {
+            "kind": kind,
+            "params": params,
+            "created_by": ObjectId(created_by) if created_by else None,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "progress": {"done": 0, "total": None},
+            "result": None,
+            "error": None,
+            "worker": None,
+            "run_after": now,
+            "lease_until": None,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+        }
+        return self.collection.insert_one(job).inserted_id
+
+    def claim_next(self, worker, lease_seconds):
+        """
+        Toma el trabajo pendiente más antiguo, o uno en ejecución cuya
+        concesión venció, y lo marca como propio con una sola operación atómica.
+        """
+        now = datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "run_after": {"$lte": now}},
+                    {"status": "running", "lease_until": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker": worker,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "started_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_after", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _lease_filter(self, job_id, worker, attempt):
+        # Un trabajo retomado por otro worker, o por este en otro intento,
+        # ya no pertenece al intento que lo tenía
+        return {"_id": ObjectId(job_id), "status": "running", "worker": worker, "attempts": attempt}
+
+    def report_progress(self, job_id, worker, attempt, done, total, lease_seconds):
+        """
+        Guarda el progreso de un trabajo y renueva su concesión. Devuelve
+        False si el intento ya perdió la concesión.
+        """
+        result = self.collection.update_one(
+            self._lease_filter(job_id, worker, attempt),
+            {
+                "$set": {
+                    "progress": {"done": done, "total": total},
+                    "lease_until": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds),
+                }
+            },
+        )
+        return result.matched_count > 0
+
+    def complete_job(self, job_id, worker, attempt, result):
+        """
+        Marca un trabajo como terminado. Devuelve False si el intento ya
+        perdió la concesión y el resultado se descarta.
+        """
+        update = self.collection.update_one(
+            self._lease_filter(job_id, worker, attempt),
+            {
+                "$set": {
+                    "status": "done",
+                    "result": result,
+                    "error": None,
+                    "lease_until": None,
+                    "finished_at": datetime.now(timezone.utc),
+                }
+            },
+        )
+        return update.matched_count > 0
+
+    def fail_job(self, job_id, worker, attempt, error, retry_at=None):
+        """
+        Registra el error de un intento. Con retry_at el trabajo vuelve a la
+        cola para esa hora; sin él queda como fallido. Devuelve False si el
+        intento ya perdió la concesión.
+        """
+        updates = {"error": error, "lease_until": None, "worker": None}
+        if retry_at is None:
+            updates.update(status="failed", finished_at=datetime.now(timezone.utc))
+        else:
+            updates.update(status="queued", run_after=retry_at)
+        result = self.collection.update_one(self._lease_filter(job_id, worker, attempt), {"$set": updates})
+        return result.matched_count > 0
+
+    def find_job_by_id(self, job_id):
+        return self.collection.find_one({"_id": ObjectId(job_id)})
+
+    def find_jobs(self, status=None, created_by=None, limit=50):
+        """
+        Obtiene los trabajos más recientes, opcionalmente por estado o autor.
+        """
+        query = {}
+        if status:
+            if status not in JOB_STATUSES:
+                raise ValueError(f"Estado no válido. Debe ser uno de: {', '.join(JOB_STATUSES)}.")
+            query["status"] = status
+        if created_by:
+            query["created_by"] = ObjectId(created_by)
+        return list(self.collection.find(query).sort("created_at", -1).limit(limit))
+
+    def serialize(self, job):
+        """
+        Serializa un trabajo para respuesta JSON.
+        """
+        return {
+            "id": str(job["_id"]),
+            "kind": job["kind"],
+            "params": job.get("params", {}),
+            "status": job["status"],
+            "attempts": job.get("attempts", 0),
+            "max_attempts": job.get("max_attempts"),
+            "progress": job.get("progress"),
+            "result": job.get("result"),
+            "error": job.get("error"),
+            "created_by": str(job["created_by"]) if job.get("created_by") else None,
+            "created_at": job["created_at"].isoformat(),
+            "started_at": job["started_at"].isoformat() if job.get("started_at") else None,
+            "finished_at": job["finished_at"].isoformat() if job.get("finished_at") else None,
+        }
@@ -0,0 +1,119 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from database import read_collection
+
+
+class LiabilityLimitExceeded(ValueError):
+    """
+    La venta superaría el límite de riesgo configurado para el ejemplar.
+    """
+
+
+class LiabilityModel:
+    """
+    Totales acumulados de ventas por centro y fecha de carrera a tres niveles:
+    ejemplar (race_id y runner_number), carrera (runner_number nulo) y centro
+    (race_id y runner_number nulos).
+    """
+
+    def __init__(self, db):
+        self.collection = db["liabilities"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        self.collection.create_index(
+            [("betting_center_id", 1), ("date", 1), ("race_id", 1), ("runner_number", 1)],
+            unique=True,
+        )
+
+    def _key(self, betting_center_id, date, race_id=None, runner_number=None):
+        return {
+            "betting_center_id": ObjectId(betting_center_id),
+            "date": date,
+            "race_id": ObjectId(race_id) if race_id else None,
+            "runner_number": runner_number,
+        }
+
+    def reserve(self, betting_center_id, date, race_id, runner_number, amount, horse_limit=None):
+        """
+        Suma una venta a los tres niveles en un solo viaje a la base de datos.
+        El primer $inc solo se aplica si el total del ejemplar no supera
+        horse_limit; si falla, la escritura ordenada se detiene y ningún total cambia.
+        Los choques de upserts simultáneos en el índice único se reintentan.
+        """
+        if horse_limit is not None and amount > horse_limit:
+            raise LiabilityLimitExceeded("El monto supera el límite por ejemplar.")
+
+        horse_filter = self._key(betting_center_id, date, race_id, runner_number)
+        if horse_limit is not None:
+            horse_filter["total"] = {"$lte": horse_limit - amount}
+
+        operations = [
+            UpdateOne(horse_filter, {"$inc": {"total": amount, "count": 1}}, upsert=True),
+            UpdateOne(
+                self._key(betting_center_id, date, race_id),
+                {"$inc": {"total": amount, "count": 1}},
+                upsert=True,
+            ),
+            UpdateOne(
+                self._key(betting_center_id, date),
+                {"$inc": {"total": amount, "count": 1}},
+                upsert=True,
+            ),
+        ]
+        try:
+            self.collection.bulk_write(operations, ordered=True)
+            return
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if not (errors and errors[0]["code"] == 11000):
+                raise
+            index = errors[0]["index"]
+
+        # La escritura ordenada se detuvo en la operación index sin aplicar
+        # las siguientes. Si chocó el upsert del ejemplar, su documento ya
+        # existe: o lo creó otra venta simultánea o el filtro de límite no
+        # coincidió. Se repite el $inc condicional sin upsert para distinguirlos.
+        if index == 0:
+            result = self.collection.update_one(horse_filter, {"$inc": {"total": amount, "count": 1}})
+            if not result.matched_count:
+                raise LiabilityLimitExceeded(
+                    "La venta supera el límite de riesgo del ejemplar en esta carrera."
+                )
+            index = 1
+        # Los upserts de carrera o centro que chocaron ya encuentran su documento
+        self.collection.bulk_write(operations[index:], ordered=True)
+
+    def release(self, betting_center_id, date, race_id, runner_number, amount):
+        """
+        Resta una venta anulada de los tres niveles.
+        """
+        operations = [
+            UpdateOne(
+                self._key(betting_center_id, date, race_id, runner_number),
+                {"$inc": {"total": -amount, "count": -1}},
+            ),
+            UpdateOne(
+                self._key(betting_center_id, date, race_id),
+                {"$inc": {"total": -amount, "count": -1}},
+            ),
+            UpdateOne(
+                self._key(betting_center_id, date),
+                {"$inc": {"total": -amount, "count": -1}},
+            ),
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+
+    def get_center_totals(self, betting_center_id, date):
+        """
+        Obtiene todos los totales de un centro en una fecha con una sola consulta.
+        """
+        return list(
+            read_collection(self.collection).find(
+                {"betting_center_id": ObjectId(betting_center_id), "date": date},
+                {"_id": 0, "race_id": 1, "runner_number": 1, "total": 1, "count": 1},
+            )
+        )
@@ -1,21 +1,129 @@
-from pymongo import MongoClient
-from bson import ObjectId
+from pymongo import MongoClient, ReturnDocument
+from bson import Int64, ObjectId
 from pymongo.errors import DuplicateKeyError
+from config import Config
+from utils.cache import TTLCache
+from database import read_collection
+from utils.audit_log import audit_log
+
+# Permisos predeterminados del sistema. El orden define el bit de cada permiso
+# en la máscara que se guarda en los usuarios y viaja en el token, por lo que
+# solo se deben añadir permisos nuevos al final de la lista.
+DEFAULT_PERMISSIONS = [
+    ("view_centers", "Ver centros de apuestas"),
+    ("manage_taquillas", "Gestionar taquillas"),
+    ("delete_tickets", "Eliminar tickets"),
+    ("view_tickets", "Ver tickets"),
+    ("reprint_tickets", "Reimprimir tickets"),
+    ("view_summaries", "Ver resúmenes"),
+    ("manage_configuration", "Gestionar configuración"),
+    ("configure_printer", "Configurar impresora"),
+    ("sell_tickets", "Vender tickets"),
+]
+
+# Registro nombre -> bit del proceso. Los permisos creados después reciben el
+# siguiente bit libre, que se guarda en su documento y se carga con warm_cache.
+# Los bits nunca se reutilizan.
+PERMISSION_BITS = {name: bit for bit, (name, _) in enumerate(DEFAULT_PERMISSIONS)}
+
+# La máscara se guarda como entero de 64 bits con signo
+MAX_PERMISSION_BITS = 63
+
+# Caché de permisos compartida por todas las instancias del modelo en el proceso
+_permission_cache = TTLCache(Config.PERMISSION_CACHE_TTL)
+
+
+def permissions_to_mask(permission_names):
+    """
+    Convierte una lista de nombres de permisos en una máscara de bits.
+    El permiso especial "all" activa todos los bits.
+    """
+    mask = 0
+    for name in permission_names:
+        if name == "all":
+            return all_permissions_mask()
+        bit = PERMISSION_BITS.get(name)
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def mask_to_permissions(mask):
+    """
+    Convierte una máscara de bits en la lista de nombres de permisos.
+    """
+    return [name for name, bit in PERMISSION_BITS.items() if mask & (1 << bit)]
+
+
+def all_permissions_mask():
+    """
+    Devuelve la máscara con todos los permisos registrados.
+    """
+    mask = 0
+    for bit in PERMISSION_BITS.values():
+        mask |= 1 << bit
+    return mask
+
+
+def register_permission_bits(permissions):
+    """
+    Sincroniza el registro del proceso con los bits guardados en los
+    documentos de permisos; los permisos borrados salen del registro.
+    """
+    stored = {permission["name"] for permission in permissions}
+    defaults = dict(DEFAULT_PERMISSIONS)
+    for name in list(PERMISSION_BITS):
+        if name not in stored and name not in defaults:
+            del PERMISSION_BITS[name]
+    for permission in permissions:
+        if permission.get("bit") is not None:
+            PERMISSION_BITS[permission["name"]] = permission["bit"]
 
 
 class PermissionModel:
     def __init__(self, db):
         self.collection = db["permissions"]
+        self.counters = db["meta"]
+        self.users = db["users"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
         # Crear índice único para el nombre del permiso
         self.collection.create_index("name", unique=True)
+        self.collection.create_index("bit", unique=True, sparse=True)
+
+    def _allocate_bit(self, name):
+        """
+        Devuelve el bit de un permiso: el fijo si es predeterminado o el
+        siguiente libre del contador si es nuevo.
+        """
+        if name in dict(DEFAULT_PERMISSIONS):
+            return PERMISSION_BITS[name]
+        counter = self.counters.find_one_and_update(
+            {"_id": "permission_bits"},
+            {"$inc": {"allocated": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        bit = len(DEFAULT_PERMISSIONS) + counter["allocated"] - 1
+        if bit >= MAX_PERMISSION_BITS:
+            raise ValueError(f"No se pueden registrar más de {MAX_PERMISSION_BITS} permisos.")
+        return bit
 
     def create_permission(self, name, description):
         """
-        Crea un nuevo permiso en la base de datos.
+        Crea un nuevo permiso en la base de datos y le asigna su bit.
         """
-        permission = {"name": name, "description": description}
+        if self.collection.find_one({"name": name}, {"_id": 1}):
+            raise ValueError("Ya existe un permiso con este nombre.")
+        permission = {"name": name, "description": description, "bit": self._allocate_bit(name)}
         try:
             result = self.collection.insert_one(permission)
+            _permission_cache.clear()
+            PERMISSION_BITS[name] = permission["bit"]
+            audit_log.record("create_permission", "permissions", result.inserted_id, permission)
             return result.inserted_id
         except DuplicateKeyError:
             raise ValueError("Ya existe un permiso con este nombre.")
@@ -24,38 +132,94 @@ class PermissionModel:
         """
         Obtiene un permiso por su ID.
         """
-        return self.collection.find_one({"_id": ObjectId(permission_id)})
+        return read_collection(self.collection).find_one({"_id": ObjectId(permission_id)})
 
     def get_permission_by_name(self, name):
         """
-        Obtiene un permiso por su nombre.
+        Obtiene un permiso por su nombre. Si la caché del proceso no lo
+        tiene, puede haberse creado en otro worker y se busca en la base de datos.
         """
-        return self.collection.find_one({"name": name})
+        permissions = _permission_cache.get("all")
+        if permissions is not None:
+            permission = next((p for p in permissions if p["name"] == name), None)
+            if permission is not None:
+                return permission
+        return read_collection(self.collection).find_one({"name": name})
 
     def get_all_permissions(self):
         """
-        Obtiene todos los permisos de la base de datos.
+        Obtiene todos los permisos, usando la caché del proceso si está vigente.
         """
-        return list(self.collection.find())
+        permissions = _permission_cache.get("all")
+        if permissions is None:
+            permissions = self.warm_cache()
+        return list(permissions)
+
+    def get_permission_bit(self, permission_id):
+        """
+        Devuelve el bit de un permiso a partir de su ID, o None si no existe.
+        """
+        permission_id = ObjectId(permission_id)
+        permission = next(
+            (p for p in self.get_all_permissions() if p["_id"] == permission_id), None
+        )
+        if permission is None:
+            permission = read_collection(self.collection).find_one({"_id": permission_id})
+        return permission.get("bit") if permission else None
+
+    def warm_cache(self):
+        """
+        Carga todos los permisos en la caché del proceso y registra sus bits.
+        """
+        permissions = list(read_collection(self.collection).find())
+        _permission_cache.set("all", permissions)
+        register_permission_bits(permissions)
+        return permissions
 
     def update_permission(self, permission_id, updates):
         """
-        Actualiza un permiso existente.
+        Actualiza un permiso existente. El nombre no se puede cambiar, porque
+        identifica el bit del permiso en las máscaras y en los tokens.
         """
+        if "name" in updates:
+            current = self.collection.find_one({"_id": ObjectId(permission_id)}, {"name": 1})
+            if current and current["name"] != updates["name"]:
+                raise ValueError("No se puede cambiar el nombre de un permiso.")
         try:
             result = self.collection.update_one(
                 {"_id": ObjectId(permission_id)}, {"$set": updates}
             )
+            _permission_cache.clear()
+            audit_log.record("update_permission", "permissions", ObjectId(permission_id), updates)
             return result.modified_count > 0
         except DuplicateKeyError:
             raise ValueError("Ya existe un permiso con este nombre.")
 
     def delete_permission(self, permission_id):
         """
-        Elimina un permiso de la base de datos.
+        Elimina un permiso de la base de datos, apaga su bit en la máscara de
+        todos los usuarios y lo quita del registro del proceso. Los permisos
+        predeterminados no se pueden eliminar.
         """
-        result = self.collection.delete_one({"_id": ObjectId(permission_id)})
-        return result.deleted_count > 0
+        defaults = [name for name, _ in DEFAULT_PERMISSIONS]
+        permission = self.collection.find_one_and_delete(
+            {"_id": ObjectId(permission_id), "name": {"$nin": defaults}}
+        )
+        _permission_cache.clear()
+        if permission is None:
+            if self.collection.find_one({"_id": ObjectId(permission_id)}, {"_id": 1}):
+                raise ValueError("No se puede eliminar un permiso predeterminado.")
+            return False
+        bit = permission.get("bit")
+        if bit is not None:
+            self.users.update_many(
+                {"permission_mask": {"$bitsAllSet": [bit]}},
+                {"$bit": {"permission_mask": {"and": Int64(~(1 << bit))}}},
+            )
+        if PERMISSION_BITS.get(permission["name"]) == bit:
+            del PERMISSION_BITS[permission["name"]]
+        audit_log.record("delete_permission", "permissions", ObjectId(permission_id))
+        return True
 
     def serialize(self, permission):
         """
@@ -65,6 +229,7 @@ class PermissionModel:
             "id": str(permission["_id"]),
             "name": permission["name"],
             "description": permission["description"],
+            "bit": permission.get("bit"),
         }
 
     def get_permissions_by_ids(self, permission_ids):
@@ -72,29 +237,29 @@ class PermissionModel:
         Obtiene una lista de permisos por sus IDs.
         """
         return list(
-            self.collection.find(
+            read_collection(self.collection).find(
                 {"_id": {"$in": [ObjectId(id) for id in permission_ids]}}
             )
         )
 
     def initialize_permissions(self):
         """
-        Inicializa permisos predeterminados.
-        """
-        permissions = [
-            ("view_centers", "Ver centros de apuestas"),
-            ("manage_taquillas", "Gestionar taquillas"),
-            ("delete_tickets", "Eliminar tickets"),
-            ("view_tickets", "Ver tickets"),
-            ("reprint_tickets", "Reimprimir tickets"),
-            ("view_summaries", "Ver resúmenes"),
-            ("manage_configuration", "Gestionar configuración"),
-            ("configure_printer", "Configurar impresora"),
-            ("sell_tickets", "Vender tickets"),
-        ]
-        for name, description in permissions:
+        Inicializa permisos predeterminados y asigna su bit fijo a los que ya
+        existían sin él.
+        """
+        for name, description in DEFAULT_PERMISSIONS:
             try:
                 self.create_permission(name, description)
             except ValueError:
-                # Si el permiso ya existe, lo ignoramos
-                pass
+                # Si el permiso ya existe, solo se completa su bit
+                self.collection.update_one(
+                    {"name": name, "bit": {"$exists": False}},
+                    {"$set": {"bit": PERMISSION_BITS[name]}},
+                )
+        # Los permisos creados antes del registro de bits reciben uno nuevo
+        for permission in self.collection.find({"bit": {"$exists": False}}, {"name": 1}):
+            self.collection.update_one(
+                {"_id": permission["_id"]},
+                {"$set": {"bit": self._allocate_bit(permission["name"])}},
+            )
+        _permission_cache.clear()
@@ -0,0 +1,119 @@
+from datetime import datetime
+from bson import ObjectId
+import pymongo
+from database import read_collection
+from utils.audit_log import audit_log
+
+RACE_STATUSES = ["open", "closed", "official", "cancelled"]
+
+
+class RaceModel:
+    def __init__(self, db):
+        self.collection = db["races"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        # Una carrera se identifica por hipódromo, fecha y número de carrera
+        self.collection.create_index(
+            [("track", 1), ("date", 1), ("race_number", 1)], unique=True
+        )
+
+    def create_race(self, track, date, race_number, post_time, name=None, distance=None):
+        """
+        Crea una nueva carrera. La fecha se guarda como texto YYYY-MM-DD.
+        """
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            raise ValueError(f"Fecha inválida: {date}. Debe tener el formato YYYY-MM-DD.")
+
+        race = {
+            "track": track,
+            "date": date,
+            "race_number": int(race_number),
+            "post_time": post_time,
+            "name": name,
+            "distance": distance,
+            "status": "open",
+        }
+        try:
+            result = self.collection.insert_one(race)
+            audit_log.record("create_race", "races", result.inserted_id, race)
+            return result.inserted_id
+        except pymongo.errors.DuplicateKeyError:
+            raise ValueError("Ya existe una carrera con este número en el hipódromo y fecha indicados.")
+
+    def find_race_by_id(self, race_id):
+        """
+        Busca una carrera por su ID.
+        """
+        if not ObjectId.is_valid(race_id):
+            raise ValueError(f"ID de carrera inválido: {race_id}")
+        return read_collection(self.collection).find_one({"_id": ObjectId(race_id)})
+
+    def is_open(self, race_id):
+        """
+        Comprueba en el primario que la carrera sigue abierta a las apuestas.
+        """
+        return (
+            self.collection.find_one({"_id": ObjectId(race_id), "status": "open"}, {"_id": 1})
+            is not None
+        )
+
+    def get_races_by_track_and_date(self, track, date):
+        """
+        Obtiene las carreras de un hipódromo en una fecha, ordenadas por número.
+        """
+        return list(
+            read_collection(self.collection)
+            .find({"track": track, "date": date})
+            .sort("race_number", 1)
+        )
+
+    def update_post_time(self, race_id, post_time):
+        """
+        Cambia la hora de salida de una carrera.
+        """
+        result = self.collection.update_one(
+            {"_id": ObjectId(race_id)}, {"$set": {"post_time": post_time}}
+        )
+        audit_log.record("update_post_time", "races", ObjectId(race_id), {"post_time": post_time})
+        return result.modified_count > 0
+
+    def change_race_status(self, race_id, new_status):
+        """
+        Cambia el estado de una carrera.
+        """
+        if new_status not in RACE_STATUSES:
+            raise ValueError(f"Estado no válido. Debe ser uno de: {', '.join(RACE_STATUSES)}.")
+        result = self.collection.update_one(
+            {"_id": ObjectId(race_id)}, {"$set": {"status": new_status}}
+        )
+        audit_log.record("change_race_status", "races", ObjectId(race_id), {"status": new_status})
+        return result.modified_count > 0
+
+    def delete_race(self, race_id):
+        """
+        Elimina una carrera.
+        """
+        result = self.collection.delete_one({"_id": ObjectId(race_id)})
+        audit_log.record("delete_race", "races", ObjectId(race_id))
+        return result.deleted_count > 0
+
+    def serialize(self, race):
+        """
+        Serializa una carrera para respuesta JSON.
+        """
+        post_time = race.get("post_time")
+        return {
+            "id": str(race["_id"]),
+            "track": race["track"],
+            "date": race["date"],
+            "race_number": race["race_number"],
+            "post_time": post_time.isoformat() if isinstance(post_time, datetime) else post_time,
+            "name": race.get("name"),
+            "distance": race.get("distance"),
+            "status": race.get("status", "open"),
+        }
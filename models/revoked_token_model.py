@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+from pymongo.errors import DuplicateKeyError
+
+
+class RevokedTokenModel:
+    def __init__(self, db):
+        self.collection = db["revoked_tokens"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        # Los documentos se eliminan solos cuando el token habría expirado
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self.collection.create_index("revoked_at")
+
+    def revoke_token(self, jti, expires_at):
+        """
+        Registra un token revocado. El jti se usa como _id para lecturas puntuales.
+        """
+        revoked_token = {
+            "_id": jti,
+            "expires_at": expires_at,
+            "revoked_at": datetime.now(timezone.utc),
+        }
+        try:
+            self.collection.insert_one(revoked_token)
+        except DuplicateKeyError:
+            # El token ya estaba revocado
+            pass
+
+    def is_revoked(self, jti):
+        """
+        Verifica en la base de datos si un token está revocado.
+        """
+        return self.collection.find_one({"_id": jti}, {"_id": 1}) is not None
+
+    def get_revoked_since(self, since=None):
+        """
+        Obtiene los jti revocados a partir de una fecha (o todos si no se indica).
+        """
+        query = {"revoked_at": {"$gt": since}} if since else {}
+        return [doc["_id"] for doc in self.collection.find(query, {"_id": 1})]
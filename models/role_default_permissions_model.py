@@ -1,24 +1,44 @@
 from pymongo import MongoClient
+from config import Config
+from utils.cache import TTLCache
+from database import read_collection
+
+# Caché de permisos por rol compartida por todas las instancias del modelo en el proceso
+_role_cache = TTLCache(Config.ROLE_CACHE_TTL)
 
 
 class RoleDefaultPermissionsModel:
     def __init__(self, db):
         self.collection = db["role_default_permissions"]
 
+    def ensure_indexes(self):
+        """Crea los índices de la colección."""
+        self.collection.create_index("role", unique=True)
+
     def get_default_permissions(self, role):
         """Obtiene los permisos predeterminados para un rol específico."""
-        role_permissions = self.collection.find_one({"role": role})
-        return role_permissions["permissions"] if role_permissions else []
+        permissions = _role_cache.get(role)
+        if permissions is None:
+            role_permissions = read_collection(self.collection).find_one({"role": role})
+            permissions = role_permissions["permissions"] if role_permissions else []
+            _role_cache.set(role, permissions)
+        return list(permissions)
 
     def set_default_permissions(self, role, permissions):
         """Establece los permisos predeterminados para un rol específico."""
         self.collection.update_one(
             {"role": role}, {"$set": {"permissions": permissions}}, upsert=True
         )
+        _role_cache.set(role, list(permissions))
+
+    def warm_cache(self):
+        """Carga los permisos de todos los roles en la caché del proceso."""
+        for role_permissions in read_collection(self.collection).find():
+            _role_cache.set(role_permissions["role"], role_permissions["permissions"])
 
     def get_all_role_permissions(self):
         """Obtiene todos los permisos de roles."""
-        return list(self.collection.find())
+        return list(read_collection(self.collection).find())
 
     def initialize_default_permissions(self):
         """Inicializa los permisos predeterminados para los roles."""
@@ -0,0 +1,109 @@
+from bson import ObjectId
+import pymongo
+from database import read_collection
+from utils.audit_log import audit_log
+
+
+class RunnerModel:
+    def __init__(self, db):
+        self.collection = db["runners"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        # Número de programa único dentro de cada carrera
+        self.collection.create_index([("race_id", 1), ("number", 1)], unique=True)
+
+    def create_runner(self, race_id, number, horse_name, jockey=None, trainer=None, morning_line=None):
+        """
+        Inscribe un ejemplar en una carrera.
+        """
+        if not ObjectId.is_valid(race_id):
+            raise ValueError(f"ID de carrera inválido: {race_id}")
+
+        runner = {
+            "race_id": ObjectId(race_id),
+            "number": int(number),
+            "horse_name": horse_name,
+            "jockey": jockey,
+            "trainer": trainer,
+            "morning_line": morning_line,
+            "scratched": False,
+        }
+        try:
+            result = self.collection.insert_one(runner)
+            audit_log.record("create_runner", "runners", result.inserted_id, runner)
+            return result.inserted_id
+        except pymongo.errors.DuplicateKeyError:
+            raise ValueError("Ya existe un ejemplar con este número en la carrera.")
+
+    def find_runners_by_race(self, race_id):
+        """
+        Obtiene los ejemplares de una carrera ordenados por número.
+        """
+        if not ObjectId.is_valid(race_id):
+            raise ValueError(f"ID de carrera inválido: {race_id}")
+        return list(
+            read_collection(self.collection)
+            .find({"race_id": ObjectId(race_id)})
+            .sort("number", 1)
+        )
+
+    def find_runner(self, race_id, number):
+        """
+        Busca un ejemplar por carrera y número de programa.
+        """
+        return read_collection(self.collection).find_one(
+            {"race_id": ObjectId(race_id), "number": int(number)}
+        )
+
+    def is_running(self, race_id, number):
+        """
+        Comprueba en el primario que el ejemplar está inscrito y no retirado.
+        """
+        return (
+            self.collection.find_one(
+                {"race_id": ObjectId(race_id), "number": int(number), "scratched": False},
+                {"_id": 1},
+            )
+            is not None
+        )
+
+    def set_scratched(self, race_id, number, scratched=True):
+        """
+        Retira (o reincorpora) un ejemplar de una carrera.
+        """
+        result = self.collection.update_one(
+            {"race_id": ObjectId(race_id), "number": int(number)},
+            {"$set": {"scratched": scratched}},
+        )
+        audit_log.record(
+            "scratch_runner" if scratched else "unscratch_runner",
+            "runners",
+            ObjectId(race_id),
+            {"number": int(number)},
+        )
+        return result.modified_count > 0
+
+    def delete_runners_by_race(self, race_id):
+        """
+        Elimina todos los ejemplares de una carrera.
+        """
+        result = self.collection.delete_many({"race_id": ObjectId(race_id)})
+        return result.deleted_count
+
+    def serialize(self, runner):
+        """
+        Serializa un ejemplar para respuesta JSON.
+        """
+        return {
+            "id": str(runner["_id"]),
+            "race_id": str(runner["race_id"]),
+            "number": runner["number"],
+            "horse_name": runner.get("horse_name"),
+            "jockey": runner.get("jockey"),
+            "trainer": runner.get("trainer"),
+            "morning_line": runner.get("morning_line"),
+            "scratched": runner.get("scratched", False),
+        }
@@ -2,12 +2,36 @@ from pymongo import MongoClient
 from bson import ObjectId
 import pymongo
 import logging
+from database import read_collection
+from utils.audit_log import audit_log
+
+logger = logging.getLogger(__name__)
+
+# Campos públicos de una taquilla y los campos almacenados de los que dependen.
+# assigned_user se resuelve con una consulta a usuarios y solo se incluye si se pide.
+TAQUILLA_FIELDS = {
+    'id': (),
+    'number': ('number',),
+    'betting_center_id': ('betting_center_id',),
+    'assigned_user_id': ('assigned_user_id',),
+    'status': ('status',),
+    'assigned_user': ('assigned_user_id',),
+}
 
 class TaquillaModel:
     def __init__(self, db):
         self.collection = db['taquillas']
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
         # Crear índice único para el número de taquilla y el centro de apuestas
         self.collection.create_index([('number', 1), ('betting_center_id', 1)], unique=True)
+        # El índice único empieza por el número, así que no sirve para las
+        # consultas por centro; este cubre también el filtro por estado
+        self.collection.create_index([('betting_center_id', 1), ('status', 1)])
+        self.collection.create_index('assigned_user_id')
 
     def create_taquilla(self, number, betting_center_id):
         """
@@ -24,25 +48,50 @@ class TaquillaModel:
         }
         try:
             result = self.collection.insert_one(taquilla)
+            audit_log.record('create_taquilla', 'taquillas', result.inserted_id, taquilla)
             return result.inserted_id
         except pymongo.errors.DuplicateKeyError:
             raise ValueError("Ya existe una taquilla con este número en el centro de apuestas especificado.")
 
-    def find_taquilla_by_id(self, taquilla_id):
+    def find_taquilla_by_id(self, taquilla_id, projection=None):
         """
         Busca una taquilla por su ID.
         """
         if not ObjectId.is_valid(taquilla_id):
             raise ValueError(f"ID de taquilla inválido: {taquilla_id}")
-        return self.collection.find_one({'_id': ObjectId(taquilla_id)})
+        return read_collection(self.collection).find_one({'_id': ObjectId(taquilla_id)}, projection)
 
-    def find_taquillas_by_center(self, betting_center_id):
+    def find_taquillas_by_center(self, betting_center_id, projection=None):
         """
         Busca todas las taquillas asociadas a un centro de apuestas.
         """
         if not ObjectId.is_valid(betting_center_id):
             raise ValueError(f"ID del centro de apuestas inválido: {betting_center_id}")
-        return list(self.collection.find({'betting_center_id': ObjectId(betting_center_id)}))
+        return list(read_collection(self.collection).find({'betting_center_id': ObjectId(betting_center_id)}, projection))
+
+    def iter_taquillas_by_center(self, betting_center_id, batch_size=1000):
+        """
+        Recorre con un cursor las taquillas de un centro de apuestas.
+        """
+        return read_collection(self.collection).find(
+            {'betting_center_id': ObjectId(betting_center_id)}, batch_size=batch_size
+        ).sort('_id', 1)
+
+    def find_taquillas_by_ids(self, taquilla_ids, center_ids=None, projection=None):
+        """
+        Obtiene varias taquillas con una sola consulta $in, opcionalmente
+        limitadas a los centros indicados.
+        """
+        query = {'_id': {'$in': taquilla_ids}}
+        if center_ids is not None:
+            query['betting_center_id'] = {'$in': center_ids}
+        return list(read_collection(self.collection).find(query, projection))
+
+    def find_taquillas_by_centers(self, center_ids, projection=None):
+        """
+        Obtiene las taquillas de varios centros con una sola consulta.
+        """
+        return list(read_collection(self.collection).find({'betting_center_id': {'$in': center_ids}}, projection))
 
     def update_taquilla(self, taquilla_id, updates):
         """
@@ -50,6 +99,7 @@ class TaquillaModel:
         """
         try:
             result = self.collection.update_one({'_id': ObjectId(taquilla_id)}, {'$set': updates})
+            audit_log.record('update_taquilla', 'taquillas', ObjectId(taquilla_id), updates)
             return result.modified_count > 0
         except pymongo.errors.DuplicateKeyError:
             raise ValueError("Ya existe una taquilla con este número en el centro de apuestas especificado.")
@@ -61,8 +111,20 @@ class TaquillaModel:
         if not ObjectId.is_valid(taquilla_id):
             raise ValueError(f"ID de taquilla inválido: {taquilla_id}")
         result = self.collection.delete_one({'_id': ObjectId(taquilla_id)})
+        audit_log.record('delete_taquilla', 'taquillas', ObjectId(taquilla_id))
         return result.deleted_count > 0
 
+    def delete_taquillas_by_center(self, betting_center_id):
+        """
+        Elimina todas las taquillas de un centro. Devuelve cuántas se eliminaron.
+        """
+        result = self.collection.delete_many({'betting_center_id': ObjectId(betting_center_id)})
+        audit_log.record(
+            'delete_taquillas_by_center', 'taquillas', ObjectId(betting_center_id),
+            {'deleted': result.deleted_count},
+        )
+        return result.deleted_count
+
     def assign_user(self, taquilla_id, user_id):
         """
         Asigna un usuario a una taquilla.
@@ -87,10 +149,11 @@ class TaquillaModel:
             
             if result.modified_count == 0:
                 raise ValueError(f"No se pudo actualizar la taquilla con ID: {taquilla_id}")
-            
+
+            audit_log.record('assign_user', 'taquillas', taquilla_object_id, {'user_id': user_object_id})
             return True
         except Exception as e:
-            logging.error(f"Error al asignar usuario a taquilla: {str(e)}")
+            logger.error("Error al asignar usuario a taquilla: %s", e)
             raise ValueError(f"Error al asignar usuario a taquilla: {str(e)}")
 
     def unassign_user(self, taquilla_id):
@@ -104,6 +167,7 @@ class TaquillaModel:
             {'_id': ObjectId(taquilla_id)},
             {'$set': {'assigned_user_id': None}}
         )
+        audit_log.record('unassign_user', 'taquillas', ObjectId(taquilla_id))
         return result.modified_count > 0
 
     def serialize(self, taquilla):
@@ -112,8 +176,8 @@ class TaquillaModel:
         """
         return {
             'id': str(taquilla['_id']),
-            'number': taquilla['number'],
-            'betting_center_id': str(taquilla['betting_center_id']),
+            'number': taquilla.get('number'),
+            'betting_center_id': str(taquilla['betting_center_id']) if taquilla.get('betting_center_id') else None,
             'assigned_user_id': str(taquilla['assigned_user_id']) if taquilla.get('assigned_user_id') else None,
             'status': taquilla.get('status', 'active')
         }
@@ -124,7 +188,7 @@ class TaquillaModel:
         """
         if not ObjectId.is_valid(user_id):
             raise ValueError(f"ID de usuario inválido: {user_id}")
-        return list(self.collection.find({'assigned_user_id': ObjectId(user_id)}))
+        return list(read_collection(self.collection).find({'assigned_user_id': ObjectId(user_id)}))
 
     def change_taquilla_status(self, taquilla_id, new_status):
         """
@@ -140,6 +204,7 @@ class TaquillaModel:
             {'_id': ObjectId(taquilla_id)},
             {'$set': {'status': new_status}}
         )
+        audit_log.record('change_taquilla_status', 'taquillas', ObjectId(taquilla_id), {'status': new_status})
         return result.modified_count > 0
 
     def get_active_taquillas_by_center(self, betting_center_id):
@@ -149,7 +214,7 @@ class TaquillaModel:
         if not ObjectId.is_valid(betting_center_id):
             raise ValueError(f"ID del centro de apuestas inválido: {betting_center_id}")
 
-        return list(self.collection.find({
+        return list(read_collection(self.collection).find({
             'betting_center_id': ObjectId(betting_center_id),
             'status': 'active'
         }))
\ No newline at end of file
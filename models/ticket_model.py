@@ -0,0 +1,273 @@
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from config import Config
+from database import read_collection
+from utils.audit_log import audit_log
+from utils.serials import encode_serial
+
+BET_TYPES = ["win", "place", "show"]
+
+
+class TicketModel:
+    def __init__(self, db):
+        self.collection = db["tickets"]
+        self.counters = db["ticket_counters"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        # El serial es único por centro y resuelve reimpresiones y anulaciones
+        # con una sola lectura puntual. Con la clave de fragmentación hasheada
+        # MongoDB no admite índices únicos secundarios; la unicidad la garantiza
+        # entonces el $inc atómico de ticket_counters.
+        self.collection.create_index(
+            [("betting_center_id", 1), ("serial", 1)], unique=not Config.MONGO_SHARDED
+        )
+        # Selección de los tickets que pasan al archivo
+        self.collection.create_index([("created_at", 1)])
+        # Exportaciones y archivo de un centro por rango de fechas
+        self.collection.create_index([("betting_center_id", 1), ("created_at", 1)])
+        # Recarga de los pozos de una carrera en un centro
+        self.collection.create_index([("betting_center_id", 1), ("race_id", 1)])
+
+    def next_serial(self, betting_center_id):
+        """
+        Genera el siguiente serial del centro con un $inc atómico sobre su contador.
+        """
+        counter = self.counters.find_one_and_update(
+            {"_id": ObjectId(betting_center_id)},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return encode_serial(counter["seq"])
+
+    def create_ticket(
+        self,
+        betting_center_id,
+        taquilla_id,
+        user_id,
+        race_id,
+        race_date,
+        bet_type,
+        runner_number,
+        amount,
+    ):
+        """
+        Registra un ticket vendido con un serial nuevo del centro.
+        """
+        if bet_type not in BET_TYPES:
+            raise ValueError(f"Tipo de apuesta no válido. Debe ser uno de: {', '.join(BET_TYPES)}.")
+
+        ticket = {
+            "betting_center_id": ObjectId(betting_center_id),
+            "serial": self.next_serial(betting_center_id),
+            "taquilla_id": ObjectId(taquilla_id),
+            "user_id": ObjectId(user_id),
+            "race_id": ObjectId(race_id),
+            "race_date": race_date,
+            "bet_type": bet_type,
+            "runner_number": int(runner_number),
+            "amount": amount,
+            "status": "active",
+            "reprint_count": 0,
+            "created_at": datetime.now(timezone.utc),
+        }
+        self.collection.insert_one(ticket)
+        audit_log.record("create_ticket", "tickets", ticket["_id"], ticket)
+        return ticket
+
+    def find_ticket_by_serial(self, betting_center_id, serial, user_id=None):
+        """
+        Busca un ticket por su serial dentro de un centro. Si se indica user_id,
+        solo se devuelve el ticket si lo vendió ese usuario.
+        """
+        query = {"betting_center_id": ObjectId(betting_center_id), "serial": serial}
+        if user_id:
+            query["user_id"] = ObjectId(user_id)
+        return read_collection(self.collection).find_one(query)
+
+    def mark_reprinted(self, betting_center_id, serial, user_id=None):
+        """
+        Incrementa el contador de reimpresiones y devuelve el ticket actualizado.
+        """
+        query = {"betting_center_id": ObjectId(betting_center_id), "serial": serial}
+        if user_id:
+            query["user_id"] = ObjectId(user_id)
+        ticket = self.collection.find_one_and_update(
+            query,
+            {"$inc": {"reprint_count": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if ticket:
+            audit_log.record("reprint_ticket", "tickets", ticket["_id"])
+        return ticket
+
+    def void_ticket(self, betting_center_id, serial, voided_by, user_id=None):
+        """
+        Anula un ticket activo. Devuelve el ticket anulado o None si no existe
+        o ya estaba anulado.
+        """
+        query = {
+            "betting_center_id": ObjectId(betting_center_id),
+            "serial": serial,
+            "status": "active",
+        }
+        if user_id:
+            query["user_id"] = ObjectId(user_id)
+        ticket = self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": "void",
+                    "voided_at": datetime.now(timezone.utc),
+                    "voided_by": ObjectId(voided_by),
+                }
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if ticket:
+            audit_log.record("void_ticket", "tickets", ticket["_id"], {"status": "void"})
+        return ticket
+
+    def get_race_pools(self, betting_center_id, race_id):
+        """
+        Suma los montos de los tickets activos de una carrera en un centro por
+        tipo de apuesta y ejemplar.
+        """
+        return list(
+            read_collection(self.collection).aggregate(
+                [
+                    {
+                        "$match": {
+                            "betting_center_id": ObjectId(betting_center_id),
+                            "race_id": ObjectId(race_id),
+                            "status": "active",
+                        }
+                    },
+                    {
+                        "$group": {
+                            "_id": {"bet_type": "$bet_type", "runner_number": "$runner_number"},
+                            "total": {"$sum": "$amount"},
+                        }
+                    },
+                ]
+            )
+        )
+
+    def _center_range_query(self, betting_center_id, start=None, end=None):
+        query = {"betting_center_id": ObjectId(betting_center_id)}
+        created_at = {}
+        if start:
+            created_at["$gte"] = start
+        if end:
+            created_at["$lt"] = end
+        if created_at:
+            query["created_at"] = created_at
+        return query
+
+    def iter_tickets_by_center(self, betting_center_id, start=None, end=None, batch_size=1000):
+        """
+        Recorre con un cursor los tickets de un centro, opcionalmente entre
+        dos fechas de creación [start, end).
+        """
+        query = self._center_range_query(betting_center_id, start, end)
+        return read_collection(self.collection).find(query, batch_size=batch_size).sort("_id", 1)
+
+    def count_tickets_by_center(self, betting_center_id, start=None, end=None):
+        """
+        Cuenta los tickets de un centro con los mismos filtros que iter_tickets_by_center.
+        """
+        query = self._center_range_query(betting_center_id, start, end)
+        return read_collection(self.collection).count_documents(query)
+
+    def get_archive_partitions(self, cutoff):
+        """
+        Devuelve los pares (centro, día) que tienen tickets creados antes de cutoff.
+        """
+        return list(
+            self.collection.aggregate(
+                [
+                    {"$match": {"created_at": {"$lt": cutoff}}},
+                    {
+                        "$group": {
+                            "_id": {
+                                "betting_center_id": "$betting_center_id",
+                                "date": {
+                                    "$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}
+                                },
+                            }
+                        }
+                    },
+                ]
+            )
+        )
+
+    def iter_tickets_in_range(self, betting_center_id, start, end, batch_size):
+        """
+        Recorre con un cursor los tickets de un centro creados en [start, end).
+        """
+        return self.collection.find(
+            {
+                "betting_center_id": ObjectId(betting_center_id),
+                "created_at": {"$gte": start, "$lt": end},
+            },
+            batch_size=batch_size,
+        ).sort("_id", 1)
+
+    def delete_tickets(self, betting_center_id, ticket_ids):
+        """
+        Elimina del centro los tickets indicados (ya archivados).
+        """
+        result = self.collection.delete_many(
+            {"betting_center_id": ObjectId(betting_center_id), "_id": {"$in": ticket_ids}}
+        )
+        return result.deleted_count
+
+    def insert_tickets(self, tickets):
+        """
+        Vuelve a insertar tickets restaurados; los que ya existen se ignoran.
+        Cualquier otro error de escritura se propaga.
+        """
+        if not tickets:
+            return 0
+        try:
+            return len(self.collection.insert_many(tickets, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if e.details.get("writeConcernErrors") or any(error["code"] != 11000 for error in errors):
+                raise
+            return e.details.get("nInserted", 0)
+
+    def count_tickets_by_ids(self, betting_center_id, ticket_ids):
+        """
+        Cuenta cuántos de los tickets indicados están en la colección. Lee del
+        primario para ver las inserciones que se acaban de hacer.
+        """
+        return self.collection.count_documents(
+            {"betting_center_id": ObjectId(betting_center_id), "_id": {"$in": ticket_ids}}
+        )
+
+    def serialize(self, ticket):
+        """
+        Serializa un ticket para respuesta JSON.
+        """
+        return {
+            "id": str(ticket["_id"]),
+            "serial": ticket["serial"],
+            "betting_center_id": str(ticket["betting_center_id"]),
+            "taquilla_id": str(ticket["taquilla_id"]),
+            "user_id": str(ticket["user_id"]),
+            "race_id": str(ticket["race_id"]),
+            "race_date": ticket.get("race_date"),
+            "bet_type": ticket["bet_type"],
+            "runner_number": ticket["runner_number"],
+            "amount": ticket["amount"],
+            "status": ticket.get("status", "active"),
+            "reprint_count": ticket.get("reprint_count", 0),
+            "created_at": ticket["created_at"].isoformat(),
+            "archived": ticket.get("archived", False),
+        }
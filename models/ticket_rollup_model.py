@@ -0,0 +1,99 @@
+from bson import ObjectId
+from database import read_collection
+
+
+class TicketRollupModel:
+    """
+    Resúmenes diarios por centro de los tickets archivados. Cada fichero
+    archivado aporta su propia entrada en "parts", así que repetir el archivo
+    de un lote no duplica los totales.
+    """
+
+    def __init__(self, db):
+        self.collection = db["ticket_rollups"]
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
+        self.collection.create_index([("betting_center_id", 1), ("date", 1)], unique=True)
+
+    def set_part(self, betting_center_id, date, part_name, totals):
+        """
+        Registra los totales de un fichero archivado. Si incluyen el rango de
+        secuencias de sus seriales (min_seq, max_seq), el resumen del día
+        amplía el suyo para localizar un serial sin abrir los ficheros.
+        """
+        update = {"$set": {f"parts.{part_name}": totals}}
+        if totals.get("min_seq") is not None:
+            update["$min"] = {"min_seq": totals["min_seq"]}
+            update["$max"] = {"max_seq": totals["max_seq"]}
+        self.collection.update_one(
+            {"betting_center_id": ObjectId(betting_center_id), "date": date},
+            update,
+            upsert=True,
+        )
+
+    def find_parts_for_serial(self, betting_center_id, seq):
+        """
+        Devuelve (fecha, nombre del fichero) de los ficheros cuyo rango de
+        seriales incluye la secuencia indicada, de los días más recientes a
+        los más antiguos. Los ficheros archivados antes de guardar el rango
+        se incluyen siempre.
+        """
+        rollups = (
+            read_collection(self.collection)
+            .find(
+                {
+                    "betting_center_id": ObjectId(betting_center_id),
+                    "$or": [
+                        {"min_seq": {"$lte": seq}, "max_seq": {"$gte": seq}},
+                        {"min_seq": {"$exists": False}},
+                    ],
+                },
+                {"date": 1, "parts": 1},
+            )
+            .sort("date", -1)
+        )
+        matches = []
+        for rollup in rollups:
+            for part_name, part in rollup.get("parts", {}).items():
+                if part.get("min_seq") is None or part["min_seq"] <= seq <= part["max_seq"]:
+                    matches.append((rollup["date"], part_name))
+        return matches
+
+    def delete_rollup(self, betting_center_id, date):
+        """
+        Elimina el resumen de un día restaurado a la colección de tickets.
+        """
+        self.collection.delete_one({"betting_center_id": ObjectId(betting_center_id), "date": date})
+
+    def get_rollups(self, betting_center_id, date_from, date_to):
+        """
+        Obtiene los resúmenes de un centro entre dos fechas (incluidas).
+        """
+        return list(
+            read_collection(self.collection)
+            .find(
+                {
+                    "betting_center_id": ObjectId(betting_center_id),
+                    "date": {"$gte": date_from, "$lte": date_to},
+                }
+            )
+            .sort("date", 1)
+        )
+
+    def serialize(self, rollup):
+        """
+        Serializa un resumen sumando los totales de sus ficheros.
+        """
+        totals = {"tickets": 0, "amount": 0, "voided": 0, "voided_amount": 0}
+        for part in rollup.get("parts", {}).values():
+            for key in totals:
+                totals[key] += part.get(key, 0)
+        return {
+            "betting_center_id": str(rollup["betting_center_id"]),
+            "date": rollup["date"],
+            "files": len(rollup.get("parts", {})),
+            **totals,
+        }
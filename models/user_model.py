@@ -1,7 +1,47 @@
+import heapq
 from pymongo import MongoClient
+from bson.int64 import Int64
 from bson.objectid import ObjectId
 from pymongo.errors import DuplicateKeyError
+from models.permission_model import (
+    PermissionModel,
+    mask_to_permissions,
+    permissions_to_mask,
+)
 from models.role_default_permissions_model import RoleDefaultPermissionsModel
+from models.center_member_model import CenterMemberModel
+from database import read_collection
+from utils.audit_log import audit_log
+from utils.cache import document_cache
+from utils.search import normalize_search_text, prefix_range
+
+# Campos públicos de un usuario y los campos almacenados de los que dependen
+USER_FIELDS = {
+    "id": (),
+    "username": ("username",),
+    "email": ("email",),
+    "role": ("role",),
+    "permissions": ("permission_mask",),
+    "assigned_centers": ("assigned_centers",),
+    "assigned_taquilla": ("assigned_taquilla",),
+}
+
+# Campos normalizados (sin acentos y en minúsculas) para la búsqueda por prefijo
+SEARCH_FIELDS = {"username": "username_search", "email": "email_search"}
+
+def search_fields(document):
+    """
+    Devuelve los campos de búsqueda que corresponden a los valores del documento.
+    """
+    return {
+        search_field: normalize_search_text(document[field])
+        for field, search_field in SEARCH_FIELDS.items()
+        if document.get(field) is not None
+    }
+
+
+# Caché de lectura de usuarios por ID; los métodos que modifican un usuario la invalidan
+_user_cache = document_cache("users")
 
 
 class UserModel:
@@ -9,9 +49,21 @@ class UserModel:
         self.collection = db["users"]
         self.db = db  # Para relaciones con otros modelos
         self.role_permissions_model = RoleDefaultPermissionsModel(db)
+        self.permission_model = PermissionModel(db)
+        self.member_model = CenterMemberModel(db)
+
+    def ensure_indexes(self):
+        """
+        Crea los índices de la colección.
+        """
         # Crear índices únicos para email y username
         self.collection.create_index("email", unique=True)
         self.collection.create_index("username", unique=True)
+        # Búsqueda por prefijo de username y email, ya ordenada por (campo, _id)
+        for field in SEARCH_FIELDS.values():
+            self.collection.create_index([(field, 1), ("_id", 1)])
+        # Usuarios asignados a un centro (listados del admin de centro y exportaciones)
+        self.collection.create_index("assigned_centers")
 
     def create_user(
         self, username, email, password, role="user", assigned_centers=None
@@ -33,34 +85,164 @@ class UserModel:
             "email": email,
             "password": password,  # Guardar la contraseña directamente para la prueba
             "role": role,
-            "permissions": default_permissions,  # Asignar permisos predeterminados según el rol
+            # Permisos predeterminados del rol como máscara de bits
+            "permission_mask": Int64(permissions_to_mask(default_permissions)),
             "assigned_centers": assigned_centers
             or [],  # Centros de apuestas que administra
             "assigned_taquilla": None,  # Taquilla asignada (si es un usuario)
         }
+        user.update(search_fields(user))
         try:
             result = self.collection.insert_one(user)
+            audit_log.record("create_user", "users", result.inserted_id, user)
             return result.inserted_id
         except DuplicateKeyError:
             raise ValueError("El email o el nombre de usuario ya están en uso.")
 
     def find_user_by_email(self, email):
-        return self.collection.find_one({"email": email})
+        return read_collection(self.collection).find_one({"email": email})
 
     def find_user_by_username(self, username):
-        return self.collection.find_one({"username": username})
+        return read_collection(self.collection).find_one({"username": username})
+
+    def find_user_by_id(self, user_id, projection=None):
+        """
+        Busca un usuario por su ID a través de la caché de documentos.
+        """
+        object_id = ObjectId(user_id)
+        return _user_cache.get(
+            str(object_id),
+            lambda: self.collection.find_one({"_id": object_id}),
+            projection,
+        )
+
+    def get_all_users(self, projection=None):
+        """
+        Obtiene todos los usuarios.
+        """
+        return list(read_collection(self.collection).find({}, projection))
+
+    def get_users_page(self, after=None, limit=100, projection=None):
+        """
+        Obtiene una página de usuarios ordenada por ID a partir del ID `after`.
+        """
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        return list(
+            read_collection(self.collection).find(query, projection).sort("_id", 1).limit(limit)
+        )
+
+    def get_users_by_admin(self, admin_id, after=None, limit=100, projection=None):
+        """
+        Obtiene una página de los usuarios de los centros de un administrador
+        a partir del índice de miembros, ordenada por ID.
+        """
+        member_ids = self.member_model.find_member_ids(admin_id, after, limit)
+        if not member_ids:
+            return []
+        users = self.find_users_by_ids(member_ids, projection=projection)
+        by_id = {user["_id"]: user for user in users}
+        return [by_id[user_id] for user_id in member_ids if user_id in by_id]
+
+    def find_users_by_ids(self, user_ids, center_ids=None, include_id=None, projection=None):
+        """
+        Obtiene varios usuarios con una sola consulta $in. Si se indican
+        center_ids, solo devuelve los asignados a alguno de esos centros
+        (y el usuario include_id, si está entre los pedidos).
+        """
+        query = {"_id": {"$in": user_ids}}
+        if center_ids is not None:
+            scope = [{"assigned_centers": {"$in": center_ids}}]
+            if include_id:
+                scope.append({"_id": ObjectId(include_id)})
+            query["$or"] = scope
+        return list(read_collection(self.collection).find(query, projection))
+
+    def find_users_by_centers(self, center_ids, projection=None):
+        """
+        Obtiene los usuarios asignados a cualquiera de los centros indicados.
+        """
+        return list(
+            read_collection(self.collection).find(
+                {"assigned_centers": {"$in": center_ids}}, projection
+            )
+        )
 
-    def find_user_by_id(self, user_id):
-        return self.collection.find_one({"_id": ObjectId(user_id)})
+    def iter_users_by_center(self, center_id, projection=None, batch_size=1000):
+        """
+        Recorre con un cursor los usuarios asignados a un centro.
+        """
+        return read_collection(self.collection).find(
+            {"assigned_centers": ObjectId(center_id)}, projection, batch_size=batch_size
+        ).sort("_id", 1)
 
     def find_user_by_identifier(self, identifier):
         """
         Busca un usuario por email o username.
         """
-        return self.collection.find_one(
+        return read_collection(self.collection).find_one(
             {"$or": [{"email": identifier}, {"username": identifier}]}
         )
 
+    def _search_branch(self, query, sort_field, count, admin_id, projection):
+        """
+        Lee hasta count usuarios de una rama de la búsqueda en el orden de su
+        índice (sort_field, _id). Con admin_id los usuarios se leen por lotes
+        y cada lote se cruza con las membresías del administrador.
+        """
+        cursor = read_collection(self.collection).find(query, projection).sort(
+            [(sort_field, 1), ("_id", 1)]
+        )
+        if admin_id is None:
+            return list(cursor.limit(count))
+        users = []
+        batch = []
+        for user in cursor.batch_size(count):
+            batch.append(user)
+            if len(batch) < count:
+                continue
+            members = self.member_model.filter_members(admin_id, [u["_id"] for u in batch])
+            users.extend(u for u in batch if u["_id"] in members)
+            batch = []
+            if len(users) >= count:
+                break
+        else:
+            if batch:
+                members = self.member_model.filter_members(admin_id, [u["_id"] for u in batch])
+                users.extend(u for u in batch if u["_id"] in members)
+        cursor.close()
+        return users[:count]
+
+    def search_users(self, prefix, limit, offset=0, admin_id=None, projection=None):
+        """
+        Busca usuarios cuyo username o email empieza por el prefijo ya
+        normalizado. Cada rama se lee en el orden de su índice (campo, _id)
+        hasta offset + limit usuarios y las dos se mezclan por el valor que
+        coincidió, así que no hay ordenación en memoria en el servidor. Los
+        usuarios que coinciden por los dos campos solo salen por el username.
+        Con admin_id se limita a los miembros de los centros de ese
+        administrador.
+        """
+        bounds = prefix_range(prefix)
+        count = offset + limit
+        if projection is not None:
+            projection = dict(projection, **{field: 1 for field in SEARCH_FIELDS.values()})
+        by_username = self._search_branch(
+            {"username_search": bounds}, "username_search", count, admin_id, projection
+        )
+        by_email = self._search_branch(
+            {"email_search": bounds, "username_search": {"$not": bounds}},
+            "email_search",
+            count,
+            admin_id,
+            projection,
+        )
+        merged = heapq.merge(
+            ((user["username_search"], user["_id"], user) for user in by_username),
+            ((user["email_search"], user["_id"], user) for user in by_email),
+            key=lambda item: item[:2],
+        )
+        return [user for _, _, user in merged][offset:count]
+
     def verify_password(self, user, password):
         """
         Verifica la contraseña ingresada con la almacenada.
@@ -73,8 +255,10 @@ class UserModel:
         """
         try:
             result = self.collection.update_one(
-                {"_id": ObjectId(user_id)}, {"$set": updates}
+                {"_id": ObjectId(user_id)}, {"$set": dict(updates, **search_fields(updates))}
             )
+            _user_cache.invalidate(str(user_id))
+            audit_log.record("update_user", "users", ObjectId(user_id), updates)
             return result.modified_count > 0
         except DuplicateKeyError:
             raise ValueError("El email o el nombre de usuario ya están en uso.")
@@ -84,60 +268,135 @@ class UserModel:
         Elimina un usuario de la base de datos.
         """
         result = self.collection.delete_one({"_id": ObjectId(user_id)})
+        self.member_model.remove_user(user_id)
+        _user_cache.invalidate(str(user_id))
+        audit_log.record("delete_user", "users", ObjectId(user_id))
         return result.deleted_count > 0
 
+    def _permission_bit_by_name(self, permission_name):
+        # El bit se lee del permiso y no del registro del proceso, que puede
+        # no tener aún los permisos creados en otros workers
+        permission = self.permission_model.get_permission_by_name(permission_name)
+        return permission.get("bit") if permission else None
+
+    def _permission_bit(self, permission_id):
+        bit = self.permission_model.get_permission_bit(permission_id)
+        if bit is None:
+            raise ValueError("Permiso no encontrado")
+        return bit
+
     def add_permission_to_user(self, user_id, permission_id):
         """
-        Añade un permiso a un usuario.
+        Añade un permiso a un usuario activando su bit en la máscara.
         """
-        return self.collection.update_one(
+        bit = self._permission_bit(permission_id)
+        result = self.collection.update_one(
             {"_id": ObjectId(user_id)},
-            {"$addToSet": {"permissions": ObjectId(permission_id)}},
+            {"$bit": {"permission_mask": {"or": Int64(1 << bit)}}},
+        )
+        _user_cache.invalidate(str(user_id))
+        audit_log.record(
+            "add_permission", "users", ObjectId(user_id), {"permission_id": ObjectId(permission_id)}
         )
+        return result
 
     def remove_permission_from_user(self, user_id, permission_id):
         """
-        Elimina un permiso de un usuario.
+        Elimina un permiso de un usuario desactivando su bit en la máscara.
         """
-        return self.collection.update_one(
+        bit = self._permission_bit(permission_id)
+        result = self.collection.update_one(
             {"_id": ObjectId(user_id)},
-            {"$pull": {"permissions": ObjectId(permission_id)}},
+            {"$bit": {"permission_mask": {"and": Int64(~(1 << bit))}}},
         )
+        _user_cache.invalidate(str(user_id))
+        audit_log.record(
+            "remove_permission", "users", ObjectId(user_id), {"permission_id": ObjectId(permission_id)}
+        )
+        return result
 
     def assign_center(self, user_id, center_id):
         """
         Asigna un centro de apuestas a un usuario.
         """
-        return self.collection.update_one(
+        result = self.collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$addToSet": {"assigned_centers": ObjectId(center_id)}},
         )
+        if result.matched_count:
+            self.member_model.add_member(center_id, user_id)
+        _user_cache.invalidate(str(user_id))
+        audit_log.record("assign_center", "users", ObjectId(user_id), {"center_id": ObjectId(center_id)})
+        return result
 
     def unassign_center(self, user_id, center_id):
         """
         Desasigna un centro de apuestas de un usuario.
         """
-        return self.collection.update_one(
+        result = self.collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$pull": {"assigned_centers": ObjectId(center_id)}},
         )
+        self.member_model.remove_member(center_id, user_id)
+        _user_cache.invalidate(str(user_id))
+        audit_log.record("unassign_center", "users", ObjectId(user_id), {"center_id": ObjectId(center_id)})
+        return result
+
+    def remove_center_from_users(self, center_id, taquilla_ids, batch_size=1000):
+        """
+        Quita un centro de todos sus usuarios y libera a los que tenían
+        asignada alguna de sus taquillas. Devuelve cuántos usuarios cambiaron.
+        """
+        center_object_id = ObjectId(center_id)
+        query = {"$or": [{"assigned_centers": center_object_id}]}
+        if taquilla_ids:
+            query["$or"].append({"assigned_taquilla": {"$in": taquilla_ids}})
+        user_ids = [user["_id"] for user in self.collection.find(query, {"_id": 1})]
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            self.collection.update_many(
+                {"_id": {"$in": batch}}, {"$pull": {"assigned_centers": center_object_id}}
+            )
+            if taquilla_ids:
+                self.collection.update_many(
+                    {"_id": {"$in": batch}, "assigned_taquilla": {"$in": taquilla_ids}},
+                    {"$set": {"assigned_taquilla": None}},
+                )
+            _user_cache.invalidate(*(str(user_id) for user_id in batch))
+        self.member_model.remove_center(center_id)
+        audit_log.record(
+            "remove_center_from_users", "users", center_object_id, {"users": len(user_ids)}
+        )
+        return len(user_ids)
 
     def assign_taquilla(self, user_id, taquilla_id):
         """
         Asigna una taquilla a un usuario.
         """
-        return self.collection.update_one(
+        result = self.collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"assigned_taquilla": ObjectId(taquilla_id)}},
         )
+        # El usuario pasa a ser miembro del centro de la taquilla
+        if result.matched_count:
+            self.member_model.set_taquilla(user_id, taquilla_id)
+        _user_cache.invalidate(str(user_id))
+        audit_log.record(
+            "assign_taquilla", "users", ObjectId(user_id), {"taquilla_id": ObjectId(taquilla_id)}
+        )
+        return result
 
     def unassign_taquilla(self, user_id):
         """
         Desasigna la taquilla de un usuario.
         """
-        return self.collection.update_one(
+        result = self.collection.update_one(
             {"_id": ObjectId(user_id)}, {"$set": {"assigned_taquilla": None}}
         )
+        self.member_model.clear_taquilla(user_id)
+        _user_cache.invalidate(str(user_id))
+        audit_log.record("unassign_taquilla", "users", ObjectId(user_id))
+        return result
 
     def get_assigned_centers(self, user_id):
         """
@@ -178,6 +437,8 @@ class UserModel:
         result = self.collection.update_one(
             {"_id": ObjectId(user_id)}, {"$set": {"role": new_role}}
         )
+        _user_cache.invalidate(str(user_id))
+        audit_log.record("change_user_role", "users", ObjectId(user_id), {"role": new_role})
         if result.modified_count > 0:
             # Asignar nuevos permisos predeterminados basados en el nuevo rol
             self.assign_default_permissions(user_id, new_role)
@@ -189,7 +450,12 @@ class UserModel:
         """
         default_permissions = self.role_permissions_model.get_default_permissions(role)
         self.collection.update_one(
-            {"_id": ObjectId(user_id)}, {"$set": {"permissions": default_permissions}}
+            {"_id": ObjectId(user_id)},
+            {"$set": {"permission_mask": Int64(permissions_to_mask(default_permissions))}},
+        )
+        _user_cache.invalidate(str(user_id))
+        audit_log.record(
+            "assign_default_permissions", "users", ObjectId(user_id), {"permissions": default_permissions}
         )
 
     def serialize(self, user):
@@ -201,7 +467,7 @@ class UserModel:
             "username": user.get("username"),
             "email": user.get("email"),
             "role": user.get("role", "user"),
-            "permissions": user.get("permissions", []),
+            "permissions": mask_to_permissions(user.get("permission_mask", 0)),
             "assigned_centers": [
                 str(center_id) for center_id in user.get("assigned_centers", [])
             ],
@@ -212,10 +478,25 @@ class UserModel:
             ),
         }
 
+    def has_permission(self, user_id, permission_name):
+        """
+        Verifica si un usuario tiene un permiso con un AND sobre su máscara.
+        """
+        bit = self._permission_bit_by_name(permission_name)
+        if bit is None:
+            return False
+        user = self.find_user_by_id(user_id, {"permission_mask": 1})
+        return bool(user) and bool(user.get("permission_mask", 0) & (1 << bit))
 
-def has_permission(self, user_id, permission_id):
-    """
-    Verifica si un usuario tiene un permiso específico.
-    """
-    user = self.find_user_by_id(user_id)
-    return user and ObjectId(permission_id) in user.get("permissions", [])
+    def find_users_with_permission(self, permission_name, center_ids=None, projection=None):
+        """
+        Obtiene los usuarios que tienen un permiso con $bitsAllSet, opcionalmente
+        limitados a los asignados a los centros indicados.
+        """
+        bit = self._permission_bit_by_name(permission_name)
+        if bit is None:
+            raise ValueError(f"Permiso no válido: {permission_name}")
+        query = {"permission_mask": {"$bitsAllSet": [bit]}}
+        if center_ids is not None:
+            query["assigned_centers"] = {"$in": center_ids}
+        return list(read_collection(self.collection).find(query, projection))
@@ -1,22 +1,19 @@
 from flask import Blueprint, request, jsonify
 from services.auth_service import AuthService
-from pymongo import MongoClient
-from config import Config
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from database import get_service
+from flask_jwt_extended import jwt_required, get_jwt
+from werkzeug.local import LocalProxy
 import logging
 
+logger = logging.getLogger(__name__)
+
 auth_routes = Blueprint('auth_routes', __name__)
 
-try:
-    client = MongoClient(Config.MONGO_URI)
-    db = client['bet_db']
-    auth_service = AuthService(db)
-except Exception as e:
-    logging.error(f"Error al conectar con MongoDB: {str(e)}")
-    raise
+# El servicio se crea en el primer uso dentro de cada proceso worker
+auth_service = LocalProxy(lambda: get_service(AuthService))
 
 def handle_error(message, status_code):
-    logging.error(f"Error: {message}")
+    logger.error("Error: %s", message)
     return jsonify({'error': message}), status_code
 
 @auth_routes.route('/register', methods=['POST'])
@@ -42,7 +39,7 @@ def register():
     except ValueError as e:
         return handle_error(str(e), 400)
     except Exception as e:
-        logging.error(f"Error inesperado: {str(e)}")
+        logger.error("Error inesperado: %s", e)
         return handle_error('Ocurrió un error interno del servidor', 500)
 
 @auth_routes.route('/login', methods=['POST'])
@@ -72,5 +69,16 @@ def login():
     except ValueError as e:
         return handle_error(str(e), 401)
     except Exception as e:
-        logging.error(f"Error inesperado en login: {str(e)}")
+        logger.error("Error inesperado en login: %s", e)
+        return handle_error('Ocurrió un error interno del servidor', 500)
+
+@auth_routes.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    try:
+        # Revocar el token actual para que no pueda volver a usarse
+        auth_service.logout_user(get_jwt())
+        return jsonify({'message': 'Sesión cerrada exitosamente'}), 200
+    except Exception as e:
+        logger.error("Error inesperado en logout: %s", e)
         return handle_error('Ocurrió un error interno del servidor', 500)
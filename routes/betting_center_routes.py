@@ -2,33 +2,28 @@
 
 from flask import Blueprint, request, jsonify
 from services.betting_center_service import BettingCenterService
-from pymongo import MongoClient
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
 from config import Config
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.batch import parse_object_ids
+from utils.fields import build_projection, parse_fields, select_fields
+from utils.pagination import next_page_link
+from utils.search import parse_search
+from models.betting_center_model import BETTING_CENTER_FIELDS
+from werkzeug.local import LocalProxy
 import logging
 
-# Asegúrate de importar los modelos necesarios
-from models.user_model import UserModel
-from models.taquilla_model import TaquillaModel
-from models.betting_center_model import BettingCenterModel
+logger = logging.getLogger(__name__)
 
 betting_center_routes = Blueprint("betting_center_routes", __name__)
 
-# Conexión a la base de datos
-client = MongoClient(Config.MONGO_URI)
-db = client["bet_db"]
-
-# Crear instancias de los modelos
-user_model = UserModel(db)
-taquilla_model = TaquillaModel(db)
-betting_center_model = BettingCenterModel(db, user_model, taquilla_model)
-
-# Pasar el modelo de usuario y taquilla al servicio
-betting_center_service = BettingCenterService(db)
+# El servicio se crea en el primer uso dentro de cada proceso worker
+betting_center_service = LocalProxy(lambda: get_service(BettingCenterService))
 
 
 def handle_error(message, status_code):
-    logging.error(f"Error: {message}")
+    logger.error("Error: %s", message)
     return jsonify({"error": message}), status_code
 
 
@@ -36,7 +31,7 @@ def handle_error(message, status_code):
 @jwt_required()
 def create_betting_center():
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] != "super_admin":
             return handle_error(
                 "Acceso denegado: se requiere rol de super administrador", 403
@@ -53,7 +48,7 @@ def create_betting_center():
             )
 
         # Verificar que el admin_id corresponde a un usuario con rol 'admin_centro'
-        admin_user = user_model.find_user_by_id(admin_id)
+        admin_user = betting_center_service.user_model.find_user_by_id(admin_id)
         if not admin_user or admin_user.get("role") != "admin_centro":
             return handle_error(
                 "El ID de administrador proporcionado no es válido", 400
@@ -80,31 +75,66 @@ def create_betting_center():
 @jwt_required()
 def get_all_betting_centers():
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
+        fields = parse_fields(request.args.get("fields"), BETTING_CENTER_FIELDS)
+        projection = build_projection(fields, BETTING_CENTER_FIELDS)
+        if "ids" in request.args:
+            # GET /betting-centers?ids=a,b,c: una sola consulta con el acceso ya aplicado
+            center_ids = parse_object_ids(request.args["ids"], Config.BATCH_GET_MAX_IDS)
+            centers = betting_center_service.get_centers_by_ids(current_user, center_ids, projection)
+            return jsonify(betting_center_service.serialize_betting_centers(centers, fields)), 200
         if current_user["role"] == "super_admin":
-            centers = betting_center_service.get_all_centers()
+            centers = betting_center_service.get_all_centers(projection)
         elif current_user["role"] == "admin_centro":
-            centers = betting_center_service.get_centers_by_admin(current_user["id"])
+            centers = betting_center_service.get_centers_by_admin(current_user["id"], projection)
         else:
             return handle_error("Acceso denegado", 403)
 
-        center_list = [
-            betting_center_service.serialize_betting_center(center)
-            for center in centers
-        ]
+        center_list = betting_center_service.serialize_betting_centers(centers, fields)
         return jsonify(center_list), 200
 
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
     except Exception as e:
         return handle_error(f"Error al obtener los centros de apuestas: {str(e)}", 500)
 
 
+@betting_center_routes.route("/betting-centers/search", methods=["GET"])
+@jwt_required()
+def search_betting_centers():
+    try:
+        current_user = get_current_user()
+        prefix, limit, offset = parse_search(
+            request.args, Config.SEARCH_PAGE_SIZE, Config.SEARCH_PAGE_MAX, Config.SEARCH_MAX_OFFSET
+        )
+        fields = parse_fields(request.args.get("fields", "id,name,address"), BETTING_CENTER_FIELDS)
+        projection = build_projection(fields, BETTING_CENTER_FIELDS)
+        centers = betting_center_service.search_centers(current_user, prefix, limit, offset, projection)
+        response = jsonify(betting_center_service.serialize_betting_centers(centers, fields))
+        if len(centers) == limit and offset + limit <= Config.SEARCH_MAX_OFFSET:
+            response.headers["Link"] = next_page_link(offset=offset + limit)
+        return response, 200
+
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al buscar centros de apuestas: {str(e)}", 500)
+
+
 # routes/betting_center_routes.py
 @betting_center_routes.route("/betting-centers/<string:center_id>", methods=["GET"])
 @jwt_required()
 def get_betting_center(center_id):
     try:
-        current_user = get_jwt_identity()
-        center = betting_center_service.get_betting_center_with_details(center_id)
+        current_user = get_current_user()
+        fields = parse_fields(request.args.get("fields"), BETTING_CENTER_FIELDS)
+        # admin_id se lee siempre para comprobar el acceso
+        projection = build_projection(fields, BETTING_CENTER_FIELDS, required=("admin_id",))
+        center = betting_center_service.get_betting_center_with_details(center_id, fields, projection)
 
         if not center:
             return handle_error("Centro de apuestas no encontrado", 404)
@@ -115,8 +145,10 @@ def get_betting_center(center_id):
         ):
             return handle_error("Acceso denegado", 403)
 
-        return jsonify(center), 200
+        return jsonify(select_fields(center, fields)), 200
 
+    except ValueError as e:
+        return handle_error(str(e), 400)
     except Exception as e:
         return handle_error(f"Error al obtener el centro de apuestas: {str(e)}", 500)
 
@@ -125,7 +157,7 @@ def get_betting_center(center_id):
 @jwt_required()
 def update_betting_center(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         center = betting_center_service.get_betting_center_by_id(center_id)
 
         if not center:
@@ -162,7 +194,7 @@ def update_betting_center(center_id):
 @jwt_required()
 def assign_users_to_admin(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         data = request.get_json()
         user_id = data.get("user_id")
 
@@ -198,7 +230,7 @@ def assign_users_to_admin(center_id):
 @jwt_required()
 def manage_user_permissions(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] not in ["admin_centro", "super_admin"]:
             return handle_error(
                 "Acceso denegado: solo los administradores de centros pueden gestionar permisos",
@@ -237,17 +269,27 @@ def manage_user_permissions(center_id):
 @jwt_required()
 def delete_betting_center(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] != "super_admin":
             return handle_error(
                 "Acceso denegado: se requiere rol de super administrador", 403
             )
 
-        success = betting_center_service.delete_betting_center(center_id)
-        if not success:
+        if not betting_center_service.get_betting_center_by_id(center_id):
             return handle_error("Centro de apuestas no encontrado", 404)
 
-        return jsonify({"message": "Centro de apuestas eliminado exitosamente"}), 200
+        # La eliminación en cascada se ejecuta como trabajo en segundo plano
+        job_id = betting_center_service.delete_betting_center(center_id, current_user["id"])
+        return (
+            jsonify(
+                {
+                    "message": "Eliminación del centro de apuestas en curso",
+                    "job_id": str(job_id),
+                }
+            ),
+            202,
+            {"Location": f"/jobs/{job_id}"},
+        )
 
     except Exception as e:
         return handle_error(f"Error al eliminar el centro de apuestas: {str(e)}", 500)
@@ -259,7 +301,7 @@ def delete_betting_center(center_id):
 @jwt_required()
 def change_center_admin(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] != "super_admin":
             return handle_error(
                 "Acceso denegado: se requiere rol de super administrador", 403
@@ -271,7 +313,7 @@ def change_center_admin(center_id):
             return handle_error("Se requiere el ID del nuevo administrador", 400)
 
         # Verificar que el nuevo_admin_id corresponde a un usuario con rol 'admin_centro'
-        new_admin = user_model.find_user_by_id(new_admin_id)
+        new_admin = betting_center_service.user_model.find_user_by_id(new_admin_id)
         if not new_admin or new_admin.get("role") != "admin_centro":
             return handle_error("El ID del nuevo administrador no es válido", 400)
 
@@ -1,32 +1,39 @@
 from flask import Blueprint, request, jsonify
 from models.configuration_model import ConfigurationModel
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.betting_center_model import BettingCenterModel
-from pymongo import MongoClient
+from services.configuration_service import ConfigurationService
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
+from database import get_service
+from werkzeug.local import LocalProxy
 from config import Config
+from utils.batch import parse_object_ids
 import logging
 
+logger = logging.getLogger(__name__)
+
 configuration_routes = Blueprint('configuration_routes', __name__)
 
-client = MongoClient(Config.MONGO_URI)
-db = client['bet_db']
-config_model = ConfigurationModel(db)
+# El modelo se crea en el primer uso dentro de cada proceso worker
+config_model = LocalProxy(lambda: get_service(ConfigurationModel))
+configuration_service = LocalProxy(lambda: get_service(ConfigurationService))
 
 def handle_error(message, status_code):
-    logging.error(f"Error: {message}")
+    logger.error("Error: %s", message)
     return jsonify({'error': message}), status_code
 
 @configuration_routes.route('/configuration/<string:center_id>', methods=['POST'])
 @jwt_required()
 def create_configuration(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user['role'] not in ['super_admin', 'admin_centro']:
             return handle_error('No tienes permiso para crear configuraciones', 403)
 
         data = request.get_json()
         config_id = config_model.create_configuration(center_id, data)
         return jsonify({'message': 'Configuración creada exitosamente', 'id': str(config_id)}), 201
+    except ValueError as ve:
+        return handle_error(str(ve), 400)
     except Exception as e:
         return handle_error(f"Error al crear la configuración: {str(e)}", 500)
 
@@ -34,7 +41,7 @@ def create_configuration(center_id):
 @jwt_required()
 def get_configuration(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user['role'] not in ['super_admin', 'admin_centro']:
             return handle_error('No tienes permiso para ver configuraciones', 403)
 
@@ -49,7 +56,7 @@ def get_configuration(center_id):
 @jwt_required()
 def update_configuration(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user['role'] not in ['super_admin', 'admin_centro']:
             return handle_error('No tienes permiso para actualizar configuraciones', 403)
 
@@ -65,7 +72,7 @@ def update_configuration(center_id):
 @jwt_required()
 def delete_configuration(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user['role'] != 'super_admin':
             return handle_error('Solo el super administrador puede eliminar configuraciones', 403)
 
@@ -74,4 +81,126 @@ def delete_configuration(center_id):
             return jsonify({'message': 'Configuración eliminada exitosamente'}), 200
         return handle_error('No se encontró la configuración para eliminar', 404)
     except Exception as e:
-        return handle_error(f"Error al eliminar la configuración: {str(e)}", 500)
\ No newline at end of file
+        return handle_error(f"Error al eliminar la configuración: {str(e)}", 500)
+
+@configuration_routes.route('/configuration/<string:center_id>/version', methods=['GET'])
+@jwt_required()
+def get_configuration_version(center_id):
+    """Versión de la configuración de un centro, para detectar cambios sin descargarla."""
+    try:
+        version = configuration_service.get_configuration_version(center_id)
+        if version is None:
+            return handle_error('Configuración no encontrada', 404)
+        return jsonify({'center_id': center_id, 'version': version}), 200
+    except ValueError as ve:
+        return handle_error(str(ve), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener la versión de la configuración: {str(e)}", 500)
+
+@configuration_routes.route('/configuration-templates', methods=['POST'])
+@jwt_required()
+def create_configuration_template():
+    try:
+        current_user = get_current_user()
+        if current_user['role'] != 'super_admin':
+            return handle_error('Solo el super administrador puede crear plantillas', 403)
+
+        data = request.get_json() or {}
+        template_id = configuration_service.create_template(
+            data.get('name'), data.get('settings'), current_user['id']
+        )
+        return jsonify({'message': 'Plantilla creada exitosamente', 'id': str(template_id)}), 201
+    except ValueError as ve:
+        return handle_error(str(ve), 400)
+    except Exception as e:
+        return handle_error(f"Error al crear la plantilla: {str(e)}", 500)
+
+@configuration_routes.route('/configuration-templates', methods=['GET'])
+@jwt_required()
+def get_configuration_templates():
+    try:
+        current_user = get_current_user()
+        if current_user['role'] not in ['super_admin', 'admin_centro']:
+            return handle_error('No tienes permiso para ver plantillas', 403)
+
+        templates = configuration_service.get_all_templates()
+        return jsonify([configuration_service.serialize_template(template) for template in templates]), 200
+    except Exception as e:
+        return handle_error(f"Error al obtener las plantillas: {str(e)}", 500)
+
+@configuration_routes.route('/configuration-templates/<string:name>', methods=['GET'])
+@jwt_required()
+def get_configuration_template(name):
+    try:
+        current_user = get_current_user()
+        if current_user['role'] not in ['super_admin', 'admin_centro']:
+            return handle_error('No tienes permiso para ver plantillas', 403)
+
+        template = configuration_service.get_template(name)
+        if not template:
+            return handle_error('Plantilla no encontrada', 404)
+        return jsonify(configuration_service.serialize_template(template)), 200
+    except Exception as e:
+        return handle_error(f"Error al obtener la plantilla: {str(e)}", 500)
+
+@configuration_routes.route('/configuration-templates/<string:name>', methods=['PUT'])
+@jwt_required()
+def update_configuration_template(name):
+    try:
+        current_user = get_current_user()
+        if current_user['role'] != 'super_admin':
+            return handle_error('Solo el super administrador puede actualizar plantillas', 403)
+
+        data = request.get_json() or {}
+        template = configuration_service.update_template(name, data.get('settings'))
+        if not template:
+            return handle_error('Plantilla no encontrada', 404)
+        return jsonify(configuration_service.serialize_template(template)), 200
+    except ValueError as ve:
+        return handle_error(str(ve), 400)
+    except Exception as e:
+        return handle_error(f"Error al actualizar la plantilla: {str(e)}", 500)
+
+@configuration_routes.route('/configuration-templates/<string:name>', methods=['DELETE'])
+@jwt_required()
+def delete_configuration_template(name):
+    try:
+        current_user = get_current_user()
+        if current_user['role'] != 'super_admin':
+            return handle_error('Solo el super administrador puede eliminar plantillas', 403)
+
+        if not configuration_service.delete_template(name):
+            return handle_error('Plantilla no encontrada', 404)
+        return jsonify({'message': 'Plantilla eliminada exitosamente'}), 200
+    except Exception as e:
+        return handle_error(f"Error al eliminar la plantilla: {str(e)}", 500)
+
+@configuration_routes.route('/configuration-templates/<string:name>/apply', methods=['POST'])
+@jwt_required()
+def apply_configuration_template(name):
+    """Aplica una plantilla a los centros indicados en center_ids."""
+    try:
+        current_user = get_current_user()
+        data = request.get_json() or {}
+        center_ids = data.get('center_ids')
+        if not isinstance(center_ids, list):
+            return handle_error('Se requiere la lista center_ids', 400)
+        center_ids = parse_object_ids(
+            ','.join(str(center_id) for center_id in center_ids), Config.TEMPLATE_APPLY_MAX_CENTERS
+        )
+
+        template, updated = configuration_service.apply_template(current_user, name, center_ids)
+        if not template:
+            return handle_error('Plantilla no encontrada', 404)
+        return jsonify({
+            'message': 'Plantilla aplicada exitosamente',
+            'template': template['name'],
+            'template_version': template['version'],
+            'centers': len(updated),
+        }), 200
+    except PermissionError as pe:
+        return handle_error(str(pe), 403)
+    except ValueError as ve:
+        return handle_error(str(ve), 400)
+    except Exception as e:
+        return handle_error(f"Error al aplicar la plantilla: {str(e)}", 500)
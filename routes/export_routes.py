@@ -0,0 +1,130 @@
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
+from services.export_service import ExportService
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
+from werkzeug.local import LocalProxy
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+export_routes = Blueprint("export_routes", __name__)
+
+# El servicio se crea en el primer uso dentro de cada proceso worker
+export_service = LocalProxy(lambda: get_service(ExportService))
+
+
+def handle_error(message, status_code):
+    logger.error("Error: %s", message)
+    return jsonify({"error": message}), status_code
+
+
+def _export_filters():
+    return {key: request.args[key] for key in ("from", "to") if request.args.get(key)}
+
+
+@export_routes.route(
+    "/betting-centers/<string:center_id>/exports/<string:kind>", methods=["GET"]
+)
+@jwt_required()
+def export_center_data(center_id, kind):
+    """
+    Exporta usuarios, taquillas o ventas de un centro. Las exportaciones CSV
+    pequeñas se transmiten directamente; las grandes y las Parquet se generan
+    en segundo plano y se responde 202 con la exportación creada.
+    """
+    try:
+        current_user = get_current_user()
+        export_service.check_access(current_user, center_id)
+
+        export_format = request.args.get("format", "csv")
+        filters = _export_filters()
+        export_service.validate(kind, export_format, filters)
+
+        if export_format == "csv" and not export_service.is_large(kind, center_id, filters):
+            filename = f"{kind}-{center_id}.csv"
+            return Response(
+                stream_with_context(export_service.stream_csv(kind, center_id, filters)),
+                mimetype="text/csv",
+                headers={"Content-Disposition": f"attachment; filename={filename}"},
+            )
+
+        export_id = export_service.start_export(current_user, kind, center_id, export_format, filters)
+        export = export_service.get_export(current_user, str(export_id))
+        return jsonify(export_service.serialize(export)), 202, {"Location": f"/exports/{export_id}"}
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al exportar los datos: {str(e)}", 500)
+
+
+@export_routes.route(
+    "/betting-centers/<string:center_id>/exports/<string:kind>", methods=["POST"]
+)
+@jwt_required()
+def start_export(center_id, kind):
+    try:
+        current_user = get_current_user()
+        export_service.check_access(current_user, center_id)
+
+        export_format = request.args.get("format", "csv")
+        filters = _export_filters()
+        export_id = export_service.start_export(current_user, kind, center_id, export_format, filters)
+        export = export_service.get_export(current_user, str(export_id))
+        return jsonify(export_service.serialize(export)), 202, {"Location": f"/exports/{export_id}"}
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al iniciar la exportación: {str(e)}", 500)
+
+
+@export_routes.route("/exports/<string:export_id>", methods=["GET"])
+@jwt_required()
+def get_export(export_id):
+    try:
+        current_user = get_current_user()
+        export = export_service.get_export(current_user, export_id)
+        if not export:
+            return handle_error("Exportación no encontrada", 404)
+        return jsonify(export_service.serialize(export)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener la exportación: {str(e)}", 500)
+
+
+@export_routes.route("/exports/<string:export_id>/download", methods=["GET"])
+@jwt_required()
+def download_export(export_id):
+    """
+    Descarga el fichero de una exportación terminada. Admite peticiones Range
+    e If-Range, de modo que una descarga interrumpida se puede reanudar.
+    """
+    try:
+        current_user = get_current_user()
+        export = export_service.get_export(current_user, export_id)
+        if not export:
+            return handle_error("Exportación no encontrada", 404)
+        if export["status"] != "done" or not os.path.exists(export.get("path") or ""):
+            return handle_error("La exportación todavía no está disponible", 409)
+
+        return send_file(
+            os.path.abspath(export["path"]),
+            as_attachment=True,
+            download_name=f"{export['kind']}-{export['betting_center_id']}.{export['format']}",
+            conditional=True,
+            etag=True,
+        )
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al descargar la exportación: {str(e)}", 500)
@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify
+from database import circuit_breaker
+from utils.circuit_breaker import OPEN
+from warmup import WORKER_STATE
+
+health_routes = Blueprint("health_routes", __name__)
+
+
+@health_routes.route("/health/ready", methods=["GET"])
+def get_readiness():
+    """Indica si el worker que atiende la petición terminó su preparación."""
+    status_code = 200 if WORKER_STATE["ready"] else 503
+    return jsonify(WORKER_STATE), status_code
+
+
+@health_routes.route("/health/database", methods=["GET"])
+def get_database_health():
+    """Estado del disyuntor de MongoDB del worker; 503 mientras está abierto."""
+    snapshot = circuit_breaker.snapshot()
+    status_code = 503 if snapshot["state"] == OPEN else 200
+    return jsonify(snapshot), status_code
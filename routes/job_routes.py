@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify
+from services.job_service import JobService
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
+from werkzeug.local import LocalProxy
+import logging
+
+logger = logging.getLogger(__name__)
+
+job_routes = Blueprint("job_routes", __name__)
+
+# El servicio se crea en el primer uso dentro de cada proceso worker
+job_service = LocalProxy(lambda: get_service(JobService))
+
+
+def handle_error(message, status_code):
+    logger.error("Error: %s", message)
+    return jsonify({"error": message}), status_code
+
+
+@job_routes.route("/jobs/<string:job_id>", methods=["GET"])
+@jwt_required()
+def get_job(job_id):
+    try:
+        current_user = get_current_user()
+        job = job_service.get_job(current_user, job_id)
+        if not job:
+            return handle_error("Trabajo no encontrado", 404)
+        return jsonify(job_service.serialize(job)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener el trabajo: {str(e)}", 500)
+
+
+@job_routes.route("/jobs", methods=["GET"])
+@jwt_required()
+def get_jobs():
+    try:
+        current_user = get_current_user()
+        limit = min(request.args.get("limit", 50, type=int), 200)
+        jobs = job_service.get_jobs(current_user, request.args.get("status"), limit)
+        return jsonify([job_service.serialize(job) for job in jobs]), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener los trabajos: {str(e)}", 500)
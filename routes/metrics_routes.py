@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify, current_app
+from utils.audit_log import audit_log
+
+metrics_routes = Blueprint("metrics_routes", __name__)
+
+
+@metrics_routes.route("/metrics/admission", methods=["GET"])
+def get_admission_metrics():
+    """Expone la profundidad de las colas y el estado del control de admisión."""
+    admission_controller = current_app.extensions["admission_controller"]
+    return jsonify(admission_controller.metrics()), 200
+
+
+@metrics_routes.route("/metrics/audit", methods=["GET"])
+def get_audit_metrics():
+    """Expone la profundidad de la cola del registro de auditoría."""
+    return jsonify(audit_log.metrics()), 200
@@ -1,20 +1,21 @@
 from flask import Blueprint, request, jsonify
 from services.permission_service import PermissionService
-from pymongo import MongoClient
-from config import Config
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
+from werkzeug.local import LocalProxy
 import logging
 
+logger = logging.getLogger(__name__)
+
 permission_routes = Blueprint("permission_routes", __name__)
 
-# Conexión a la base de datos
-client = MongoClient(Config.MONGO_URI)
-db = client["bet_db"]
-permission_service = PermissionService(db)
+# El servicio se crea en el primer uso dentro de cada proceso worker
+permission_service = LocalProxy(lambda: get_service(PermissionService))
 
 
 def handle_error(message, status_code):
-    logging.error(f"Error: {message}")
+    logger.error("Error: %s", message)
     return jsonify({"error": message}), status_code
 
 
@@ -22,7 +23,7 @@ def handle_error(message, status_code):
 @jwt_required()
 def assign_permission():
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         data = request.get_json()
         user_id = data.get("user_id")
         permission_id = data.get("permission_id")
@@ -45,7 +46,7 @@ def assign_permission():
 @jwt_required()
 def revoke_permission():
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         data = request.get_json()
         user_id = data.get("user_id")
         permission_id = data.get("permission_id")
@@ -68,7 +69,7 @@ def revoke_permission():
 @jwt_required()
 def get_user_permissions(user_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
 
         # Permitir que solo el super_admin o el propio usuario vean sus permisos
         if current_user["role"] != "super_admin" and current_user["id"] != user_id:
@@ -83,12 +84,28 @@ def get_user_permissions(user_id):
         return handle_error(f"Error al obtener permisos del usuario: {str(e)}", 500)
 
 
+@permission_routes.route("/permissions/<string:permission_name>/users", methods=["GET"])
+@jwt_required()
+def get_users_with_permission(permission_name):
+    try:
+        current_user = get_current_user()
+        users = permission_service.get_users_with_permission(current_user, permission_name)
+        return jsonify([permission_service.user_model.serialize(user) for user in users]), 200
+
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener los usuarios con el permiso: {str(e)}", 500)
+
+
 # Ruta para obtener todos los permisos disponibles
 @permission_routes.route("/permissions", methods=["GET"])
 @jwt_required()
 def get_all_permissions():
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
 
         # Solo el super_admin puede ver todos los permisos
         if current_user["role"] != "super_admin":
@@ -0,0 +1,192 @@
+from flask import Blueprint, request, jsonify
+from services.race_service import RaceService
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
+from werkzeug.local import LocalProxy
+import logging
+
+logger = logging.getLogger(__name__)
+
+race_routes = Blueprint("race_routes", __name__)
+
+# El servicio se crea en el primer uso dentro de cada proceso worker
+race_service = LocalProxy(lambda: get_service(RaceService))
+
+
+def handle_error(message, status_code):
+    logger.error("Error: %s", message)
+    return jsonify({"error": message}), status_code
+
+
+@race_routes.route("/races", methods=["POST"])
+@jwt_required()
+def create_race():
+    try:
+        current_user = get_current_user()
+        if current_user["role"] != "super_admin":
+            return handle_error(
+                "Acceso denegado: se requiere rol de super administrador", 403
+            )
+
+        data = request.get_json()
+        track = data.get("track")
+        date = data.get("date")
+        race_number = data.get("race_number")
+        post_time = data.get("post_time")
+
+        if not track or not date or not race_number or not post_time:
+            return handle_error(
+                "El hipódromo, la fecha, el número de carrera y la hora de salida son requeridos",
+                400,
+            )
+
+        race_id = race_service.create_race(
+            track, date, race_number, post_time, data.get("name"), data.get("distance")
+        )
+        return jsonify({"message": "Carrera creada exitosamente", "id": str(race_id)}), 201
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al crear la carrera: {str(e)}", 500)
+
+
+@race_routes.route("/races", methods=["GET"])
+@jwt_required()
+def get_races():
+    try:
+        track = request.args.get("track")
+        date = request.args.get("date")
+        if not track or not date:
+            return handle_error("Se requieren los parámetros track y date", 400)
+
+        return jsonify(race_service.get_races(track, date)), 200
+    except Exception as e:
+        return handle_error(f"Error al obtener las carreras: {str(e)}", 500)
+
+
+@race_routes.route("/races/<string:race_id>/card", methods=["GET"])
+@jwt_required()
+def get_race_card(race_id):
+    try:
+        card = race_service.get_race_card(race_id)
+        if not card:
+            return handle_error("Carrera no encontrada", 404)
+        return jsonify(card), 200
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener el programa de la carrera: {str(e)}", 500)
+
+
+@race_routes.route("/races/<string:race_id>/runners", methods=["POST"])
+@jwt_required()
+def add_runner(race_id):
+    try:
+        current_user = get_current_user()
+        if current_user["role"] != "super_admin":
+            return handle_error(
+                "Acceso denegado: se requiere rol de super administrador", 403
+            )
+
+        data = request.get_json()
+        number = data.get("number")
+        horse_name = data.get("horse_name")
+        if not number or not horse_name:
+            return handle_error("El número y el nombre del ejemplar son requeridos", 400)
+
+        runner_id = race_service.add_runner(
+            race_id,
+            number,
+            horse_name,
+            data.get("jockey"),
+            data.get("trainer"),
+            data.get("morning_line"),
+        )
+        return jsonify({"message": "Ejemplar inscrito exitosamente", "id": str(runner_id)}), 201
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al inscribir el ejemplar: {str(e)}", 500)
+
+
+@race_routes.route("/races/<string:race_id>/runners/<int:number>/scratch", methods=["POST"])
+@jwt_required()
+def scratch_runner(race_id, number):
+    try:
+        current_user = get_current_user()
+        if current_user["role"] != "super_admin":
+            return handle_error(
+                "Acceso denegado: se requiere rol de super administrador", 403
+            )
+
+        scratched = (request.get_json(silent=True) or {}).get("scratched", True)
+        success = race_service.scratch_runner(race_id, number, bool(scratched))
+        if not success:
+            return handle_error("No se pudo actualizar el ejemplar", 400)
+        return jsonify({"message": "Ejemplar actualizado exitosamente"}), 200
+    except Exception as e:
+        return handle_error(f"Error al retirar el ejemplar: {str(e)}", 500)
+
+
+@race_routes.route("/races/<string:race_id>/post-time", methods=["PUT"])
+@jwt_required()
+def update_post_time(race_id):
+    try:
+        current_user = get_current_user()
+        if current_user["role"] != "super_admin":
+            return handle_error(
+                "Acceso denegado: se requiere rol de super administrador", 403
+            )
+
+        post_time = (request.get_json() or {}).get("post_time")
+        if not post_time:
+            return handle_error("Se requiere la hora de salida", 400)
+
+        success = race_service.update_post_time(race_id, post_time)
+        if not success:
+            return handle_error("No se pudo cambiar la hora de salida", 400)
+        return jsonify({"message": "Hora de salida actualizada exitosamente"}), 200
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al cambiar la hora de salida: {str(e)}", 500)
+
+
+@race_routes.route("/races/<string:race_id>/status", methods=["PUT"])
+@jwt_required()
+def change_race_status(race_id):
+    try:
+        current_user = get_current_user()
+        if current_user["role"] != "super_admin":
+            return handle_error(
+                "Acceso denegado: se requiere rol de super administrador", 403
+            )
+
+        status = (request.get_json() or {}).get("status")
+        success = race_service.change_race_status(race_id, status)
+        if not success:
+            return handle_error("No se pudo cambiar el estado de la carrera", 400)
+        return jsonify({"message": "Estado de la carrera actualizado exitosamente"}), 200
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al cambiar el estado de la carrera: {str(e)}", 500)
+
+
+@race_routes.route("/races/<string:race_id>", methods=["DELETE"])
+@jwt_required()
+def delete_race(race_id):
+    try:
+        current_user = get_current_user()
+        if current_user["role"] != "super_admin":
+            return handle_error(
+                "Acceso denegado: se requiere rol de super administrador", 403
+            )
+
+        success = race_service.delete_race(race_id)
+        if not success:
+            return handle_error("Carrera no encontrada", 404)
+        return jsonify({"message": "Carrera eliminada exitosamente"}), 200
+    except Exception as e:
+        return handle_error(f"Error al eliminar la carrera: {str(e)}", 500)
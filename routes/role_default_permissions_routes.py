@@ -2,20 +2,22 @@
 
 from flask import Blueprint, request, jsonify
 from services.role_default_permissions_service import RoleDefaultPermissionsService
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from pymongo import MongoClient
-from config import Config
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
+from database import get_service
+from werkzeug.local import LocalProxy
 import logging
 
+logger = logging.getLogger(__name__)
+
 role_default_permissions_routes = Blueprint("role_default_permissions_routes", __name__)
 
-client = MongoClient(Config.MONGO_URI)
-db = client["bet_db"]
-role_permissions_service = RoleDefaultPermissionsService(db)
+# El servicio se crea en el primer uso dentro de cada proceso worker
+role_permissions_service = LocalProxy(lambda: get_service(RoleDefaultPermissionsService))
 
 
 def handle_error(message, status_code):
-    logging.error(f"Error: {message}")
+    logger.error("Error: %s", message)
     return jsonify({"error": message}), status_code
 
 
@@ -23,7 +25,7 @@ def handle_error(message, status_code):
 @jwt_required()
 def get_all_role_permissions():
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] != "super_admin":
             return handle_error(
                 "Acceso denegado: se requiere rol de super administrador", 403
@@ -41,7 +43,7 @@ def get_all_role_permissions():
 @jwt_required()
 def get_role_permissions(role):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] != "super_admin":
             return handle_error(
                 "Acceso denegado: se requiere rol de super administrador", 403
@@ -59,7 +61,7 @@ def get_role_permissions(role):
 @jwt_required()
 def update_role_permissions(role):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] != "super_admin":
             return handle_error(
                 "Acceso denegado: se requiere rol de super administrador", 403
@@ -81,7 +83,7 @@ def update_role_permissions(role):
 def initialize_permissions():
     """Inicializa los permisos predeterminados para los roles."""
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] != "super_admin":
             return handle_error(
                 "Acceso denegado: se requiere rol de super administrador", 403
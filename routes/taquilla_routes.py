@@ -1,21 +1,26 @@
 from flask import Blueprint, request, jsonify
 from services.taquilla_service import TaquillaService
-from pymongo import MongoClient
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
 from config import Config
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.batch import parse_object_ids
+from utils.fields import build_projection, parse_fields
+from models.taquilla_model import TAQUILLA_FIELDS
+from werkzeug.local import LocalProxy
 import logging
 from bson import ObjectId
 
+logger = logging.getLogger(__name__)
+
 taquilla_routes = Blueprint("taquilla_routes", __name__)
 
-# Conexión a la base de datos
-client = MongoClient(Config.MONGO_URI)
-db = client["bet_db"]
-taquilla_service = TaquillaService(db)
+# El servicio se crea en el primer uso dentro de cada proceso worker
+taquilla_service = LocalProxy(lambda: get_service(TaquillaService))
 
 
 def handle_error(message, status_code):
-    logging.error(f"Error: {message}")
+    logger.error("Error: %s", message)
     return jsonify({"error": message}), status_code
 
 
@@ -23,7 +28,7 @@ def handle_error(message, status_code):
 @jwt_required()
 def create_taquilla():
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         data = request.get_json()
         number = data.get("number")
         betting_center_id = data.get("betting_center_id")
@@ -55,12 +60,33 @@ def create_taquilla():
         return handle_error(f"Error al crear la taquilla: {str(e)}", 500)
 
 
+@taquilla_routes.route("/taquillas", methods=["GET"])
+@jwt_required()
+def get_taquillas_by_ids():
+    try:
+        current_user = get_current_user()
+        fields = parse_fields(request.args.get("fields"), TAQUILLA_FIELDS)
+        projection = build_projection(fields, TAQUILLA_FIELDS)
+        taquilla_ids = parse_object_ids(request.args.get("ids"), Config.BATCH_GET_MAX_IDS)
+        taquillas = taquilla_service.get_taquillas_by_ids(current_user, taquilla_ids, projection)
+        return jsonify(taquilla_service.serialize_taquillas(taquillas, fields)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener las taquillas: {str(e)}", 500)
+
+
 @taquilla_routes.route("/taquillas/<string:taquilla_id>", methods=["GET"])
 @jwt_required()
 def get_taquilla(taquilla_id):
     try:
-        current_user = get_jwt_identity()
-        taquilla = taquilla_service.get_taquilla_by_id(taquilla_id)
+        current_user = get_current_user()
+        fields = parse_fields(request.args.get("fields"), TAQUILLA_FIELDS)
+        # betting_center_id se lee siempre para comprobar el acceso
+        projection = build_projection(fields, TAQUILLA_FIELDS, required=("betting_center_id",))
+        taquilla = taquilla_service.find_taquilla(taquilla_id, projection)
         if not taquilla:
             return handle_error("Taquilla no encontrada", 404)
 
@@ -68,10 +94,12 @@ def get_taquilla(taquilla_id):
         if current_user["role"] == "super_admin" or taquilla_service.is_center_admin(
             current_user["id"], str(taquilla["betting_center_id"])
         ):
-            return jsonify(taquilla_service.taquilla_model.serialize(taquilla)), 200
+            return jsonify(taquilla_service.serialize_taquillas([taquilla], fields)[0]), 200
         else:
             return handle_error("Acceso denegado", 403)
 
+    except ValueError as e:
+        return handle_error(str(e), 400)
     except Exception as e:
         return handle_error(f"Error al obtener la taquilla: {str(e)}", 500)
 
@@ -80,7 +108,7 @@ def get_taquilla(taquilla_id):
 @jwt_required()
 def update_taquilla(taquilla_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         data = request.get_json()
 
         taquilla = taquilla_service.get_taquilla_by_id(taquilla_id)
@@ -106,7 +134,7 @@ def update_taquilla(taquilla_id):
 @jwt_required()
 def delete_taquilla(taquilla_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         taquilla = taquilla_service.get_taquilla_by_id(taquilla_id)
         if not taquilla:
             return handle_error("Taquilla no encontrada", 404)
@@ -130,23 +158,20 @@ def delete_taquilla(taquilla_id):
 @jwt_required()
 def get_taquillas_by_center(center_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
+        fields = parse_fields(request.args.get("fields"), TAQUILLA_FIELDS)
         if current_user["role"] == "super_admin" or taquilla_service.is_center_admin(
             current_user["id"], center_id
         ):
-            taquillas = taquilla_service.get_all_taquillas_by_center(center_id)
-            return (
-                jsonify(
-                    [
-                        taquilla_service.taquilla_model.serialize(taquilla)
-                        for taquilla in taquillas
-                    ]
-                ),
-                200,
+            taquillas = taquilla_service.find_taquillas_by_center(
+                center_id, build_projection(fields, TAQUILLA_FIELDS)
             )
+            return jsonify(taquilla_service.serialize_taquillas(taquillas, fields)), 200
         else:
             return handle_error("Acceso denegado", 403)
 
+    except ValueError as e:
+        return handle_error(str(e), 400)
     except Exception as e:
         return handle_error(f"Error al obtener las taquillas del centro: {str(e)}", 500)
 
@@ -155,17 +180,11 @@ def get_taquillas_by_center(center_id):
 @jwt_required()
 def assign_user_to_taquilla(taquilla_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         data = request.get_json()
         user_id = data.get("user_id")
 
-        print(f"Taquilla ID: {taquilla_id}, tipo: {type(taquilla_id)}")
-        print(f"User ID: {user_id}, tipo: {type(user_id)}")
-
-        # Añade estos logs adicionales
-        print("Antes de llamar a taquilla_service.assign_user")
         result = taquilla_service.assign_user(taquilla_id, user_id)
-        print("Después de llamar a taquilla_service.assign_user")
 
         if result:
             return (
@@ -179,10 +198,10 @@ def assign_user_to_taquilla(taquilla_id):
             )
 
     except ValueError as e:
-        print(f"Error en la ruta: {str(e)}")  # Añade este log
+        logger.warning("Error en la ruta: %s", e)
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error inesperado en la ruta: {str(e)}")  # Añade este log
+        logger.error("Error inesperado en la ruta: %s", e)
         return jsonify({"error": "Error interno del servidor"}), 500
 
     # EndPoint para desasignar
@@ -194,7 +213,7 @@ def assign_user_to_taquilla(taquilla_id):
 @jwt_required()
 def unassign_user_from_taquilla(taquilla_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
 
         # Llamar al servicio de taquillas para desasignar el usuario
         result = taquilla_service.unassign_user(taquilla_id)
@@ -211,8 +230,8 @@ def unassign_user_from_taquilla(taquilla_id):
             )
 
     except ValueError as e:
-        print(f"Error en la ruta: {str(e)}")
+        logger.warning("Error en la ruta: %s", e)
         return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error inesperado en la ruta: {str(e)}")  # Añade este log
+        logger.error("Error inesperado en la ruta: %s", e)
         return jsonify({"error": "Error interno del servidor"}), 500
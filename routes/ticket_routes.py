@@ -0,0 +1,227 @@
+from flask import Blueprint, request, jsonify
+from services.ticket_service import TicketService
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user, user_has_permission
+from werkzeug.local import LocalProxy
+import logging
+
+logger = logging.getLogger(__name__)
+
+ticket_routes = Blueprint("ticket_routes", __name__)
+
+# El servicio se crea en el primer uso dentro de cada proceso worker
+ticket_service = LocalProxy(lambda: get_service(TicketService))
+
+
+def handle_error(message, status_code):
+    logger.error("Error: %s", message)
+    return jsonify({"error": message}), status_code
+
+
+@ticket_routes.route("/tickets", methods=["POST"])
+@jwt_required()
+def sell_ticket():
+    try:
+        current_user = get_current_user()
+        if not user_has_permission(current_user, "sell_tickets"):
+            return handle_error("Acceso denegado: no tienes permiso para vender tickets", 403)
+
+        data = request.get_json()
+        taquilla_id = data.get("taquilla_id")
+        race_id = data.get("race_id")
+        bet_type = data.get("bet_type")
+        runner_number = data.get("runner_number")
+        amount = data.get("amount")
+
+        if not taquilla_id or not race_id or not bet_type or runner_number is None or amount is None:
+            return handle_error(
+                "La taquilla, la carrera, el tipo de apuesta, el ejemplar y el monto son requeridos",
+                400,
+            )
+
+        ticket = ticket_service.sell_ticket(
+            current_user, taquilla_id, race_id, bet_type, runner_number, amount
+        )
+        return jsonify(ticket_service.serialize(ticket)), 201
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al vender el ticket: {str(e)}", 500)
+
+
+@ticket_routes.route(
+    "/betting-centers/<string:center_id>/tickets/<string:serial>", methods=["GET"]
+)
+@jwt_required()
+def get_ticket(center_id, serial):
+    try:
+        current_user = get_current_user()
+        if not user_has_permission(current_user, "view_tickets"):
+            return handle_error("Acceso denegado: no tienes permiso para ver tickets", 403)
+
+        ticket = ticket_service.get_ticket(current_user, center_id, serial)
+        if not ticket:
+            return handle_error("Ticket no encontrado", 404)
+        return jsonify(ticket_service.serialize(ticket)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener el ticket: {str(e)}", 500)
+
+
+@ticket_routes.route(
+    "/betting-centers/<string:center_id>/tickets/<string:serial>/reprint",
+    methods=["POST"],
+)
+@jwt_required()
+def reprint_ticket(center_id, serial):
+    try:
+        current_user = get_current_user()
+        if not user_has_permission(current_user, "reprint_tickets"):
+            return handle_error("Acceso denegado: no tienes permiso para reimprimir tickets", 403)
+
+        ticket = ticket_service.reprint_ticket(current_user, center_id, serial)
+        if not ticket:
+            return handle_error("Ticket no encontrado", 404)
+        return jsonify(ticket_service.serialize(ticket)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al reimprimir el ticket: {str(e)}", 500)
+
+
+@ticket_routes.route(
+    "/betting-centers/<string:center_id>/tickets/<string:serial>/void",
+    methods=["POST"],
+)
+@jwt_required()
+def void_ticket(center_id, serial):
+    try:
+        current_user = get_current_user()
+        if not user_has_permission(current_user, "delete_tickets"):
+            return handle_error("Acceso denegado: no tienes permiso para anular tickets", 403)
+
+        ticket = ticket_service.void_ticket(current_user, center_id, serial)
+        if not ticket:
+            return handle_error("Ticket no encontrado o ya anulado", 404)
+        return jsonify({"message": "Ticket anulado exitosamente", "ticket": ticket_service.serialize(ticket)}), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al anular el ticket: {str(e)}", 500)
+
+
+@ticket_routes.route("/betting-centers/<string:center_id>/liabilities", methods=["GET"])
+@jwt_required()
+def get_liabilities(center_id):
+    try:
+        current_user = get_current_user()
+        if not user_has_permission(current_user, "view_summaries"):
+            return handle_error("Acceso denegado: no tienes permiso para ver resúmenes", 403)
+
+        date = request.args.get("date")
+        if not date:
+            return handle_error("La fecha es requerida (YYYY-MM-DD)", 400)
+
+        return jsonify(ticket_service.get_liabilities(current_user, center_id, date)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener los riesgos: {str(e)}", 500)
+
+
+@ticket_routes.route("/betting-centers/<string:center_id>/races/<string:race_id>/payouts", methods=["GET"])
+@jwt_required()
+def get_race_payouts(center_id, race_id):
+    """Tabla de dividendos probables que consultan las terminales."""
+    try:
+        current_user = get_current_user()
+        if not (
+            user_has_permission(current_user, "sell_tickets")
+            or user_has_permission(current_user, "view_summaries")
+        ):
+            return handle_error("Acceso denegado: no tienes permiso para ver los dividendos", 403)
+
+        return jsonify(ticket_service.get_race_payouts(current_user, center_id, race_id)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener los dividendos: {str(e)}", 500)
+
+
+@ticket_routes.route("/betting-centers/<string:center_id>/archive/tickets", methods=["GET"])
+@jwt_required()
+def get_archived_tickets(center_id):
+    try:
+        current_user = get_current_user()
+        if not user_has_permission(current_user, "view_tickets"):
+            return handle_error("Acceso denegado: no tienes permiso para ver tickets", 403)
+
+        date_from = request.args.get("from")
+        date_to = request.args.get("to")
+        if not date_from or not date_to:
+            return handle_error("Las fechas from y to son requeridas (YYYY-MM-DD)", 400)
+
+        tickets = ticket_service.get_archived_tickets(current_user, center_id, date_from, date_to)
+        return jsonify([ticket_service.serialize(ticket) for ticket in tickets]), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener los tickets archivados: {str(e)}", 500)
+
+
+@ticket_routes.route("/betting-centers/<string:center_id>/archive/rollups", methods=["GET"])
+@jwt_required()
+def get_archive_rollups(center_id):
+    try:
+        current_user = get_current_user()
+        if not user_has_permission(current_user, "view_summaries"):
+            return handle_error("Acceso denegado: no tienes permiso para ver resúmenes", 403)
+
+        date_from = request.args.get("from")
+        date_to = request.args.get("to")
+        if not date_from or not date_to:
+            return handle_error("Las fechas from y to son requeridas (YYYY-MM-DD)", 400)
+
+        return jsonify(ticket_service.get_archive_rollups(current_user, center_id, date_from, date_to)), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al obtener los resúmenes: {str(e)}", 500)
+
+
+@ticket_routes.route("/betting-centers/<string:center_id>/archive/restore", methods=["POST"])
+@jwt_required()
+def restore_archived_tickets(center_id):
+    try:
+        current_user = get_current_user()
+        data = request.get_json()
+        date = data.get("date")
+        if not date:
+            return handle_error("La fecha es requerida (YYYY-MM-DD)", 400)
+
+        restored = ticket_service.restore_archived_tickets(current_user, center_id, date)
+        return jsonify({"message": "Tickets restaurados exitosamente", "restored": restored}), 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al restaurar los tickets: {str(e)}", 500)
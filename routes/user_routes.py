@@ -1,21 +1,28 @@
 from flask import Blueprint, request, jsonify
 from services.user_service import UserService
-from pymongo import MongoClient
+from database import get_service
+from flask_jwt_extended import jwt_required
+from services.auth_service import get_current_user
 from config import Config
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.batch import parse_object_ids
+from utils.fields import build_projection, parse_fields, select_fields
+from utils.pagination import next_page_link, parse_page
+from utils.search import parse_search
+from models.user_model import USER_FIELDS
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.local import LocalProxy
 import logging
 
+logger = logging.getLogger(__name__)
+
 user_routes = Blueprint("user_routes", __name__)
 
-# Conexión a la base de datos
-client = MongoClient(Config.MONGO_URI)
-db = client["bet_db"]
-user_service = UserService(db)
+# El servicio se crea en el primer uso dentro de cada proceso worker
+user_service = LocalProxy(lambda: get_service(UserService))
 
 
 def handle_error(message, status_code):
-    logging.error(f"Error: {message}")
+    logger.error("Error: %s", message)
     return jsonify({"error": message}), status_code
 
 
@@ -23,20 +30,24 @@ def handle_error(message, status_code):
 @jwt_required()
 def get_user(user_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
+        fields = parse_fields(request.args.get("fields"), USER_FIELDS)
+        projection = build_projection(fields, USER_FIELDS)
         if current_user["role"] == "super_admin" or current_user["id"] == user_id:
-            user = user_service.get_user_by_id(user_id)
+            user = user_service.get_user_by_id(user_id, projection)
             if not user:
                 return handle_error("Usuario no encontrado", 404)
-            return jsonify(user_service.serialize(user)), 200
+            return jsonify(select_fields(user_service.serialize(user), fields)), 200
         elif current_user["role"] == "admin_centro":
             # Admin Centro puede ver usuarios de sus centros asignados
             if user_service.is_center_admin(current_user["id"], user_id):
-                user = user_service.get_user_by_id(user_id)
+                user = user_service.get_user_by_id(user_id, projection)
                 if not user:
                     return handle_error("Usuario no encontrado", 404)
-                return jsonify(user_service.serialize(user)), 200
+                return jsonify(select_fields(user_service.serialize(user), fields)), 200
         return handle_error("Acceso denegado", 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
     except Exception as e:
         return handle_error(f"Error al obtener el usuario: {str(e)}", 500)
 
@@ -45,28 +56,60 @@ def get_user(user_id):
 @jwt_required()
 def get_all_users():
     try:
-        current_user = get_jwt_identity()
-        if current_user["role"] == "super_admin":
-            users = user_service.get_all_users(current_user)
-            user_list = [user_service.serialize(user) for user in users]
-            return jsonify(user_list), 200
-        elif current_user["role"] == "admin_centro":
-            users = user_service.get_all_users(current_user)
-            user_list = [user_service.serialize(user) for user in users]
-            return jsonify(user_list), 200
+        current_user = get_current_user()
+        fields = parse_fields(request.args.get("fields"), USER_FIELDS)
+        projection = build_projection(fields, USER_FIELDS)
+        if "ids" in request.args:
+            # GET /users?ids=a,b,c: una sola consulta con el acceso ya aplicado
+            user_ids = parse_object_ids(request.args["ids"], Config.BATCH_GET_MAX_IDS)
+            users = user_service.get_users_by_ids(current_user, user_ids, projection)
+            return jsonify([select_fields(user_service.serialize(user), fields) for user in users]), 200
+        if current_user["role"] in ("super_admin", "admin_centro"):
+            after, limit = parse_page(request.args, Config.USERS_PAGE_SIZE, Config.USERS_PAGE_MAX)
+            users, next_after = user_service.get_all_users(current_user, projection, after, limit)
+            user_list = [select_fields(user_service.serialize(user), fields) for user in users]
+            response = jsonify(user_list)
+            if next_after is not None:
+                response.headers["Link"] = next_page_link(after=next_after)
+            return response, 200
         else:
             return handle_error(
                 "Acceso denegado: no tienes permiso para ver todos los usuarios", 403
             )
+    except ValueError as e:
+        return handle_error(str(e), 400)
     except Exception as e:
         return handle_error(f"Error al obtener todos los usuarios: {str(e)}", 500)
 
 
+@user_routes.route("/users/search", methods=["GET"])
+@jwt_required()
+def search_users():
+    try:
+        current_user = get_current_user()
+        prefix, limit, offset = parse_search(
+            request.args, Config.SEARCH_PAGE_SIZE, Config.SEARCH_PAGE_MAX, Config.SEARCH_MAX_OFFSET
+        )
+        fields = parse_fields(request.args.get("fields", "id,username,email,role"), USER_FIELDS)
+        projection = build_projection(fields, USER_FIELDS)
+        users = user_service.search_users(current_user, prefix, limit, offset, projection)
+        response = jsonify([select_fields(user_service.serialize(user), fields) for user in users])
+        if len(users) == limit and offset + limit <= Config.SEARCH_MAX_OFFSET:
+            response.headers["Link"] = next_page_link(offset=offset + limit)
+        return response, 200
+    except PermissionError as e:
+        return handle_error(str(e), 403)
+    except ValueError as e:
+        return handle_error(str(e), 400)
+    except Exception as e:
+        return handle_error(f"Error al buscar usuarios: {str(e)}", 500)
+
+
 @user_routes.route("/user/<string:user_id>", methods=["PUT"])
 @jwt_required()
 def update_user(user_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if (
             current_user["role"] == "super_admin"
             or (
@@ -89,7 +132,7 @@ def update_user(user_id):
 @jwt_required()
 def delete_user(user_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if current_user["role"] == "super_admin":
             user = user_service.get_user_by_id(user_id)
             if not user:
@@ -107,7 +150,7 @@ def delete_user(user_id):
 @jwt_required()
 def change_password(user_id):
     try:
-        current_user = get_jwt_identity()
+        current_user = get_current_user()
         if (
             current_user["role"] == "super_admin"
             or (
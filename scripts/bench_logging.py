@@ -0,0 +1,87 @@
+"""
+Compara el coste por petición del logging anterior (print y f-strings con un
+StreamHandler síncrono) con el pipeline de QueueHandler/QueueListener.
+
+    python scripts/bench_logging.py [--requests 20000]
+
+Cada "petición" reproduce los mensajes que emitía TaquillaService.assign_user
+más el handle_error de una ruta. La salida se redirige a /dev/null para medir
+solo el coste en el hilo de la petición.
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TAQUILLA_ID = "66f1c0ffee0000000000a001"
+USER_ID = "66f1c0ffee0000000000b002"
+
+
+def legacy_request(log):
+    # Patrón anterior: ocho print() y logging con f-strings
+    print(f"Servicio - Taquilla ID: {TAQUILLA_ID}, tipo: {type(TAQUILLA_ID)}")
+    print(f"Servicio - User ID: {USER_ID}, tipo: {type(USER_ID)}")
+    print(f"Taquilla ObjectId: {TAQUILLA_ID}")
+    print(f"User ObjectId: {USER_ID}")
+    print(f"taquilla_object_id: {TAQUILLA_ID}")
+    print(f"user_object_id: {USER_ID}")
+    print(f"ID del usuario: {USER_ID}, ID de la taquilla: {TAQUILLA_ID}")
+    print(f"Taquilla ID: {TAQUILLA_ID}, tipo: {type(TAQUILLA_ID)}")
+    log.info(f"Asignando usuario ID: {USER_ID} (Username: cajero) a taquilla ID: {TAQUILLA_ID} (Número: 7)")
+    log.error(f"Error: {'Taquilla no encontrada'}")
+
+
+def pipeline_request(log):
+    # Patrón actual: mensajes con formato diferido y muestreo
+    log.debug("Asignar usuario %r a taquilla %r", USER_ID, TAQUILLA_ID)
+    log.info(
+        "Asignando usuario ID: %s (Username: %s) a taquilla ID: %s (Número: %s)",
+        USER_ID,
+        "cajero",
+        TAQUILLA_ID,
+        7,
+    )
+    log.error("Error: %s", "Taquilla no encontrada")
+
+
+def measure(request, log, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        request(log)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        root = logging.getLogger()
+        root.handlers[:] = [logging.StreamHandler(devnull)]
+        root.setLevel(logging.INFO)
+        legacy_us = measure(legacy_request, logging.getLogger("services.taquilla_service"), args.requests)
+
+        from config import Config
+        from logging_config import setup_logging, stop_listener
+
+        setup_logging(Config)
+        # El listener escribe en /dev/null para no mezclar la salida
+        import logging_config
+
+        logging_config._listener.handlers[0].setStream(devnull)
+        pipeline_us = measure(pipeline_request, logging.getLogger("services.taquilla_service"), args.requests)
+        stop_listener()
+
+    print(f"Logging anterior: {legacy_us:.1f} µs por petición")
+    print(f"Pipeline en cola: {pipeline_us:.1f} µs por petición")
+    print(f"Reducción:        {legacy_us / pipeline_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
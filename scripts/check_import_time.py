@@ -0,0 +1,80 @@
+"""
+Verifica que importar la aplicación no realiza E/S de red y que se mantiene
+dentro del presupuesto de tiempo (Config.IMPORT_TIME_BUDGET_MS).
+
+    python scripts/check_import_time.py [--budget-ms 1500] [--runs 5]
+
+La importación se mide en un proceso nuevo en cada ejecución, con las
+conexiones de red bloqueadas: cualquier intento de conexión hace fallar la
+verificación.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, socket, time
+
+attempts = []
+
+def blocked(*args, **kwargs):
+    attempts.append(repr(args[:2]))
+    raise OSError("E/S de red durante la importación")
+
+socket.socket.connect = blocked
+socket.create_connection = blocked
+socket.getaddrinfo = blocked
+
+started = time.perf_counter()
+import app  # noqa: F401
+elapsed_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({"elapsed_ms": elapsed_ms, "network_attempts": attempts}))
+"""
+
+
+def measure_once():
+    env = dict(os.environ)
+    env.setdefault("MONGODB_URI", "mongodb://127.0.0.1:1/bet_db")
+    env.setdefault("SECRET_KEY", "import-check")
+    env.setdefault("JWT_SECRET_KEY", "import-check")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    sys.path.insert(0, ROOT)
+    from config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=Config.IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    attempts = [a for sample in samples for a in sample["network_attempts"]]
+    median_ms = statistics.median(sample["elapsed_ms"] for sample in samples)
+
+    print(f"Importación de app: mediana {median_ms:.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    if attempts:
+        print(f"ERROR: la importación intentó conectarse a la red: {attempts}")
+        return 1
+    if median_ms > args.budget_ms:
+        print("ERROR: la importación supera el presupuesto de tiempo")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Comprueba con explain que las consultas de los modelos usan un índice.
+
+Necesita un mongod local (no hace falta replica set):
+
+    mkdir -p /tmp/plans && mongod --port 27017 --dbpath /tmp/plans --bind_ip localhost --fork --logpath /tmp/plans.log
+    MONGODB_URI="mongodb://localhost:27017" python scripts/check_query_plans.py
+
+El script aplica el bootstrap sobre una base de datos desechable, la llena con
+varios centros, taquillas, usuarios y tickets, llama a cada método de los
+modelos y repite con explain("executionStats") cada comando que enviaron.
+Falla si un plan contiene COLLSCAN o si examina más de --max-ratio documentos
+por documento devuelto. Las consultas que recorren la colección a propósito
+(listados completos y cargas de caché) están en ALLOWED_COLLSCANS.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Base de datos desechable; se borra al terminar. Se fuerza siempre, aunque
+# el entorno tenga otra, para no sembrar ni borrar una base de datos real
+os.environ["MONGODB_DB_NAME"] = "bet_plan_check"
+
+from pymongo import monitoring  # noqa: E402
+
+# Campos de sesión y de protocolo que explain no acepta
+IGNORED_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "writeConcern"}
+
+# Comandos que se pueden explicar; los getMore repiten el plan del find
+EXPLAINABLE = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Casos que leen toda la colección por diseño, con el motivo
+ALLOWED_COLLSCANS = {
+    "UserModel.get_all_users": "listado completo del super administrador",
+    "UserModel.find_users_with_permission": "$bitsAllSet no puede usar índices; sin centros es una consulta de administración",
+    "BettingCenterModel.get_all_centers": "listado completo del super administrador",
+    "PermissionModel.warm_cache": "carga de la caché del proceso",
+    "RoleDefaultPermissionsModel.warm_cache": "carga de la caché del proceso",
+}
+
+CENTERS = 20
+TAQUILLAS_PER_CENTER = 10
+USERS_PER_CENTER = 10
+TICKETS_PER_CENTER = 30
+RACE_DATE = "2026-01-01"
+
+
+class CommandRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE:
+            command = {k: v for k, v in event.command.items() if k not in IGNORED_FIELDS}
+            self.commands.append((event.command_name, command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def find_key(document, key):
+    """
+    Busca recursivamente el primer valor de `key` en la salida de explain,
+    cuya forma cambia entre find, aggregate y escrituras.
+    """
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+
+def plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+def explain_statements(db, name, command):
+    """
+    Devuelve (etapas del plan ganador, documentos examinados, devueltos) de
+    cada sentencia del comando.
+    """
+    if name == "update":
+        statements = [dict(command, updates=[update]) for update in command["updates"]]
+    elif name == "delete":
+        statements = [dict(command, deletes=[delete]) for delete in command["deletes"]]
+    else:
+        statements = [command]
+
+    results = []
+    for statement in statements:
+        explain = db.command("explain", statement, verbosity="executionStats")
+        stages = set(plan_stages(find_key(explain, "winningPlan")))
+        stats = find_key(explain, "executionStats") or {}
+        results.append((stages, stats.get("totalDocsExamined", 0), stats.get("nReturned", 0)))
+    return results
+
+
+def seed(db):
+    """
+    Crea los datos de prueba y devuelve los IDs que usan los casos.
+    """
+    from models.betting_center_model import BettingCenterModel
+    from models.configuration_model import ConfigurationModel
+    from models.liability_model import LiabilityModel
+    from models.race_model import RaceModel
+    from models.runner_model import RunnerModel
+    from models.taquilla_model import TaquillaModel
+    from models.ticket_model import TicketModel
+    from models.user_model import UserModel
+
+    user_model = UserModel(db)
+    taquilla_model = TaquillaModel(db)
+    center_model = BettingCenterModel(db, user_model, taquilla_model)
+    ticket_model = TicketModel(db)
+    liability_model = LiabilityModel(db)
+
+    race_id = RaceModel(db).create_race("Check", RACE_DATE, 1, f"{RACE_DATE}T12:00:00")
+    for number in (1, 2, 3):
+        RunnerModel(db).create_runner(race_id, number, f"Ejemplar {number}")
+
+    ids = {"race_id": race_id, "centers": []}
+    for c in range(CENTERS):
+        admin_id = user_model.create_user(f"admin{c}", f"admin{c}@check.local", "x", "admin_centro")
+        center_id = center_model.create_betting_center(f"Centro {c}", "Dirección", admin_id)
+        user_model.assign_center(admin_id, center_id)
+        ConfigurationModel(db).create_configuration(center_id, {"max_sale_limit": 1000})
+
+        taquilla_ids = [taquilla_model.create_taquilla(t + 1, center_id) for t in range(TAQUILLAS_PER_CENTER)]
+        user_ids = []
+        for u in range(USERS_PER_CENTER):
+            user_id = user_model.create_user(f"user{c}-{u}", f"user{c}-{u}@check.local", "x")
+            user_model.assign_center(user_id, center_id)
+            user_model.assign_taquilla(user_id, taquilla_ids[u % len(taquilla_ids)])
+            taquilla_model.assign_user(taquilla_ids[u % len(taquilla_ids)], user_id)
+            user_ids.append(user_id)
+
+        serials = []
+        for t in range(TICKETS_PER_CENTER):
+            runner = t % 3 + 1
+            liability_model.reserve(center_id, RACE_DATE, race_id, runner, 10)
+            ticket = ticket_model.create_ticket(
+                center_id, taquilla_ids[t % len(taquilla_ids)], user_ids[t % len(user_ids)],
+                race_id, RACE_DATE, "win", runner, 10,
+            )
+            serials.append(ticket["serial"])
+
+        ids["centers"].append(
+            {
+                "center_id": center_id,
+                "admin_id": admin_id,
+                "taquilla_ids": taquilla_ids,
+                "user_ids": user_ids,
+                "serials": serials,
+            }
+        )
+    return ids
+
+
+def build_cases(db, ids):
+    """
+    Devuelve los casos (nombre, llamada) con datos de un centro intermedio.
+    """
+    from datetime import datetime, timedelta, timezone
+    from models.betting_center_model import BettingCenterModel
+    from models.configuration_model import ConfigurationModel, _configuration_cache
+    from models.liability_model import LiabilityModel
+    from models.permission_model import PermissionModel, _permission_cache
+    from models.race_model import RaceModel
+    from models.revoked_token_model import RevokedTokenModel
+    from models.role_default_permissions_model import RoleDefaultPermissionsModel
+    from models.runner_model import RunnerModel
+    from models.taquilla_model import TaquillaModel
+    from models.ticket_model import TicketModel
+    from models.ticket_rollup_model import TicketRollupModel
+    from models.user_model import UserModel
+
+    user_model = UserModel(db)
+    taquilla_model = TaquillaModel(db)
+    center_model = BettingCenterModel(db, user_model, taquilla_model)
+    ticket_model = TicketModel(db)
+    permission_model = PermissionModel(db)
+    configuration_model = ConfigurationModel(db)
+
+    sample = ids["centers"][CENTERS // 2]
+    center_id = str(sample["center_id"])
+    center_ids = [center["center_id"] for center in ids["centers"][:3]]
+    user_id = str(sample["user_ids"][0])
+    taquilla_id = str(sample["taquilla_ids"][0])
+    serial = sample["serials"][0]
+    race_id = str(ids["race_id"])
+    now = datetime.now(timezone.utc)
+
+    def fresh_configuration():
+        # La configuración está en caché desde el seed; se vacía para que el
+        # método real consulte la colección
+        _configuration_cache.delete(center_id)
+        configuration_model.get_configuration(center_id)
+
+    def fresh_permission():
+        _permission_cache.clear()
+        permission_model.get_permission_by_name("sell_tickets")
+
+    return [
+        ("UserModel.find_user_by_id", lambda: user_model.find_user_by_id(user_id)),
+        ("UserModel.find_user_by_email", lambda: user_model.find_user_by_email("user1-1@check.local")),
+        ("UserModel.find_user_by_username", lambda: user_model.find_user_by_username("user1-1")),
+        ("UserModel.find_user_by_identifier", lambda: user_model.find_user_by_identifier("user1-1")),
+        ("UserModel.find_user_by_identifier (email)", lambda: user_model.find_user_by_identifier("user1-1@check.local")),
+        ("UserModel.get_all_users", lambda: user_model.get_all_users()),
+        ("UserModel.get_users_page", lambda: user_model.get_users_page(sample["user_ids"][0], 50)),
+        ("UserModel.get_users_by_admin", lambda: user_model.get_users_by_admin(str(sample["admin_id"]), limit=50)),
+        ("CenterMemberModel.find_member_ids", lambda: user_model.member_model.find_member_ids(sample["admin_id"], limit=50)),
+        ("UserModel.find_users_by_ids", lambda: user_model.find_users_by_ids(sample["user_ids"], center_ids, user_id)),
+        ("UserModel.find_users_by_centers", lambda: user_model.find_users_by_centers(center_ids)),
+        ("UserModel.iter_users_by_center", lambda: list(user_model.iter_users_by_center(center_id))),
+        ("UserModel.find_users_with_permission", lambda: user_model.find_users_with_permission("sell_tickets")),
+        ("UserModel.find_users_with_permission (centros)", lambda: user_model.find_users_with_permission("sell_tickets", center_ids)),
+        ("UserModel.search_users", lambda: user_model.search_users("user1", 20)),
+        ("UserModel.search_users (administrador)", lambda: user_model.search_users("user1", 20, admin_id=str(sample["admin_id"]))),
+        ("CenterMemberModel.filter_members", lambda: user_model.member_model.filter_members(sample["admin_id"], sample["user_ids"])),
+        ("UserModel.update_user", lambda: user_model.update_user(user_id, {"username": f"user{CENTERS // 2}-0"})),
+        ("TaquillaModel.find_taquilla_by_id", lambda: taquilla_model.find_taquilla_by_id(taquilla_id)),
+        ("TaquillaModel.find_taquillas_by_center", lambda: taquilla_model.find_taquillas_by_center(center_id)),
+        ("TaquillaModel.get_active_taquillas_by_center", lambda: taquilla_model.get_active_taquillas_by_center(center_id)),
+        ("TaquillaModel.iter_taquillas_by_center", lambda: list(taquilla_model.iter_taquillas_by_center(center_id))),
+        ("TaquillaModel.find_taquillas_by_centers", lambda: taquilla_model.find_taquillas_by_centers(center_ids)),
+        ("TaquillaModel.find_taquillas_by_ids", lambda: taquilla_model.find_taquillas_by_ids(sample["taquilla_ids"], center_ids)),
+        ("TaquillaModel.find_taquillas_by_user", lambda: taquilla_model.find_taquillas_by_user(user_id)),
+        ("BettingCenterModel.find_betting_center_by_id", lambda: center_model.find_betting_center_by_id(center_id)),
+        ("BettingCenterModel.find_betting_center_by_name", lambda: center_model.find_betting_center_by_name("Centro 1")),
+        ("BettingCenterModel.find_betting_centers_by_ids", lambda: center_model.find_betting_centers_by_ids(center_ids, str(sample["admin_id"]))),
+        ("BettingCenterModel.get_centers_by_admin", lambda: center_model.get_centers_by_admin(str(sample["admin_id"]))),
+        ("BettingCenterModel.search_betting_centers", lambda: center_model.search_betting_centers("centro 1", 20)),
+        ("BettingCenterModel.get_all_centers", lambda: center_model.get_all_centers()),
+        ("ConfigurationModel.get_configuration", fresh_configuration),
+        ("PermissionModel.get_permission_by_name", fresh_permission),
+        ("PermissionModel.warm_cache", lambda: permission_model.warm_cache()),
+        ("RoleDefaultPermissionsModel.warm_cache", lambda: RoleDefaultPermissionsModel(db).warm_cache()),
+        ("RaceModel.get_races_by_track_and_date", lambda: RaceModel(db).get_races_by_track_and_date("Check", RACE_DATE)),
+        ("RunnerModel.find_runners_by_race", lambda: RunnerModel(db).find_runners_by_race(race_id)),
+        ("RunnerModel.find_runner", lambda: RunnerModel(db).find_runner(race_id, 1)),
+        ("TicketModel.find_ticket_by_serial", lambda: ticket_model.find_ticket_by_serial(center_id, serial)),
+        ("TicketModel.mark_reprinted", lambda: ticket_model.mark_reprinted(center_id, serial)),
+        ("TicketModel.count_tickets_by_center", lambda: ticket_model.count_tickets_by_center(center_id, now - timedelta(days=1))),
+        ("TicketModel.iter_tickets_by_center", lambda: list(ticket_model.iter_tickets_by_center(center_id))),
+        ("TicketModel.get_archive_partitions", lambda: list(ticket_model.get_archive_partitions(now - timedelta(days=1)))),
+        ("TicketModel.get_race_pools", lambda: ticket_model.get_race_pools(center_id, race_id)),
+        ("LiabilityModel.get_center_totals", lambda: LiabilityModel(db).get_center_totals(center_id, RACE_DATE)),
+        ("TicketRollupModel.get_rollups", lambda: TicketRollupModel(db).get_rollups(center_id, "2025-01-01", RACE_DATE)),
+        ("RevokedTokenModel.get_revoked_since", lambda: RevokedTokenModel(db).get_revoked_since(now - timedelta(minutes=5))),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=2.0,
+        help="documentos examinados permitidos por documento devuelto",
+    )
+    args = parser.parse_args()
+
+    recorder = CommandRecorder()
+    monitoring.register(recorder)
+
+    from app import app
+    from bootstrap import run_bootstrap
+    from database import get_db
+
+    db = get_db()
+    failures = []
+    try:
+        with app.app_context():
+            run_bootstrap(db, force=True)
+            ids = seed(db)
+            for label, call in build_cases(db, ids):
+                recorder.commands.clear()
+                call()
+                commands = list(recorder.commands)
+                if not commands:
+                    print(f"AVISO: {label} no envió ninguna consulta (¿caché?)")
+                    continue
+
+                for name, command in commands:
+                    for stages, examined, returned in explain_statements(db, name, command):
+                        ratio = examined / max(returned, 1)
+                        print(f"{label}: {name} {'+'.join(sorted(stages))} examinados={examined} devueltos={returned}")
+                        if "COLLSCAN" in stages and label not in ALLOWED_COLLSCANS:
+                            failures.append(f"{label}: {name} sobre {command[name]} recorre la colección: {command}")
+                        elif ratio > args.max_ratio and label not in ALLOWED_COLLSCANS:
+                            failures.append(
+                                f"{label}: {name} sobre {command[name]} examina {examined} documentos "
+                                f"para devolver {returned}: {command}"
+                            )
+    finally:
+        db.client.drop_database(db.name)
+
+    for failure in failures:
+        print(f"ERROR: {failure}")
+    if not failures:
+        print("Todas las consultas de los modelos usan un índice.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Verifica la política de lectura por endpoint contra un replica set local de
+tres nodos.
+
+Para levantar el replica set:
+
+    mkdir -p /tmp/rs/{0,1,2}
+    for i in 0 1 2; do
+        mongod --replSet rs0 --port 2701$i --dbpath /tmp/rs/$i --bind_ip localhost --fork --logpath /tmp/rs/$i.log
+    done
+    mongosh --port 27010 --eval 'rs.initiate({_id: "rs0", members: [
+        {_id: 0, host: "localhost:27010"},
+        {_id: 1, host: "localhost:27011"},
+        {_id: 2, host: "localhost:27012"}]})'
+
+    MONGODB_URI="mongodb://localhost:27010,localhost:27011,localhost:27012/?replicaSet=rs0" \
+        python scripts/check_read_routing.py
+
+Comprueba que los endpoints GET configurados en Config.READ_POLICIES leen de
+un secundario y que las escrituras y el resto de endpoints usan el primario.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pymongo import monitoring  # noqa: E402
+
+
+class CommandRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        self.commands.append((event.command_name, event.connection_id[:2]))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def main():
+    recorder = CommandRecorder()
+    monitoring.register(recorder)
+
+    from app import app
+    from database import get_client, get_db, read_collection
+
+    client = get_client()
+    client.admin.command("ping")
+    primary = client.primary
+    if primary is None or not client.secondaries:
+        print("ERROR: MONGODB_URI debe apuntar a un replica set con secundarios")
+        return 1
+
+    collection = get_db()["users"]
+    failures = []
+
+    def servers_for(path, method):
+        recorder.commands.clear()
+        with app.test_request_context(path, method=method):
+            read_collection(collection).find_one({})
+            if method != "GET":
+                collection.update_one({"_id": "read-routing-check"}, {"$set": {"ok": 1}}, upsert=True)
+        return {address for name, address in recorder.commands if name in ("find", "update")}
+
+    # Listado configurado como tolerante a retraso: debe ir a un secundario
+    servers = servers_for("/users", "GET")
+    if primary in servers:
+        failures.append(f"GET /users leyó del primario {primary}")
+
+    # Lectura de un usuario concreto: sigue en el primario
+    servers = servers_for("/user/000000000000000000000000", "GET")
+    if servers != {primary}:
+        failures.append(f"GET /user/<id> usó {servers}, se esperaba el primario")
+
+    # Escritura seguida de lectura: todo en el primario
+    servers = servers_for("/user/000000000000000000000000", "PUT")
+    if servers != {primary}:
+        failures.append(f"PUT /user/<id> usó {servers}, se esperaba el primario")
+
+    collection.delete_one({"_id": "read-routing-check"})
+
+    for failure in failures:
+        print(f"ERROR: {failure}")
+    if not failures:
+        print("Enrutamiento de lecturas correcto.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Verifica contra un clúster fragmentado local que las rutas de venta y consulta
+de tickets nunca hacen consultas dispersas (scatter-gather).
+
+Para levantar el clúster (un config server y dos fragmentos):
+
+    mkdir -p /tmp/sh/{cfg,s0,s1}
+    mongod --configsvr --replSet cfg --port 27019 --dbpath /tmp/sh/cfg --bind_ip localhost --fork --logpath /tmp/sh/cfg.log
+    mongod --shardsvr --replSet s0 --port 27020 --dbpath /tmp/sh/s0 --bind_ip localhost --fork --logpath /tmp/sh/s0.log
+    mongod --shardsvr --replSet s1 --port 27021 --dbpath /tmp/sh/s1 --bind_ip localhost --fork --logpath /tmp/sh/s1.log
+    mongosh --port 27019 --eval 'rs.initiate({_id: "cfg", configsvr: true, members: [{_id: 0, host: "localhost:27019"}]})'
+    mongosh --port 27020 --eval 'rs.initiate({_id: "s0", members: [{_id: 0, host: "localhost:27020"}]})'
+    mongosh --port 27021 --eval 'rs.initiate({_id: "s1", members: [{_id: 0, host: "localhost:27021"}]})'
+    mongos --configdb cfg/localhost:27019 --port 27017 --bind_ip localhost --fork --logpath /tmp/sh/mongos.log
+    mongosh --port 27017 --eval 'sh.addShard("s0/localhost:27020"); sh.addShard("s1/localhost:27021")'
+
+    MONGODB_URI="mongodb://localhost:27017" MONGODB_SHARDED=true \
+        python scripts/check_shard_targeting.py
+
+El script aplica el bootstrap sobre una base de datos desechable, ejecuta las
+rutas calientes (venta, consulta, reimpresión, anulación y riesgos) y repite
+con explain cada comando que enviaron a una colección fragmentada. Falla si
+alguno se resuelve en más de un fragmento.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Base de datos desechable; se borra al terminar. Se fuerza siempre, aunque
+# el entorno tenga otra, para no sembrar ni borrar una base de datos real
+os.environ["MONGODB_DB_NAME"] = "bet_shard_check"
+
+from pymongo import monitoring  # noqa: E402
+
+# Campos de sesión y de protocolo que explain no acepta
+IGNORED_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "writeConcern"}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    def __init__(self, collections):
+        self.collections = collections
+        self.commands = []
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if target in self.collections:
+            command = {k: v for k, v in event.command.items() if k not in IGNORED_FIELDS}
+            self.commands.append((event.command_name, command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def explain_targets(db, name, command):
+    """
+    Devuelve los fragmentos que tocaría cada sentencia del comando.
+    """
+    if name == "update":
+        statements = [dict(command, updates=[update]) for update in command["updates"]]
+    elif name == "delete":
+        statements = [dict(command, deletes=[delete]) for delete in command["deletes"]]
+    else:
+        statements = [command]
+
+    results = []
+    for statement in statements:
+        explain = db.command("explain", statement, verbosity="queryPlanner")
+        shards = explain["queryPlanner"]["winningPlan"].get("shards", [])
+        results.append([shard["shardName"] for shard in shards])
+    return results
+
+
+def main():
+    from config import Config
+    from sharding import SHARD_KEYS
+
+    if not Config.MONGO_SHARDED:
+        print("ERROR: ejecutar con MONGODB_SHARDED=true contra un mongos")
+        return 1
+
+    recorder = CommandRecorder(set(SHARD_KEYS))
+    monitoring.register(recorder)
+
+    from bson import ObjectId
+    from app import app
+    from bootstrap import run_bootstrap
+    from database import get_db
+    from services.race_service import RaceService
+    from services.ticket_service import TicketService
+    from models.taquilla_model import TaquillaModel
+
+    db = get_db()
+    if db.client.admin.command("hello").get("msg") != "isdbgrid":
+        print("ERROR: MONGODB_URI debe apuntar a un mongos")
+        return 1
+
+    failures = []
+    try:
+        run_bootstrap(db, force=True)
+
+        race_service = RaceService(db)
+        race_id = race_service.create_race("Check", "2026-01-01", 1, "2026-01-01T12:00:00")
+        for number in (1, 2, 3):
+            race_service.add_runner(race_id, number, f"Ejemplar {number}")
+
+        taquilla_model = TaquillaModel(db)
+        ticket_service = TicketService(db)
+        super_admin = {"id": str(ObjectId()), "role": "super_admin"}
+
+        for index in range(8):
+            center_id = str(ObjectId())
+            taquilla_id = taquilla_model.create_taquilla(1, center_id)
+
+            with app.test_request_context("/tickets", method="POST"):
+                recorder.commands.clear()
+                ticket = ticket_service.sell_ticket(
+                    super_admin, str(taquilla_id), str(race_id), "win", index % 3 + 1, 10
+                )
+                serial = ticket["serial"]
+                ticket_service.get_ticket(super_admin, center_id, serial)
+                ticket_service.reprint_ticket(super_admin, center_id, serial)
+                ticket_service.void_ticket(super_admin, center_id, serial)
+                ticket_service.get_liabilities(super_admin, center_id, "2026-01-01")
+                commands = list(recorder.commands)
+
+            for name, command in commands:
+                if name == "insert":
+                    # Los documentos insertados llevan la clave completa
+                    continue
+                for shards in explain_targets(db, name, command):
+                    if len(shards) != 1:
+                        failures.append(
+                            f"{name} sobre {command[name]} tocó {len(shards)} fragmentos: {command}"
+                        )
+    finally:
+        db.client.drop_database(db.name)
+
+    for failure in failures:
+        print(f"ERROR: {failure}")
+    if not failures:
+        print("Todas las consultas de las rutas calientes van a un solo fragmento.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,72 @@
 from models.user_model import UserModel
-from flask_jwt_extended import create_access_token
+from models.permission_model import (
+    PermissionModel,
+    PERMISSION_BITS,
+    permissions_to_mask,
+    mask_to_permissions,
+)
+from services.token_revocation_service import TokenRevocationService
+from config import Config
+from bson import ObjectId
+from datetime import datetime, timezone
+from flask import g
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Códigos cortos de rol usados en los claims del token
+ROLE_CODES = {"super_admin": "sa", "admin_centro": "ac", "user": "u"}
+ROLES_BY_CODE = {code: role for role, code in ROLE_CODES.items()}
+
+
+def get_current_user():
+    """
+    Reconstruye el usuario actual a partir de los claims compactos del token.
+    Acepta también los tokens antiguos cuya identidad es un diccionario.
+    """
+    identity = get_jwt_identity()
+    if isinstance(identity, dict):
+        current_user = identity
+    else:
+        claims = get_jwt()
+        mask = claims.get("p", 0)
+        current_user = {
+            "id": identity,
+            "role": ROLES_BY_CODE.get(claims.get("r"), "user"),
+            "permission_mask": mask,
+            "permissions": mask_to_permissions(mask),
+        }
+    # Guardar el autor de la petición para el registro de auditoría
+    g.current_user_id = current_user["id"]
+    return current_user
+
+
+def user_has_permission(current_user, permission_name):
+    """
+    Verifica un permiso del usuario actual con la máscara del token, sin
+    consultar la base de datos. El super administrador tiene todos los permisos.
+    """
+    if current_user["role"] == "super_admin":
+        return True
+    if "permission_mask" in current_user:
+        bit = PERMISSION_BITS.get(permission_name)
+        return bit is not None and bool(current_user["permission_mask"] & (1 << bit))
+    return permission_name in current_user.get("permissions", [])
+
+
 class AuthService:
     def __init__(self, db):
         self.user_model = UserModel(db)
+        self.permission_model = PermissionModel(db)
+        self.token_revocation = TokenRevocationService(
+            db,
+            sync_interval=Config.REVOCATION_SYNC_SECONDS,
+            capacity=Config.REVOCATION_BLOOM_CAPACITY,
+            error_rate=Config.REVOCATION_BLOOM_ERROR_RATE,
+            sync_overlap=Config.REVOCATION_SYNC_OVERLAP_SECONDS,
+        )
 
     def register_user(self, username, email, password, role='user'):
         """
@@ -20,9 +81,27 @@ class AuthService:
             user_id = self.user_model.create_user(username, email, hashed_password, role=role)
             return user_id
         except ValueError as e:
-            logging.error(f"Error al registrar el usuario: {str(e)}")
+            logger.error("Error al registrar el usuario: %s", e)
             raise ValueError(str(e))
 
+    def get_permission_mask(self, user):
+        """
+        Devuelve la máscara de permisos de un usuario. Los documentos que aún
+        no se migraron guardan una lista mixta de nombres y ObjectId, que se
+        resuelve a nombres con una sola consulta.
+        """
+        if 'permission_mask' in user:
+            return int(user['permission_mask'])
+        permissions = user.get('permissions', [])
+        names = [p for p in permissions if isinstance(p, str)]
+        permission_ids = [p for p in permissions if isinstance(p, ObjectId)]
+        if permission_ids:
+            names.extend(
+                permission['name']
+                for permission in self.permission_model.get_permissions_by_ids(permission_ids)
+            )
+        return permissions_to_mask(names)
+
     def login_user(self, identifier, password):
         """
         Maneja el inicio de sesión de un usuario, validando las credenciales.
@@ -32,13 +111,28 @@ class AuthService:
 
         # Si el usuario no existe o la contraseña no es correcta, lanzamos un error genérico
         if not user or not check_password_hash(user['password'], password):
-            logging.error("Credenciales inválidas")
+            logger.error("Credenciales inválidas")
             raise ValueError("Email o contraseña incorrectos.")
 
-        # Generar el token de acceso JWT
-        access_token = create_access_token(identity={
-            'id': str(user['_id']),
-            'role': user['role'],
-            'permissions': user.get('permissions', [])
-        })
+        # Generar el token de acceso JWT con claims compactos
+        access_token = create_access_token(
+            identity=str(user['_id']),
+            additional_claims={
+                'r': ROLE_CODES.get(user['role'], 'u'),
+                'p': self.get_permission_mask(user),
+            },
+        )
         return access_token, user
+
+    def logout_user(self, jwt_payload):
+        """
+        Revoca el token actual hasta su fecha de expiración.
+        """
+        expires_at = datetime.fromtimestamp(jwt_payload['exp'], tz=timezone.utc)
+        self.token_revocation.revoke(jwt_payload['jti'], expires_at)
+
+    def is_token_revoked(self, jwt_payload):
+        """
+        Verifica si un token fue revocado.
+        """
+        return self.token_revocation.is_revoked(jwt_payload['jti'])
@@ -4,6 +4,11 @@ from models.taquilla_model import (
     TaquillaModel,
 )  # Asegúrate de importar el modelo de taquillas
 from models.user_model import UserModel  # Asegúrate de importar el modelo de usuarios
+from models.configuration_model import ConfigurationModel
+from database import get_service
+from services.job_service import JobService, register_job_handler
+from utils.batch import order_by_ids
+from utils.fields import select_fields, wants
 
 
 class BettingCenterService:
@@ -13,6 +18,7 @@ class BettingCenterService:
         self.betting_center_model = BettingCenterModel(
             db, self.user_model, self.taquilla_model
         )
+        self.configuration_model = ConfigurationModel(db)
 
     def create_betting_center(self, name, address, admin_id):
         """
@@ -20,17 +26,70 @@ class BettingCenterService:
         """
         return self.betting_center_model.create_betting_center(name, address, admin_id)
 
-    def get_all_centers(self):
+    def get_all_centers(self, projection=None):
         """
         Obtiene todos los centros de apuestas.
         """
-        return self.betting_center_model.get_all_centers()
+        return self.betting_center_model.get_all_centers(projection)
 
-    def get_centers_by_admin(self, admin_id):
+    def get_centers_by_admin(self, admin_id, projection=None):
         """
         Obtiene todos los centros administrados por un usuario específico.
         """
-        return self.betting_center_model.get_centers_by_admin(admin_id)
+        return self.betting_center_model.get_centers_by_admin(admin_id, projection)
+
+    def get_centers_by_ids(self, current_user, center_ids, projection=None):
+        """
+        Obtiene varios centros con una sola consulta; el admin de centro solo
+        recibe los que administra.
+        """
+        if current_user["role"] == "super_admin":
+            centers = self.betting_center_model.find_betting_centers_by_ids(
+                center_ids, projection=projection
+            )
+        elif current_user["role"] == "admin_centro":
+            centers = self.betting_center_model.find_betting_centers_by_ids(
+                center_ids, current_user["id"], projection
+            )
+        else:
+            raise PermissionError("Acceso denegado")
+        return order_by_ids(centers, center_ids)
+
+    def search_centers(self, current_user, prefix, limit, offset=0, projection=None):
+        """
+        Busca centros por prefijo del nombre; el admin de centro solo recibe
+        los que administra.
+        """
+        if current_user["role"] == "super_admin":
+            return self.betting_center_model.search_betting_centers(
+                prefix, limit, offset, projection=projection
+            )
+        if current_user["role"] == "admin_centro":
+            return self.betting_center_model.search_betting_centers(
+                prefix, limit, offset, current_user["id"], projection
+            )
+        raise PermissionError("Acceso denegado")
+
+    def serialize_betting_centers(self, centers, fields=None):
+        """
+        Serializa varios centros. Las taquillas solo se consultan si se piden,
+        y entonces con una sola consulta para todos los centros.
+        """
+        taquillas_by_center = {}
+        if centers and wants(fields, "taquillas"):
+            for taquilla in self.taquilla_model.find_taquillas_by_centers(
+                [center["_id"] for center in centers]
+            ):
+                taquillas_by_center.setdefault(taquilla["betting_center_id"], []).append(taquilla)
+        return [
+            select_fields(
+                self.betting_center_model.serialize(
+                    center, taquillas_by_center.get(center["_id"], [])
+                ),
+                fields,
+            )
+            for center in centers
+        ]
 
     def get_betting_center_by_id(self, center_id):
         """
@@ -38,25 +97,51 @@ class BettingCenterService:
         """
         return self.betting_center_model.find_betting_center_by_id(center_id)
 
-    def get_betting_center_with_details(self, center_id):
+    def get_betting_center_with_details(self, center_id, fields=None, projection=None):
         """
         Obtiene un centro de apuestas con detalles adicionales como taquillas y usuarios asignados.
+        Las taquillas y sus usuarios solo se consultan si se pide el campo taquillas.
         """
-        center = self.betting_center_model.find_betting_center_by_id(center_id)
+        center = self.betting_center_model.find_betting_center_by_id(center_id, projection)
         if not center:
             return None
 
-        # Obtener taquillas asociadas
+        serialized_taquillas = []
+        if wants(fields, "taquillas"):
+            serialized_taquillas = self._serialize_center_taquillas(center_id)
+
+        # Serializar el centro de apuestas con los detalles de las taquillas
+        serialized_center = {
+            "id": str(center["_id"]),
+            "name": center.get("name", "N/A"),
+            "address": center.get("address", "N/A"),
+            "admin_id": str(center.get("admin_id", "")),
+            "taquillas": serialized_taquillas,
+            "associated_users": [str(user_id) for user_id in center.get("associated_users", [])],
+        }
+
+        return serialized_center
+
+    def _serialize_center_taquillas(self, center_id):
+        """
+        Serializa las taquillas de un centro con el usuario asignado a cada una.
+        Los usuarios se cargan con una sola consulta.
+        """
         taquillas = self.taquilla_model.find_taquillas_by_center(center_id)
+        user_ids = [t["assigned_user_id"] for t in taquillas if t.get("assigned_user_id")]
+        users = {
+            user["_id"]: user
+            for user in (
+                self.user_model.find_users_by_ids(user_ids, projection={"username": 1})
+                if user_ids
+                else []
+            )
+        }
         serialized_taquillas = []
 
         for taquilla in taquillas:
             # Obtener el usuario asignado a la taquilla
-            assigned_user = None
-            if taquilla.get("assigned_user_id"):
-                assigned_user = self.user_model.find_user_by_id(
-                    str(taquilla["assigned_user_id"])
-                )
+            assigned_user = users.get(taquilla.get("assigned_user_id"))
 
             # Serializar la taquilla con el nombre y el ID del usuario si existe
             serialized_taquillas.append(
@@ -75,17 +160,7 @@ class BettingCenterService:
                     },
                 }
             )
-
-        # Serializar el centro de apuestas con los detalles de las taquillas
-        serialized_center = {
-            "id": str(center["_id"]),
-            "name": center.get("name", "N/A"),
-            "address": center.get("address", "N/A"),
-            "admin_id": str(center.get("admin_id", "")),
-            "taquillas": serialized_taquillas,
-        }
-
-        return serialized_center
+        return serialized_taquillas
 
     def update_betting_center(self, center_id, updates):
         """
@@ -93,11 +168,37 @@ class BettingCenterService:
         """
         return self.betting_center_model.update_betting_center(center_id, updates)
 
-    def delete_betting_center(self, center_id):
+    def delete_betting_center(self, center_id, created_by=None):
         """
-        Elimina un centro de apuestas.
+        Encola la eliminación en cascada de un centro de apuestas y devuelve
+        el ID del trabajo.
         """
-        return self.betting_center_model.delete_betting_center(center_id)
+        return get_service(JobService).enqueue(
+            "delete_betting_center", {"center_id": str(center_id)}, created_by
+        )
+
+    def run_delete_betting_center(self, params, progress):
+        """
+        Elimina un centro con sus taquillas, su configuración y las
+        asignaciones de sus usuarios. Los tickets y los riesgos se conservan
+        como registro de las ventas. Se puede repetir sin efectos si un
+        intento anterior se interrumpió.
+        """
+        center_id = params["center_id"]
+        taquilla_ids = [
+            taquilla["_id"]
+            for taquilla in self.taquilla_model.find_taquillas_by_center(center_id, {"_id": 1})
+        ]
+        steps = 4
+        users = self.user_model.remove_center_from_users(center_id, taquilla_ids)
+        progress(1, steps)
+        taquillas = self.taquilla_model.delete_taquillas_by_center(center_id)
+        progress(2, steps)
+        self.configuration_model.delete_configuration(center_id)
+        progress(3, steps)
+        deleted = self.betting_center_model.delete_betting_center(center_id)
+        progress(4, steps)
+        return {"center_deleted": deleted, "taquillas": taquillas, "users": users}
 
     def change_admin(self, center_id, new_admin_id):
         """
@@ -182,9 +283,9 @@ class BettingCenterService:
         # Lógica para asignar o revocar permisos
         for permission in permissions:
             if permission["action"] == "assign":
-                self.user_model.assign_permission(user_id, permission["permission_id"])
+                self.user_model.add_permission_to_user(user_id, permission["permission_id"])
             elif permission["action"] == "revoke":
-                self.user_model.revoke_permission(user_id, permission["permission_id"])
+                self.user_model.remove_permission_from_user(user_id, permission["permission_id"])
 
         return True
 
@@ -197,3 +298,6 @@ class BettingCenterService:
             return None
 
         return str(center.get("admin_id", ""))  # Retorna el ID del administrador
+
+
+register_job_handler("delete_betting_center", BettingCenterService, "run_delete_betting_center")
@@ -0,0 +1,84 @@
+from bson import ObjectId
+from models.configuration_model import ConfigurationModel
+from models.configuration_template_model import ConfigurationTemplateModel
+from models.taquilla_model import TaquillaModel
+from models.user_model import UserModel
+from models.betting_center_model import BettingCenterModel
+
+
+class ConfigurationService:
+    def __init__(self, db):
+        self.configuration_model = ConfigurationModel(db)
+        self.template_model = ConfigurationTemplateModel(db)
+        self.betting_center_model = BettingCenterModel(db, UserModel(db), TaquillaModel(db))
+
+    def create_template(self, name, settings, created_by=None):
+        """
+        Crea una plantilla de configuración con nombre.
+        """
+        return self.template_model.create_template(name, settings, created_by)
+
+    def get_template(self, name):
+        """
+        Obtiene una plantilla por su nombre.
+        """
+        return self.template_model.find_template_by_name(name)
+
+    def get_all_templates(self):
+        """
+        Obtiene todas las plantillas de configuración.
+        """
+        return self.template_model.get_all_templates()
+
+    def update_template(self, name, settings):
+        """
+        Reemplaza los valores de una plantilla. Los centros que ya la tienen
+        aplicada no cambian hasta que se vuelva a aplicar.
+        """
+        return self.template_model.update_template(name, settings)
+
+    def delete_template(self, name):
+        """
+        Elimina una plantilla.
+        """
+        return self.template_model.delete_template(name)
+
+    def apply_template(self, current_user, name, center_ids):
+        """
+        Aplica una plantilla a varios centros con una sola escritura masiva.
+        El admin de centro solo puede aplicarla a los centros que administra.
+        Devuelve la plantilla y los IDs de los centros actualizados.
+        """
+        template = self.template_model.find_template_by_name(name)
+        if not template:
+            return None, []
+
+        if current_user["role"] == "super_admin":
+            admin_id = None
+        elif current_user["role"] == "admin_centro":
+            admin_id = current_user["id"]
+        else:
+            raise PermissionError("Acceso denegado")
+        centers = self.betting_center_model.find_betting_centers_by_ids(
+            center_ids, admin_id, {"_id": 1}
+        )
+        found = {center["_id"] for center in centers}
+        missing = [str(center_id) for center_id in center_ids if center_id not in found]
+        if missing:
+            if admin_id:
+                raise PermissionError(f"No administras los centros: {', '.join(missing)}")
+            raise ValueError(f"Centros no encontrados: {', '.join(missing)}")
+
+        self.configuration_model.apply_settings(center_ids, template["settings"], template)
+        return template, center_ids
+
+    def get_configuration_version(self, center_id):
+        """
+        Devuelve la versión de la configuración de un centro.
+        """
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID de centro inválido: {center_id}")
+        return self.configuration_model.get_configuration_version(center_id)
+
+    def serialize_template(self, template):
+        return self.template_model.serialize(template)
@@ -0,0 +1,304 @@
+from datetime import datetime, timedelta, timezone
+import csv
+import io
+import logging
+import os
+import uuid
+
+from bson import ObjectId
+from config import Config
+from database import get_service
+from models.betting_center_model import BettingCenterModel
+from models.export_model import ExportModel
+from models.taquilla_model import TaquillaModel
+from models.ticket_model import TicketModel
+from models.user_model import UserModel
+from services.job_service import JobLeaseLost, JobService, register_job_handler
+from services.ticket_archive_service import TicketArchiveService
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ["csv", "parquet"]
+
+# Columnas de cada exportación con su tipo en Parquet
+EXPORT_COLUMNS = {
+    "users": [
+        ("id", "string"),
+        ("username", "string"),
+        ("email", "string"),
+        ("role", "string"),
+        ("assigned_taquilla", "string"),
+    ],
+    "taquillas": [
+        ("id", "string"),
+        ("number", "string"),
+        ("status", "string"),
+        ("assigned_user_id", "string"),
+    ],
+    "sales": [
+        ("serial", "string"),
+        ("created_at", "timestamp"),
+        ("taquilla_id", "string"),
+        ("user_id", "string"),
+        ("race_id", "string"),
+        ("race_date", "string"),
+        ("bet_type", "string"),
+        ("runner_number", "int"),
+        ("amount", "float"),
+        ("status", "string"),
+        ("reprint_count", "int"),
+    ],
+}
+
+# Filas por bloque enviado al cliente en las exportaciones síncronas
+STREAM_CHUNK_ROWS = 500
+
+def _parse_date(value, field):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f"Fecha inválida en {field}: {value}. Debe tener el formato YYYY-MM-DD.")
+
+
+def _str_or_none(value):
+    return str(value) if value is not None else None
+
+
+class ExportService:
+    def __init__(self, db):
+        self.user_model = UserModel(db)
+        self.taquilla_model = TaquillaModel(db)
+        self.ticket_model = TicketModel(db)
+        self.betting_center_model = BettingCenterModel(
+            db, self.user_model, self.taquilla_model
+        )
+        self.export_model = ExportModel(db)
+        self.archive_service = TicketArchiveService(db)
+
+    def check_access(self, current_user, center_id):
+        """
+        Solo el super administrador y los administradores del centro exportan sus datos.
+        """
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        if current_user["role"] == "super_admin":
+            return
+        if current_user["role"] == "admin_centro" and self.betting_center_model.is_center_admin(
+            current_user["id"], center_id
+        ):
+            return
+        raise PermissionError("No eres el administrador de este centro de apuestas")
+
+    def validate(self, kind, export_format, filters):
+        """
+        Valida el tipo, el formato y las fechas de una exportación.
+        """
+        if kind not in EXPORT_COLUMNS:
+            raise ValueError(f"Exportación no válida. Debe ser una de: {', '.join(EXPORT_COLUMNS)}.")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato no válido. Debe ser uno de: {', '.join(EXPORT_FORMATS)}.")
+        self._date_range(filters)
+
+    def _date_range(self, filters):
+        # "to" incluye el día completo
+        start = _parse_date(filters.get("from"), "from")
+        end = _parse_date(filters.get("to"), "to")
+        return start, end + timedelta(days=1) if end else None
+
+    def _rows(self, kind, center_id, filters):
+        """
+        Genera las filas de la exportación a partir de un cursor del servidor.
+        """
+        batch_size = Config.EXPORT_BATCH_SIZE
+        if kind == "users":
+            cursor = self.user_model.iter_users_by_center(
+                center_id, {"password": 0, "permission_mask": 0}, batch_size
+            )
+            for user in cursor:
+                yield {
+                    "id": str(user["_id"]),
+                    "username": user.get("username"),
+                    "email": user.get("email"),
+                    "role": user.get("role"),
+                    "assigned_taquilla": _str_or_none(user.get("assigned_taquilla")),
+                }
+        elif kind == "taquillas":
+            for taquilla in self.taquilla_model.iter_taquillas_by_center(center_id, batch_size):
+                yield {
+                    "id": str(taquilla["_id"]),
+                    "number": _str_or_none(taquilla.get("number")),
+                    "status": taquilla.get("status", "active"),
+                    "assigned_user_id": _str_or_none(taquilla.get("assigned_user_id")),
+                }
+        else:
+            for ticket in self._iter_sales(center_id, filters, batch_size):
+                yield {
+                    "serial": ticket["serial"],
+                    "created_at": ticket["created_at"],
+                    "taquilla_id": str(ticket["taquilla_id"]),
+                    "user_id": str(ticket["user_id"]),
+                    "race_id": str(ticket["race_id"]),
+                    "race_date": ticket.get("race_date"),
+                    "bet_type": ticket["bet_type"],
+                    "runner_number": ticket["runner_number"],
+                    "amount": ticket["amount"],
+                    "status": ticket.get("status", "active"),
+                    "reprint_count": ticket.get("reprint_count", 0),
+                }
+
+    def _iter_sales(self, center_id, filters, batch_size):
+        """
+        Recorre las ventas del rango pedido: primero las de los días ya
+        archivados en Parquet, que son las más antiguas, y después las que
+        siguen en la colección.
+        """
+        for ticket in self.archive_service.iter_archive(
+            center_id, filters.get("from"), filters.get("to")
+        ):
+            yield ticket
+        start, end = self._date_range(filters)
+        yield from self.ticket_model.iter_tickets_by_center(center_id, start, end, batch_size)
+
+    def is_large(self, kind, center_id, filters):
+        """
+        Indica si la exportación debe generarse en segundo plano.
+        """
+        if kind != "sales":
+            # Usuarios y taquillas de un centro siempre caben en una petición
+            return False
+        start, end = self._date_range(filters)
+        count = self.ticket_model.count_tickets_by_center(center_id, start, end)
+        count += self.archive_service.count_archived(center_id, filters.get("from"), filters.get("to"))
+        return count > Config.EXPORT_SYNC_MAX_ROWS
+
+    def stream_csv(self, kind, center_id, filters):
+        """
+        Genera el CSV por bloques; la memoria usada no depende del número de
+        filas. La exportación debe validarse antes con validate().
+        """
+        columns = [name for name, _ in EXPORT_COLUMNS[kind]]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        rows = 0
+        for row in self._rows(kind, center_id, filters):
+            writer.writerow(row)
+            rows += 1
+            if rows % STREAM_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def start_export(self, current_user, kind, center_id, export_format, filters):
+        """
+        Registra una exportación y la encola en el ejecutor de trabajos, que
+        la retoma si el worker muere y la reintenta si falla. Devuelve su ID.
+        """
+        self.validate(kind, export_format, filters)
+        export_id = self.export_model.create_export(
+            center_id, kind, export_format, filters, current_user["id"]
+        )
+        job_id = get_service(JobService).enqueue(
+            "export", {"export_id": str(export_id)}, current_user["id"]
+        )
+        self.export_model.update_export(export_id, {"job_id": job_id})
+        return export_id
+
+    def run_export(self, params, progress):
+        """
+        Genera el fichero de una exportación. Cada intento reescribe el
+        fichero desde el principio, así que se puede repetir sin efectos.
+        """
+        export_id = params["export_id"]
+        export = self.export_model.update_export(export_id, {"status": "running", "error": None})
+        os.makedirs(Config.EXPORT_DIR, exist_ok=True)
+        path = os.path.join(Config.EXPORT_DIR, f"{export_id}.{export['format']}")
+        # Cada intento escribe su propio temporal: un intento que perdió la
+        # concesión puede seguir escribiendo mientras otro worker lo repite
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            rows = self._rows(export["kind"], export["betting_center_id"], export.get("filters", {}))
+            if export["format"] == "csv":
+                written = self._write_csv(temp_path, export["kind"], rows, progress)
+            else:
+                written = self._write_parquet(temp_path, export["kind"], rows, progress)
+            os.replace(temp_path, path)
+        except JobLeaseLost:
+            # El estado de la exportación es ahora del intento que la retomó
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            # Queda como fallida hasta que el ejecutor la reintente
+            self.export_model.update_export(export_id, {"status": "failed", "error": str(e)})
+            raise
+        self.export_model.update_export(
+            export_id,
+            {"status": "done", "rows": written, "size": os.path.getsize(path), "path": path},
+        )
+        logger.info("Exportación %s terminada: %s filas", export_id, written)
+        return {"export_id": export_id, "rows": written}
+
+    def _write_csv(self, path, kind, rows, progress):
+        written = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=[name for name, _ in EXPORT_COLUMNS[kind]])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                written += 1
+                if written % Config.EXPORT_BATCH_SIZE == 0:
+                    # Renueva la concesión del trabajo en las exportaciones largas
+                    progress(written)
+        return written
+
+    def _write_parquet(self, path, kind, rows, progress):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("La exportación a Parquet requiere el paquete pyarrow.")
+
+        types = {
+            "string": pyarrow.string(),
+            "int": pyarrow.int64(),
+            "float": pyarrow.float64(),
+            "timestamp": pyarrow.timestamp("ms"),
+        }
+        schema = pyarrow.schema([(name, types[kind_type]) for name, kind_type in EXPORT_COLUMNS[kind]])
+        written = 0
+        with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= Config.EXPORT_BATCH_SIZE:
+                    writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                    written += len(batch)
+                    batch = []
+                    progress(written)
+            if batch:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+        return written
+
+    def get_export(self, current_user, export_id):
+        """
+        Obtiene una exportación si el usuario tiene acceso a su centro.
+        """
+        if not ObjectId.is_valid(export_id):
+            raise ValueError(f"ID de exportación inválido: {export_id}")
+        export = self.export_model.find_export_by_id(export_id)
+        if export:
+            self.check_access(current_user, str(export["betting_center_id"]))
+        return export
+
+    def serialize(self, export):
+        return self.export_model.serialize(export)
+
+
+register_job_handler("export", ExportService, "run_export")
@@ -0,0 +1,163 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import socket
+import threading
+
+import pymongo
+from bson import ObjectId
+from config import Config
+from database import get_service
+from models.job_model import JobModel
+
+logger = logging.getLogger(__name__)
+
+# Tipo de trabajo -> (clase del servicio, método que lo ejecuta). Los servicios
+# registran sus trabajos al importarse; el método recibe los parámetros del
+# trabajo y una función progress(done, total), y su resultado se guarda en el
+# trabajo. Un trabajo puede repetirse tras un fallo o si su worker muere, así
+# que los métodos deben ser idempotentes.
+JOB_HANDLERS = {}
+
+
+def register_job_handler(kind, service_class, method_name):
+    JOB_HANDLERS[kind] = (service_class, method_name)
+
+
+class JobLeaseLost(Exception):
+    """
+    La concesión del trabajo venció y otro worker lo retomó; este intento
+    debe abandonarse sin escribir su estado.
+    """
+
+
+class JobService:
+    """
+    Ejecutor de trabajos en segundo plano de cada worker. Un hilo toma los
+    trabajos de la cola en Mongo cuando hay hueco en el pool (JOB_WORKERS
+    hilos) y los ejecuta; los fallos se reintentan con espera exponencial
+    hasta max_attempts.
+    """
+
+    def __init__(self, db):
+        self.job_model = JobModel(db)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._slots = threading.BoundedSemaphore(Config.JOB_WORKERS)
+        self._wakeup = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def enqueue(self, kind, params, created_by=None, max_attempts=None):
+        """
+        Encola un trabajo y despierta al ejecutor de este worker. Devuelve su ID.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Tipo de trabajo no válido: {kind}")
+        job_id = self.job_model.create_job(
+            kind, params, created_by, max_attempts or Config.JOB_MAX_ATTEMPTS
+        )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def start(self):
+        """
+        Inicia el hilo que toma los trabajos de la cola.
+        """
+        if not Config.JOB_RUNNER_ENABLED:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._executor = ThreadPoolExecutor(
+                max_workers=Config.JOB_WORKERS, thread_name_prefix="job"
+            )
+            self._thread = threading.Thread(target=self._poll, name="job-runner", daemon=True)
+            self._thread.start()
+
+    def _poll(self):
+        while True:
+            self._slots.acquire()
+            try:
+                with pymongo.timeout(Config.MONGO_REQUEST_TIMEOUT_MS / 1000):
+                    job = self.job_model.claim_next(self.worker_id, Config.JOB_LEASE_SECONDS)
+            except Exception as e:
+                logger.error("Error al leer la cola de trabajos: %s", e)
+                job = None
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(Config.JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        job_id = job["_id"]
+        attempt = job["attempts"]
+        try:
+            if job["attempts"] > job["max_attempts"]:
+                # El worker que lo ejecutaba murió en el último intento
+                self.job_model.fail_job(
+                    job_id, self.worker_id, attempt, job.get("error") or "Se agotaron los intentos"
+                )
+                return
+            service_class, method_name = JOB_HANDLERS[job["kind"]]
+            handler = getattr(get_service(service_class), method_name)
+
+            def progress(done, total=None):
+                if not self.job_model.report_progress(
+                    job_id, self.worker_id, attempt, done, total, Config.JOB_LEASE_SECONDS
+                ):
+                    raise JobLeaseLost()
+
+            with pymongo.timeout(Config.MONGO_LONG_TIMEOUT_MS / 1000):
+                result = handler(job.get("params", {}), progress)
+            with pymongo.timeout(Config.MONGO_REQUEST_TIMEOUT_MS / 1000):
+                if not self.job_model.complete_job(job_id, self.worker_id, attempt, result):
+                    raise JobLeaseLost()
+            logger.info("Trabajo %s (%s) terminado", job_id, job["kind"])
+        except JobLeaseLost:
+            logger.warning(
+                "El trabajo %s (%s) fue retomado por otro worker; se descarta el intento %s",
+                job_id, job["kind"], attempt,
+            )
+        except Exception as e:
+            retry_at = None
+            if job["attempts"] < job["max_attempts"]:
+                delay = Config.JOB_RETRY_BACKOFF * 2 ** (job["attempts"] - 1)
+                retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            logger.error(
+                "Error en el trabajo %s (%s), intento %s de %s: %s",
+                job_id, job["kind"], job["attempts"], job["max_attempts"], e,
+            )
+            try:
+                with pymongo.timeout(Config.MONGO_REQUEST_TIMEOUT_MS / 1000):
+                    if not self.job_model.fail_job(job_id, self.worker_id, attempt, str(e), retry_at):
+                        logger.warning("El trabajo %s ya fue retomado por otro worker", job_id)
+            except Exception as update_error:
+                # La concesión vencerá y el trabajo se volverá a tomar
+                logger.error("No se pudo registrar el error del trabajo %s: %s", job_id, update_error)
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+    def get_job(self, current_user, job_id):
+        """
+        Obtiene un trabajo. Solo lo ven su autor y el super administrador.
+        """
+        if not ObjectId.is_valid(job_id):
+            raise ValueError(f"ID de trabajo inválido: {job_id}")
+        job = self.job_model.find_job_by_id(job_id)
+        if job and current_user["role"] != "super_admin" and str(job.get("created_by")) != current_user["id"]:
+            raise PermissionError("Acceso denegado")
+        return job
+
+    def get_jobs(self, current_user, status=None, limit=50):
+        """
+        Obtiene los trabajos recientes: todos para el super administrador y
+        los propios para el resto.
+        """
+        created_by = None if current_user["role"] == "super_admin" else current_user["id"]
+        return self.job_model.find_jobs(status, created_by, limit)
+
+    def serialize(self, job):
+        return self.job_model.serialize(job)
@@ -0,0 +1,114 @@
+import threading
+import time
+from config import Config
+from models.configuration_model import ConfigurationModel
+from models.liability_model import LiabilityModel, LiabilityLimitExceeded
+
+# Réplica en memoria de los totales por (centro, fecha), compartida por el proceso.
+# Cada entrada guarda los totales por clave y el momento de su última recarga.
+_mirror = {}
+_mirror_lock = threading.Lock()
+
+
+def _mirror_key(race_id=None, runner_number=None):
+    return (str(race_id) if race_id else None, runner_number)
+
+
+class LiabilityService:
+    def __init__(self, db):
+        self.liability_model = LiabilityModel(db)
+        self.configuration_model = ConfigurationModel(db)
+
+    def check_sale_limits(self, betting_center_id, amount):
+        """
+        Valida el monto de una venta contra los límites por ticket del centro.
+        Devuelve el límite por ejemplar que se debe aplicar (o None si no hay).
+        """
+        config = self.configuration_model.get_configuration(betting_center_id) or {}
+        if config.get("no_limit"):
+            return None
+        min_sale = config.get("min_sale_limit")
+        max_sale = config.get("max_sale_limit")
+        if min_sale is not None and amount < min_sale:
+            raise LiabilityLimitExceeded(f"El monto mínimo por ticket es {min_sale}.")
+        if max_sale is not None and amount > max_sale:
+            raise LiabilityLimitExceeded(f"El monto máximo por ticket es {max_sale}.")
+        return config.get("max_horse_limit")
+
+    def reserve(self, betting_center_id, date, race_id, runner_number, amount):
+        """
+        Registra una venta en los contadores, aplicando el límite por ejemplar
+        en la misma operación atómica.
+        """
+        horse_limit = self.check_sale_limits(betting_center_id, amount)
+        self.liability_model.reserve(
+            betting_center_id, date, race_id, runner_number, amount, horse_limit
+        )
+        self._apply_to_mirror(betting_center_id, date, race_id, runner_number, amount, 1)
+
+    def release(self, betting_center_id, date, race_id, runner_number, amount):
+        """
+        Descuenta una venta anulada de los contadores.
+        """
+        self.liability_model.release(betting_center_id, date, race_id, runner_number, amount)
+        self._apply_to_mirror(betting_center_id, date, race_id, runner_number, -amount, -1)
+
+    def _apply_to_mirror(self, betting_center_id, date, race_id, runner_number, amount, count):
+        with _mirror_lock:
+            entry = _mirror.get((str(betting_center_id), date))
+            if entry is None:
+                return
+            for key in (
+                _mirror_key(race_id, runner_number),
+                _mirror_key(race_id),
+                _mirror_key(),
+            ):
+                totals = entry["totals"].setdefault(key, {"total": 0, "count": 0})
+                totals["total"] += amount
+                totals["count"] += count
+
+    def get_center_liabilities(self, betting_center_id, date):
+        """
+        Devuelve los totales de un centro en una fecha desde la réplica en
+        memoria. La réplica se recarga con una sola consulta cuando tiene más de
+        LIABILITY_MIRROR_TTL segundos, para incorporar las ventas de otros workers.
+        """
+        mirror_key = (str(betting_center_id), date)
+        entry = _mirror.get(mirror_key)
+        if entry is None or time.monotonic() - entry["loaded_at"] > Config.LIABILITY_MIRROR_TTL:
+            totals = {
+                _mirror_key(doc.get("race_id"), doc.get("runner_number")): {
+                    "total": doc.get("total", 0),
+                    "count": doc.get("count", 0),
+                }
+                for doc in self.liability_model.get_center_totals(betting_center_id, date)
+            }
+            entry = {"totals": totals, "loaded_at": time.monotonic()}
+            with _mirror_lock:
+                _mirror[mirror_key] = entry
+
+        with _mirror_lock:
+            items = [(key, dict(value)) for key, value in entry["totals"].items()]
+        return self._serialize(betting_center_id, date, items)
+
+    def _serialize(self, betting_center_id, date, items):
+        center_total = {"total": 0, "count": 0}
+        races = {}
+        for (race_id, runner_number), totals in items:
+            if race_id is None:
+                center_total = totals
+                continue
+            race = races.setdefault(race_id, {"race_id": race_id, "total": 0, "count": 0, "runners": []})
+            if runner_number is None:
+                race["total"], race["count"] = totals["total"], totals["count"]
+            else:
+                race["runners"].append({"runner_number": runner_number, **totals})
+        for race in races.values():
+            race["runners"].sort(key=lambda runner: runner["runner_number"])
+        return {
+            "betting_center_id": str(betting_center_id),
+            "date": date,
+            "total": center_total["total"],
+            "count": center_total["count"],
+            "races": list(races.values()),
+        }
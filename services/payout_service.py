@@ -0,0 +1,145 @@
+from datetime import datetime, timezone
+import threading
+import time
+from bson import ObjectId
+from config import Config
+from models.configuration_model import ConfigurationModel
+from models.ticket_model import BET_TYPES, TicketModel
+
+# Tablas de pozos por (centro, carrera), compartidas por el proceso. Cada
+# entrada guarda los montos por tipo de apuesta y ejemplar, el momento de su
+# última recarga y la última tabla de dividendos calculada.
+_tables = {}
+_tables_lock = threading.Lock()
+
+# Ejemplares que cobran en cada tipo de apuesta
+PLACES = {"win": 1, "place": 2, "show": 3}
+
+
+def _empty_pools():
+    return {bet_type: {"total": 0, "runners": {}} for bet_type in BET_TYPES}
+
+
+class PayoutService:
+    """
+    Dividendos probables de ganador, place y show por carrera y centro. Cada
+    venta o anulación del worker actualiza su pozo en O(1); la tabla de
+    dividendos se calcula al leerla y se reutiliza hasta el siguiente cambio.
+    """
+
+    def __init__(self, db):
+        self.ticket_model = TicketModel(db)
+        self.configuration_model = ConfigurationModel(db)
+
+    def record_bet(self, betting_center_id, race_id, bet_type, runner_number, amount):
+        """
+        Suma una venta (o resta una anulación, con monto negativo) al pozo de
+        la carrera si su tabla está cargada en este worker.
+        """
+        with _tables_lock:
+            entry = _tables.get((str(betting_center_id), str(race_id)))
+            if entry is None or bet_type not in entry["pools"]:
+                return
+            pool = entry["pools"][bet_type]
+            pool["total"] += amount
+            pool["runners"][runner_number] = pool["runners"].get(runner_number, 0) + amount
+            entry["changes"] += 1
+            entry["snapshot"] = None
+
+    def _load(self, betting_center_id, race_id):
+        pools = _empty_pools()
+        for doc in self.ticket_model.get_race_pools(betting_center_id, race_id):
+            pool = pools.get(doc["_id"].get("bet_type"))
+            if pool is None:
+                continue
+            pool["total"] += doc["total"]
+            pool["runners"][doc["_id"]["runner_number"]] = doc["total"]
+        now = time.monotonic()
+        entry = {"pools": pools, "loaded_at": now, "changes": 0, "snapshot": None, "config_version": None}
+        with _tables_lock:
+            # Las tablas vencidas se recargarían al leerlas, así que se descartan
+            for key in [key for key, value in _tables.items() if now - value["loaded_at"] > Config.PAYOUT_TABLE_TTL]:
+                del _tables[key]
+            _tables[(str(betting_center_id), str(race_id))] = entry
+        return entry
+
+    def get_payouts(self, betting_center_id, race_id):
+        """
+        Devuelve la tabla de dividendos probables de una carrera en un centro.
+        La tabla se recarga con una sola agregación cuando tiene más de
+        PAYOUT_TABLE_TTL segundos, para incorporar las ventas de otros workers.
+        """
+        if not ObjectId.is_valid(betting_center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {betting_center_id}")
+        if not ObjectId.is_valid(race_id):
+            raise ValueError(f"ID de carrera inválido: {race_id}")
+
+        entry = _tables.get((str(betting_center_id), str(race_id)))
+        if entry is None or time.monotonic() - entry["loaded_at"] > Config.PAYOUT_TABLE_TTL:
+            entry = self._load(betting_center_id, race_id)
+
+        config = self.configuration_model.get_configuration(betting_center_id) or {}
+        config_version = config.get("version", 0)
+        snapshot = entry["snapshot"]
+        if snapshot is not None and entry["config_version"] == config_version:
+            return snapshot
+
+        with _tables_lock:
+            changes = entry["changes"]
+            pools = {
+                bet_type: (pool["total"], dict(pool["runners"]))
+                for bet_type, pool in entry["pools"].items()
+            }
+        snapshot = {
+            "betting_center_id": str(betting_center_id),
+            "race_id": str(race_id),
+            "takeout": Config.PAYOUT_TAKEOUT,
+            "pools": {
+                bet_type: self._pool_payouts(total, runners, PLACES[bet_type], config)
+                for bet_type, (total, runners) in pools.items()
+            },
+            "computed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with _tables_lock:
+            # Si entró una venta mientras se calculaba, la tabla ya no vale
+            if entry["changes"] == changes:
+                entry["snapshot"] = snapshot
+                entry["config_version"] = config_version
+        return snapshot
+
+    def _pool_payouts(self, total, runners, places, config):
+        """
+        Calcula el dividendo probable por unidad apostada de cada ejemplar de
+        un pozo. En place y show se supone que los otros ejemplares que cobran
+        son los más jugados, así que el dividendo mostrado es el mínimo probable.
+        """
+        net = total * (1 - Config.PAYOUT_TAKEOUT)
+        leaders = sorted(runners.items(), key=lambda item: item[1], reverse=True)[:places]
+        leader_numbers = {number for number, _ in leaders}
+        payouts = []
+        for runner_number, stake in sorted(runners.items()):
+            if stake <= 0:
+                continue
+            others = sum(amount for number, amount in leaders if number != runner_number)
+            if runner_number not in leader_numbers:
+                others -= leaders[-1][1]
+            profit = max(net - stake - others, 0)
+            payouts.append({
+                "runner_number": runner_number,
+                "amount": stake,
+                "dividend": self._apply_limits(1 + profit / (places * stake), config),
+            })
+        return {"total": total, "runners": payouts}
+
+    def _apply_limits(self, dividend, config):
+        """
+        Aplica los límites de dividendo del centro: fixed_dividend sustituye
+        al calculado y min_dividend/max_dividend lo acotan.
+        """
+        if config.get("fixed_dividend"):
+            return config["fixed_dividend"]
+        if config.get("min_dividend") is not None:
+            dividend = max(dividend, config["min_dividend"])
+        if config.get("max_dividend") is not None:
+            dividend = min(dividend, config["max_dividend"])
+        return round(dividend, 2)
@@ -1,12 +1,17 @@
 from bson.objectid import ObjectId
 from models.permission_model import PermissionModel
 from models.user_model import UserModel
+from models.betting_center_model import BettingCenterModel
+from models.taquilla_model import TaquillaModel
 
 
 class PermissionService:
     def __init__(self, db):
         self.permission_model = PermissionModel(db)
         self.user_model = UserModel(db)
+        self.betting_center_model = BettingCenterModel(
+            db, self.user_model, TaquillaModel(db)
+        )
 
     def assign_permission_to_user(self, current_user, user_id, permission_id):
         """
@@ -65,15 +70,33 @@ class PermissionService:
 
     def get_user_permissions(self, user_id):
         """
-        Obtiene los permisos asignados a un usuario.
+        Obtiene los permisos asignados a un usuario a partir de su máscara,
+        usando la caché de permisos del proceso.
         """
-        user = self.user_model.find_user_by_id(user_id)
+        user = self.user_model.find_user_by_id(user_id, {"permission_mask": 1})
         if not user:
             raise ValueError("Usuario no encontrado")
 
-        permissions = self.permission_model.get_permissions_by_ids(
-            user.get("permissions", [])
-        )
+        mask = user.get("permission_mask", 0)
         return [
-            self.permission_model.serialize(permission) for permission in permissions
+            self.permission_model.serialize(permission)
+            for permission in self.permission_model.get_all_permissions()
+            if permission.get("bit") is not None and mask & (1 << permission["bit"])
         ]
+
+    def get_users_with_permission(self, current_user, permission_name):
+        """
+        Obtiene los usuarios que tienen un permiso. El admin de centro solo
+        recibe los usuarios de los centros que administra.
+        """
+        if current_user["role"] == "super_admin":
+            return self.user_model.find_users_with_permission(permission_name)
+        if current_user["role"] == "admin_centro":
+            center_ids = [
+                center["_id"]
+                for center in self.betting_center_model.get_centers_by_admin(
+                    current_user["id"], {"_id": 1}
+                )
+            ]
+            return self.user_model.find_users_with_permission(permission_name, center_ids)
+        raise PermissionError("Acceso denegado")
@@ -0,0 +1,143 @@
+from datetime import datetime
+import threading
+from bson import ObjectId
+from config import Config
+from models.race_model import RaceModel
+from models.runner_model import RunnerModel
+from utils.cache import TTLCache
+
+# Programas de carrera serializados, compartidos por todo el proceso
+_race_card_cache = TTLCache(Config.RACE_CARD_CACHE_TTL)
+# Candados repartidos por carrera: un número fijo, de modo que los IDs
+# recibidos no hacen crecer la memoria. Dos carreras que comparten candado
+# solo esperan una a la otra al cargar su programa.
+CARD_LOCK_STRIPES = 64
+_card_locks = [threading.Lock() for _ in range(CARD_LOCK_STRIPES)]
+
+
+def _card_lock(race_id):
+    return _card_locks[hash(race_id) % CARD_LOCK_STRIPES]
+
+
+class RaceService:
+    def __init__(self, db):
+        self.race_model = RaceModel(db)
+        self.runner_model = RunnerModel(db)
+
+    def create_race(self, track, date, race_number, post_time, name=None, distance=None):
+        """
+        Crea una nueva carrera.
+        """
+        return self.race_model.create_race(
+            track, date, race_number, self._parse_post_time(post_time), name, distance
+        )
+
+    def get_races(self, track, date):
+        """
+        Obtiene las carreras de un hipódromo en una fecha.
+        """
+        return [
+            self.race_model.serialize(race)
+            for race in self.race_model.get_races_by_track_and_date(track, date)
+        ]
+
+    def get_race_card(self, race_id):
+        """
+        Obtiene el programa de una carrera (datos de la carrera y ejemplares)
+        desde la caché del proceso. Solo una petición por carrera consulta
+        la base de datos cuando la entrada no está en caché.
+        """
+        if not ObjectId.is_valid(race_id):
+            raise ValueError(f"ID de carrera inválido: {race_id}")
+        race_id = str(race_id)
+        card = _race_card_cache.get(race_id)
+        if card is not None:
+            return card
+
+        with _card_lock(race_id):
+            card = _race_card_cache.get(race_id)
+            if card is not None:
+                return card
+
+            race = self.race_model.find_race_by_id(race_id)
+            if not race:
+                return None
+            card = self.race_model.serialize(race)
+            card["runners"] = [
+                self.runner_model.serialize(runner)
+                for runner in self.runner_model.find_runners_by_race(race_id)
+            ]
+            _race_card_cache.set(race_id, card)
+            return card
+
+    def check_sale_allowed(self, race_id, runner_number):
+        """
+        Valida contra el primario que la carrera está abierta y el ejemplar no
+        está retirado. El programa en caché puede estar desactualizado en los
+        workers que no recibieron el cambio, así que solo sirve para mostrarlo.
+        """
+        if not self.race_model.is_open(race_id):
+            raise ValueError("La carrera no admite apuestas")
+        if not self.runner_model.is_running(race_id, runner_number):
+            raise ValueError(f"El ejemplar {runner_number} no corre en esta carrera o está retirado")
+
+    def invalidate_race_card(self, race_id):
+        """
+        Descarta el programa en caché de una carrera. Toma el candado de la
+        carrera para esperar a una carga en curso, que podría haber leído los
+        datos anteriores al cambio y guardarlos después del borrado.
+        """
+        race_id = str(race_id)
+        with _card_lock(race_id):
+            _race_card_cache.delete(race_id)
+
+    def add_runner(self, race_id, number, horse_name, jockey=None, trainer=None, morning_line=None):
+        """
+        Inscribe un ejemplar e invalida el programa de la carrera.
+        """
+        if not self.race_model.find_race_by_id(race_id):
+            raise ValueError("Carrera no encontrada")
+        runner_id = self.runner_model.create_runner(
+            race_id, number, horse_name, jockey, trainer, morning_line
+        )
+        self.invalidate_race_card(race_id)
+        return runner_id
+
+    def scratch_runner(self, race_id, number, scratched=True):
+        """
+        Retira un ejemplar e invalida el programa de la carrera.
+        """
+        success = self.runner_model.set_scratched(race_id, number, scratched)
+        self.invalidate_race_card(race_id)
+        return success
+
+    def update_post_time(self, race_id, post_time):
+        """
+        Cambia la hora de salida e invalida el programa de la carrera.
+        """
+        success = self.race_model.update_post_time(race_id, self._parse_post_time(post_time))
+        self.invalidate_race_card(race_id)
+        return success
+
+    def change_race_status(self, race_id, new_status):
+        """
+        Cambia el estado de la carrera e invalida su programa.
+        """
+        success = self.race_model.change_race_status(race_id, new_status)
+        self.invalidate_race_card(race_id)
+        return success
+
+    def delete_race(self, race_id):
+        """
+        Elimina una carrera con sus ejemplares.
+        """
+        self.runner_model.delete_runners_by_race(race_id)
+        success = self.race_model.delete_race(race_id)
+        self.invalidate_race_card(race_id)
+        return success
+
+    def _parse_post_time(self, post_time):
+        try:
+            return datetime.fromisoformat(post_time)
+        except (TypeError, ValueError):
+            raise ValueError(f"Hora de salida inválida: {post_time}. Use el formato ISO 8601.")
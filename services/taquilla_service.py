@@ -4,6 +4,10 @@ from models.user_model import UserModel  # Asegúrate de importar el modelo de u
 from models.permission_model import PermissionModel  # Importar el modelo de permisos
 import logging
 from bson import ObjectId
+from utils.batch import order_by_ids
+from utils.fields import select_fields, wants
+
+logger = logging.getLogger(__name__)
 
 
 class TaquillaService:
@@ -39,7 +43,7 @@ class TaquillaService:
 
             return taquilla_id
         except ValueError as e:
-            logging.error(f"Error al crear taquilla: {str(e)}")
+            logger.error("Error al crear taquilla: %s", e)
             raise ValueError(str(e))
 
     def get_taquilla_by_id(self, taquilla_id):
@@ -66,6 +70,64 @@ class TaquillaService:
             }
         return None
 
+    def find_taquilla(self, taquilla_id, projection=None):
+        """
+        Obtiene el documento de una taquilla, opcionalmente proyectado.
+        """
+        return self.taquilla_model.find_taquilla_by_id(taquilla_id, projection)
+
+    def find_taquillas_by_center(self, center_id, projection=None):
+        """
+        Obtiene los documentos de las taquillas de un centro, opcionalmente proyectados.
+        """
+        return self.taquilla_model.find_taquillas_by_center(center_id, projection)
+
+    def serialize_taquillas(self, taquillas, fields=None):
+        """
+        Serializa taquillas con los campos pedidos; sin fields, con todos. El
+        usuario asignado se consulta con una sola consulta $in y solo si la
+        respuesta lo incluye.
+        """
+        users = {}
+        if wants(fields, "assigned_user"):
+            user_ids = [t["assigned_user_id"] for t in taquillas if t.get("assigned_user_id")]
+            if user_ids:
+                users = {
+                    user["_id"]: user
+                    for user in self.user_model.find_users_by_ids(user_ids, projection={"username": 1})
+                }
+
+        serialized = []
+        for taquilla in taquillas:
+            data = self.taquilla_model.serialize(taquilla)
+            if wants(fields, "assigned_user"):
+                assigned_user = users.get(taquilla.get("assigned_user_id"))
+                data["assigned_user"] = {
+                    "id": str(assigned_user["_id"]) if assigned_user else None,
+                    "username": assigned_user["username"] if assigned_user else "Sin Asignar",
+                }
+            serialized.append(select_fields(data, fields))
+        return serialized
+
+    def get_taquillas_by_ids(self, current_user, taquilla_ids, projection=None):
+        """
+        Obtiene varias taquillas con una sola consulta, limitada a los centros
+        que administra el usuario si no es super administrador.
+        """
+        if current_user["role"] == "super_admin":
+            taquillas = self.taquilla_model.find_taquillas_by_ids(taquilla_ids, projection=projection)
+        elif current_user["role"] == "admin_centro":
+            center_ids = [
+                center["_id"]
+                for center in self.betting_center_model.get_centers_by_admin(
+                    current_user["id"], {"_id": 1}
+                )
+            ]
+            taquillas = self.taquilla_model.find_taquillas_by_ids(taquilla_ids, center_ids, projection)
+        else:
+            raise PermissionError("Acceso denegado")
+        return order_by_ids(taquillas, taquilla_ids)
+
     def update_taquilla(self, taquilla_id, updates):
         """
         Actualiza la información de una taquilla.
@@ -116,16 +178,8 @@ class TaquillaService:
         return serialized_taquillas
 
     def assign_user(self, taquilla_id, user_id):
-        print(f"Servicio - Taquilla ID: {taquilla_id}, tipo: {type(taquilla_id)}")
-        print(f"Servicio - User ID: {user_id}, tipo: {type(user_id)}")
+        logger.debug("Asignar usuario %r a taquilla %r", user_id, taquilla_id)
         try:
-            # Imprimir los valores recibidos
-            taquilla_object_id = ObjectId(taquilla_id)
-            user_object_id = ObjectId(user_id)
-
-            print(f"Taquilla ObjectId: {taquilla_object_id}")
-            print(f"User ObjectId: {user_object_id}")
-
             # Validar que los IDs sean válidos ObjectId
             if not taquilla_id or not user_id:
                 raise ValueError(
@@ -141,10 +195,6 @@ class TaquillaService:
             taquilla_object_id = ObjectId(taquilla_id)
             user_object_id = ObjectId(user_id)
 
-            # Imprimir los ObjectId convertidos
-            print(f"taquilla_object_id: {taquilla_object_id}")
-            print(f"user_object_id: {user_object_id}")
-
             # Verificar si la taquilla existe
             taquilla = self.taquilla_model.find_taquilla_by_id(taquilla_object_id)
             if not taquilla:
@@ -155,14 +205,13 @@ class TaquillaService:
             if not user:
                 raise ValueError("Usuario no encontrado")
 
-            # Imprimir en consola los IDs
-            print(
-                f"ID del usuario: {user_object_id}, ID de la taquilla: {taquilla_object_id}"
-            )
-
             # Registro de información
-            logging.info(
-                f"Asignando usuario ID: {user_object_id} (Username: {user['username']}) a taquilla ID: {taquilla_object_id} (Número: {taquilla['number']})"
+            logger.info(
+                "Asignando usuario ID: %s (Username: %s) a taquilla ID: %s (Número: %s)",
+                user_object_id,
+                user["username"],
+                taquilla_object_id,
+                taquilla["number"],
             )
 
             # Asignar el usuario a la taquilla
@@ -173,7 +222,7 @@ class TaquillaService:
             return True
 
         except Exception as e:
-            logging.error(f"Error al asignar el usuario a la taquilla: {e}")
+            logger.error("Error al asignar el usuario a la taquilla: %s", e)
             raise ValueError(f"Error al asignar el usuario a la taquilla: {str(e)}")
 
     def unassign_user(self, taquilla_id):
@@ -0,0 +1,264 @@
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import shutil
+
+from bson import ObjectId
+from config import Config
+from models.ticket_model import TicketModel
+from models.ticket_rollup_model import TicketRollupModel
+from utils.serials import decode_serial
+
+logger = logging.getLogger(__name__)
+
+# Columnas de los ficheros archivados y campos que se guardan como ObjectId
+ARCHIVE_COLUMNS = [
+    "_id",
+    "serial",
+    "taquilla_id",
+    "user_id",
+    "race_id",
+    "race_date",
+    "bet_type",
+    "runner_number",
+    "amount",
+    "status",
+    "reprint_count",
+    "created_at",
+    "voided_at",
+    "voided_by",
+]
+OBJECT_ID_COLUMNS = {"_id", "taquilla_id", "user_id", "race_id", "voided_by"}
+
+
+def _pyarrow():
+    """
+    Importa pyarrow solo cuando se usa el archivo, para no cargarlo al
+    arrancar la aplicación.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("El archivo de tickets requiere el paquete pyarrow.")
+    return pyarrow, pyarrow.parquet
+
+
+class TicketArchiveService:
+    """
+    Mueve los tickets antiguos de la colección a ficheros Parquet comprimidos
+    con zstd, particionados como <centro>/<día>/part-<primer id>-<último id>.parquet,
+    y deja un resumen diario en ticket_rollups.
+    """
+
+    def __init__(self, db, archive_dir=None):
+        self.ticket_model = TicketModel(db)
+        self.rollup_model = TicketRollupModel(db)
+        self.archive_dir = archive_dir or Config.TICKET_ARCHIVE_DIR
+
+    def _partition_dir(self, betting_center_id, date):
+        return os.path.join(
+            self.archive_dir, f"betting_center_id={betting_center_id}", f"date={date}"
+        )
+
+    def archive_older_than(self, days=None):
+        """
+        Archiva los tickets creados hace más de `days` días. Cada lote se
+        escribe y se confirma en disco antes de borrarse de la colección, así
+        que el proceso se puede interrumpir y repetir sin perder tickets.
+        Devuelve el número de tickets archivados.
+        """
+        days = Config.TICKET_ARCHIVE_AFTER_DAYS if days is None else days
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        cutoff = today - timedelta(days=days)
+
+        archived = 0
+        for partition in self.ticket_model.get_archive_partitions(cutoff):
+            center_id = partition["_id"]["betting_center_id"]
+            date = partition["_id"]["date"]
+            start = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            end = min(start + timedelta(days=1), cutoff)
+            archived += self._archive_partition(center_id, date, start, end)
+        logger.info("Archivados %s tickets anteriores a %s", archived, cutoff.date())
+        return archived
+
+    def _archive_partition(self, betting_center_id, date, start, end):
+        batch_size = Config.TICKET_ARCHIVE_BATCH_SIZE
+        cursor = self.ticket_model.iter_tickets_in_range(betting_center_id, start, end, batch_size)
+        archived = 0
+        batch = []
+        for ticket in cursor:
+            batch.append(ticket)
+            if len(batch) >= batch_size:
+                archived += self._archive_batch(betting_center_id, date, batch)
+                batch = []
+        if batch:
+            archived += self._archive_batch(betting_center_id, date, batch)
+        return archived
+
+    def _archive_batch(self, betting_center_id, date, tickets):
+        pa, pq = _pyarrow()
+        columns = {
+            name: [
+                str(ticket[name]) if name in OBJECT_ID_COLUMNS and ticket.get(name) else ticket.get(name)
+                for ticket in tickets
+            ]
+            for name in ARCHIVE_COLUMNS
+        }
+        columns["amount"] = [float(amount) for amount in columns["amount"]]
+        table = pa.table(columns)
+
+        # El nombre depende solo del lote: si se repite tras un fallo, el
+        # fichero y su entrada en el resumen se sobrescriben
+        part_name = f"part-{tickets[0]['_id']}-{tickets[-1]['_id']}"
+        directory = self._partition_dir(betting_center_id, date)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{part_name}.parquet")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            pq.write_table(table, f, compression="zstd")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+        voided = [ticket for ticket in tickets if ticket.get("status") == "void"]
+        sequences = [decode_serial(ticket["serial"]) for ticket in tickets]
+        self.rollup_model.set_part(
+            betting_center_id,
+            date,
+            part_name,
+            {
+                "tickets": len(tickets),
+                "amount": sum(ticket["amount"] for ticket in tickets),
+                "voided": len(voided),
+                "voided_amount": sum(ticket["amount"] for ticket in voided),
+                "min_seq": min(sequences),
+                "max_seq": max(sequences),
+            },
+        )
+        self.ticket_model.delete_tickets(betting_center_id, [ticket["_id"] for ticket in tickets])
+        return len(tickets)
+
+    def _read_partition(self, betting_center_id, date):
+        directory = self._partition_dir(betting_center_id, date)
+        if not os.path.isdir(directory):
+            return []
+        tickets = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".parquet"):
+                tickets.extend(self._read_part(betting_center_id, os.path.join(directory, name)))
+        return tickets
+
+    def _read_part(self, betting_center_id, path, serial=None):
+        pa, pq = _pyarrow()
+        filters = [("serial", "=", serial)] if serial else None
+        table = pq.read_table(path, filters=filters)
+        return [self._to_ticket(betting_center_id, row) for row in table.to_pylist()]
+
+    def _to_ticket(self, betting_center_id, row):
+        ticket = {
+            name: ObjectId(value) if name in OBJECT_ID_COLUMNS and value else value
+            for name, value in row.items()
+        }
+        ticket["betting_center_id"] = ObjectId(betting_center_id)
+        return ticket
+
+    def _archived_dates(self, betting_center_id, date_from=None, date_to=None):
+        center_dir = os.path.join(self.archive_dir, f"betting_center_id={betting_center_id}")
+        if not os.path.isdir(center_dir):
+            return []
+        dates = sorted(name.split("=", 1)[1] for name in os.listdir(center_dir) if name.startswith("date="))
+        return [
+            date
+            for date in dates
+            if (date_from is None or date >= date_from) and (date_to is None or date <= date_to)
+        ]
+
+    def query_archive(self, betting_center_id, date_from, date_to):
+        """
+        Lee los tickets archivados de un centro entre dos fechas (incluidas).
+        """
+        tickets = []
+        for date in self._archived_dates(betting_center_id, date_from, date_to):
+            tickets.extend(
+                dict(ticket, archived=True)
+                for ticket in self._read_partition(betting_center_id, date)
+            )
+        return tickets
+
+    def iter_archive(self, betting_center_id, date_from=None, date_to=None):
+        """
+        Recorre los tickets archivados de un centro entre dos fechas
+        (incluidas) fichero a fichero, sin cargar días completos en memoria.
+        """
+        for date in self._archived_dates(betting_center_id, date_from, date_to):
+            directory = self._partition_dir(betting_center_id, date)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".parquet"):
+                    yield from self._read_part(betting_center_id, os.path.join(directory, name))
+
+    def count_archived(self, betting_center_id, date_from=None, date_to=None):
+        """
+        Cuenta los tickets archivados de un centro entre dos fechas con los resúmenes.
+        """
+        rollups = self.rollup_model.get_rollups(
+            betting_center_id, date_from or "0000-00-00", date_to or "9999-99-99"
+        )
+        return sum(self.rollup_model.serialize(rollup)["tickets"] for rollup in rollups)
+
+    def find_archived_ticket(self, betting_center_id, serial):
+        """
+        Busca un ticket archivado por su serial. Los seriales de un centro son
+        crecientes, así que el rango guardado en los resúmenes indica el único
+        fichero que puede contenerlo; un serial que no está archivado no abre
+        ninguno.
+        """
+        seq = decode_serial(serial)
+        for date, part_name in self.rollup_model.find_parts_for_serial(betting_center_id, seq):
+            path = os.path.join(self._partition_dir(betting_center_id, date), f"{part_name}.parquet")
+            if not os.path.exists(path):
+                continue
+            tickets = self._read_part(betting_center_id, path, serial)
+            if tickets:
+                return dict(tickets[0], archived=True)
+        return None
+
+    def restore(self, betting_center_id, date):
+        """
+        Devuelve a la colección los tickets archivados de un día y elimina sus
+        ficheros y su resumen. Los ficheros solo se borran cuando todos los
+        tickets están en la colección. Devuelve el número de tickets restaurados.
+        """
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            raise ValueError(f"Fecha inválida: {date}. Debe tener el formato YYYY-MM-DD.")
+        tickets = self._read_partition(betting_center_id, date)
+        if not tickets:
+            return 0
+        self.ticket_model.insert_tickets(tickets)
+        batch_size = Config.TICKET_ARCHIVE_BATCH_SIZE
+        present = sum(
+            self.ticket_model.count_tickets_by_ids(
+                betting_center_id, [ticket["_id"] for ticket in tickets[i:i + batch_size]]
+            )
+            for i in range(0, len(tickets), batch_size)
+        )
+        if present != len(tickets):
+            raise RuntimeError(
+                f"Solo {present} de {len(tickets)} tickets del día {date} están en la colección; "
+                "se conservan los ficheros del archivo"
+            )
+        self.rollup_model.delete_rollup(betting_center_id, date)
+        shutil.rmtree(self._partition_dir(betting_center_id, date))
+        logger.info("Restaurados %s tickets del centro %s del día %s", len(tickets), betting_center_id, date)
+        return len(tickets)
+
+    def get_rollups(self, betting_center_id, date_from, date_to):
+        """
+        Devuelve los resúmenes diarios de los tickets archivados.
+        """
+        return [
+            self.rollup_model.serialize(rollup)
+            for rollup in self.rollup_model.get_rollups(betting_center_id, date_from, date_to)
+        ]
@@ -0,0 +1,217 @@
+from bson import ObjectId
+from models.ticket_model import TicketModel
+from models.taquilla_model import TaquillaModel
+from models.betting_center_model import BettingCenterModel
+from models.user_model import UserModel
+from services.liability_service import LiabilityService
+from services.payout_service import PayoutService
+from services.race_service import RaceService
+from services.ticket_archive_service import TicketArchiveService
+from utils.serials import normalize_serial
+
+
+class TicketService:
+    def __init__(self, db):
+        self.ticket_model = TicketModel(db)
+        self.user_model = UserModel(db)
+        self.taquilla_model = TaquillaModel(db)
+        self.betting_center_model = BettingCenterModel(
+            db, self.user_model, self.taquilla_model
+        )
+        self.race_service = RaceService(db)
+        self.liability_service = LiabilityService(db)
+        self.payout_service = PayoutService(db)
+        self.archive_service = TicketArchiveService(db)
+
+    def sell_ticket(self, current_user, taquilla_id, race_id, bet_type, runner_number, amount):
+        """
+        Vende un ticket desde una taquilla. La venta lee la taquilla, valida
+        contra el programa en caché y confirma en el primario que la carrera
+        está abierta y el ejemplar corre (dos lecturas indexadas); después
+        reserva el riesgo y escribe el ticket.
+        """
+        taquilla = self.taquilla_model.find_taquilla_by_id(taquilla_id)
+        if not taquilla:
+            raise ValueError("Taquilla no encontrada")
+        if taquilla.get("status", "active") != "active":
+            raise ValueError("La taquilla no está activa")
+        if current_user["role"] == "user" and str(taquilla.get("assigned_user_id")) != current_user["id"]:
+            raise PermissionError("La taquilla no está asignada a este usuario")
+        if current_user["role"] == "admin_centro" and not self.betting_center_model.is_center_admin(
+            current_user["id"], taquilla["betting_center_id"]
+        ):
+            raise PermissionError("No eres el administrador del centro de esta taquilla")
+
+        card = self.race_service.get_race_card(race_id)
+        if not card:
+            raise ValueError("Carrera no encontrada")
+        if card["status"] != "open":
+            raise ValueError("La carrera no admite apuestas")
+        runner = next((r for r in card["runners"] if r["number"] == int(runner_number)), None)
+        if not runner:
+            raise ValueError(f"El ejemplar {runner_number} no corre en esta carrera")
+        if runner["scratched"]:
+            raise ValueError(f"El ejemplar {runner_number} está retirado")
+
+        if not isinstance(amount, (int, float)) or amount <= 0:
+            raise ValueError("El monto de la apuesta debe ser mayor que cero")
+
+        center_id = taquilla["betting_center_id"]
+        runner_number = int(runner_number)
+        # El programa en caché descarta rápido los casos evidentes; el estado
+        # de la carrera y del ejemplar se confirma en el primario
+        self.race_service.check_sale_allowed(race_id, runner_number)
+        # La reserva aplica el límite por ejemplar de forma atómica; si el
+        # ticket no llega a escribirse, se devuelve
+        self.liability_service.reserve(center_id, card["date"], race_id, runner_number, amount)
+        try:
+            ticket = self.ticket_model.create_ticket(
+                center_id,
+                taquilla_id,
+                current_user["id"],
+                race_id,
+                card["date"],
+                bet_type,
+                runner_number,
+                amount,
+            )
+        except Exception:
+            self.liability_service.release(center_id, card["date"], race_id, runner_number, amount)
+            raise
+        self.payout_service.record_bet(center_id, race_id, bet_type, runner_number, amount)
+        return ticket
+
+    def _owner_filter(self, current_user, center_id):
+        """
+        Devuelve el usuario por el que se filtra la búsqueda: los vendedores
+        solo acceden a sus propios tickets.
+        """
+        if current_user["role"] == "super_admin":
+            return None
+        if current_user["role"] == "admin_centro":
+            if not self.betting_center_model.is_center_admin(current_user["id"], center_id):
+                raise PermissionError("No eres el administrador de este centro de apuestas")
+            return None
+        return current_user["id"]
+
+    def get_ticket(self, current_user, center_id, serial):
+        """
+        Obtiene un ticket por su serial con una sola lectura indexada. Si ya no
+        está en la colección, se busca en el archivo.
+        """
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        user_id = self._owner_filter(current_user, center_id)
+        serial = normalize_serial(serial)
+        ticket = self.ticket_model.find_ticket_by_serial(center_id, serial, user_id)
+        if ticket is None:
+            ticket = self.archive_service.find_archived_ticket(center_id, serial)
+            if ticket and user_id and str(ticket["user_id"]) != user_id:
+                return None
+        return ticket
+
+    def _check_center_admin(self, current_user, center_id):
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        if current_user["role"] == "user":
+            raise PermissionError("No tienes acceso al archivo del centro")
+        self._owner_filter(current_user, center_id)
+
+    def get_archived_tickets(self, current_user, center_id, date_from, date_to):
+        """
+        Obtiene los tickets archivados de un centro entre dos fechas.
+        """
+        self._check_center_admin(current_user, center_id)
+        return self.archive_service.query_archive(center_id, date_from, date_to)
+
+    def get_archive_rollups(self, current_user, center_id, date_from, date_to):
+        """
+        Obtiene los resúmenes diarios de los tickets archivados de un centro.
+        """
+        self._check_center_admin(current_user, center_id)
+        return self.archive_service.get_rollups(center_id, date_from, date_to)
+
+    def restore_archived_tickets(self, current_user, center_id, date):
+        """
+        Devuelve a la colección los tickets archivados de un día.
+        """
+        if current_user["role"] != "super_admin":
+            raise PermissionError("Solo el super administrador puede restaurar el archivo")
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        return self.archive_service.restore(center_id, date)
+
+    def reprint_ticket(self, current_user, center_id, serial):
+        """
+        Registra la reimpresión de un ticket y lo devuelve.
+        """
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        user_id = self._owner_filter(current_user, center_id)
+        return self.ticket_model.mark_reprinted(center_id, normalize_serial(serial), user_id)
+
+    def void_ticket(self, current_user, center_id, serial):
+        """
+        Anula un ticket activo y descuenta su monto de los riesgos.
+        """
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        user_id = self._owner_filter(current_user, center_id)
+        ticket = self.ticket_model.void_ticket(
+            center_id, normalize_serial(serial), current_user["id"], user_id
+        )
+        if ticket and ticket.get("race_date"):
+            self.liability_service.release(
+                ticket["betting_center_id"],
+                ticket["race_date"],
+                ticket["race_id"],
+                ticket["runner_number"],
+                ticket["amount"],
+            )
+        if ticket:
+            self.payout_service.record_bet(
+                ticket["betting_center_id"],
+                ticket["race_id"],
+                ticket["bet_type"],
+                ticket["runner_number"],
+                -ticket["amount"],
+            )
+        return ticket
+
+    def get_liabilities(self, current_user, center_id, date):
+        """
+        Devuelve los riesgos acumulados de un centro en una fecha.
+        """
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        if current_user["role"] == "user":
+            raise PermissionError("No tienes acceso a los riesgos del centro")
+        self._owner_filter(current_user, center_id)
+        return self.liability_service.get_center_liabilities(center_id, date)
+
+    def get_race_payouts(self, current_user, center_id, race_id):
+        """
+        Devuelve los dividendos probables de una carrera en un centro. El
+        admin de centro solo ve los de sus centros y el vendedor solo los del
+        centro de su taquilla.
+        """
+        if not ObjectId.is_valid(center_id):
+            raise ValueError(f"ID del centro de apuestas inválido: {center_id}")
+        if current_user["role"] == "admin_centro":
+            self._owner_filter(current_user, center_id)
+        elif current_user["role"] == "user":
+            user = self.user_model.find_user_by_id(current_user["id"], {"assigned_taquilla": 1})
+            taquilla_id = user.get("assigned_taquilla") if user else None
+            taquilla = (
+                self.taquilla_model.find_taquilla_by_id(taquilla_id, {"betting_center_id": 1})
+                if taquilla_id else None
+            )
+            if not taquilla or str(taquilla.get("betting_center_id")) != str(center_id):
+                raise PermissionError("No tienes acceso a los dividendos de este centro")
+        return self.payout_service.get_payouts(center_id, race_id)
+
+    def serialize(self, ticket):
+        """
+        Serializa un ticket para respuesta JSON.
+        """
+        return self.ticket_model.serialize(ticket)
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+import logging
+import threading
+import time
+
+from models.revoked_token_model import RevokedTokenModel
+from utils.bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationService:
+    """
+    Mantiene un filtro de Bloom en memoria con los jti revocados, sincronizado
+    periódicamente desde la colección TTL. Una respuesta negativa del filtro no
+    necesita consultar la base de datos.
+    """
+
+    def __init__(
+        self,
+        db,
+        sync_interval=5,
+        rebuild_interval=3600,
+        capacity=100000,
+        error_rate=0.001,
+        sync_overlap=60,
+    ):
+        self.revoked_token_model = RevokedTokenModel(db)
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, error_rate)
+        self._last_sync = None
+        self._last_rebuild = None
+        self._thread = None
+
+    def revoke(self, jti, expires_at):
+        """
+        Revoca un token y lo añade inmediatamente al filtro local.
+        """
+        self.revoked_token_model.revoke_token(jti, expires_at)
+        with self._lock:
+            self._filter.add(jti)
+
+    def is_revoked(self, jti):
+        """
+        Verifica si un token está revocado. Solo consulta la base de datos
+        cuando el filtro indica una posible coincidencia.
+        """
+        if self._thread is None:
+            # Si el worker no se preparó al arrancar, se sincroniza en segundo plano
+            self.start()
+        if jti not in self._filter:
+            return False
+        return self.revoked_token_model.is_revoked(jti)
+
+    def sync(self):
+        """
+        Incorpora al filtro los tokens revocados desde la última sincronización.
+        El filtro se reconstruye por completo cada cierto tiempo para descartar
+        los tokens que ya expiraron. Cada consulta repite los últimos
+        sync_overlap segundos: una revocación confirmada tarde, o fechada por
+        un servidor con el reloj atrasado, llega con un revoked_at anterior a
+        la última sincronización. Los jti que ya están en el filtro se omiten.
+        """
+        now = datetime.now(timezone.utc)
+        # Sin sincronización previa no hay desde dónde consultar: se reconstruye
+        if (
+            self._last_sync is None
+            or self._last_rebuild is None
+            or time.monotonic() - self._last_rebuild >= self.rebuild_interval
+            or self._filter.is_saturated()
+        ):
+            jtis = self.revoked_token_model.get_revoked_since()
+            new_filter = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+            for jti in jtis:
+                new_filter.add(jti)
+            with self._lock:
+                self._filter = new_filter
+            self._last_rebuild = time.monotonic()
+        else:
+            jtis = self.revoked_token_model.get_revoked_since(self._last_sync - self.sync_overlap)
+            with self._lock:
+                for jti in jtis:
+                    # Los repetidos por la ventana solapada no cuentan para la saturación
+                    if jti not in self._filter:
+                        self._filter.add(jti)
+        self._last_sync = now
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error("Error al sincronizar tokens revocados: %s", e)
+            time.sleep(self.sync_interval)
+
+    def start(self):
+        """
+        Inicia el hilo de sincronización en segundo plano.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="token-revocation-sync", daemon=True
+            )
+            self._thread.start()
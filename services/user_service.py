@@ -1,25 +1,73 @@
+from models.betting_center_model import BettingCenterModel
+from models.taquilla_model import TaquillaModel
 from models.user_model import UserModel
+from utils.batch import order_by_ids
 import logging
 
+logger = logging.getLogger(__name__)
+
 class UserService:
     def __init__(self, db):
         self.user_model = UserModel(db)
+        self.betting_center_model = BettingCenterModel(
+            db, self.user_model, TaquillaModel(db)
+        )
 
-    def get_all_users(self, current_user):
+    def get_all_users(self, current_user, projection=None, after=None, limit=100):
+        """
+        Obtiene una página de usuarios ordenada por ID. El admin de centro solo
+        recibe los usuarios de sus centros, leídos del índice de miembros.
+        Devuelve (usuarios, ID para pedir la página siguiente o None).
+        """
         if current_user['role'] == 'super_admin':
-            return list(self.user_model.collection.find())
+            users = self.user_model.get_users_page(after, limit, projection)
         elif current_user['role'] == 'admin_centro':
-            admin_centers = self.user_model.get_centers_by_admin(current_user['id'])
-            center_ids = [center['_id'] for center in admin_centers]
-            return list(self.user_model.collection.find({'assigned_centers': {'$in': center_ids}}))
+            users = self.user_model.get_users_by_admin(current_user['id'], after, limit, projection)
         else:
             raise ValueError("Acceso denegado")
+        next_after = users[-1]['_id'] if len(users) == limit else None
+        return users, next_after
+
+    def search_users(self, current_user, prefix, limit, offset=0, projection=None):
+        """
+        Busca usuarios por prefijo del username o del email. El admin de
+        centro solo recibe los miembros de sus centros.
+        """
+        if current_user['role'] == 'super_admin':
+            return self.user_model.search_users(prefix, limit, offset, projection=projection)
+        if current_user['role'] == 'admin_centro':
+            return self.user_model.search_users(prefix, limit, offset, current_user['id'], projection)
+        raise PermissionError("Acceso denegado")
+
+    def get_users_by_ids(self, current_user, user_ids, projection=None):
+        """
+        Obtiene varios usuarios con una sola consulta. El acceso se resuelve en
+        la propia consulta: el admin de centro solo recibe los usuarios de sus
+        centros y el usuario normal solo a sí mismo.
+        """
+        if current_user['role'] == 'super_admin':
+            users = self.user_model.find_users_by_ids(user_ids, projection=projection)
+        elif current_user['role'] == 'admin_centro':
+            center_ids = [
+                center['_id']
+                for center in self.betting_center_model.get_centers_by_admin(
+                    current_user['id'], {'_id': 1}
+                )
+            ]
+            users = self.user_model.find_users_by_ids(
+                user_ids, center_ids, current_user['id'], projection
+            )
+        else:
+            users = self.user_model.find_users_by_ids(
+                user_ids, [], current_user['id'], projection
+            )
+        return order_by_ids(users, user_ids)
 
-    def get_user_by_id(self, user_id):
+    def get_user_by_id(self, user_id, projection=None):
         """
         Obtiene un usuario por su ID.
         """
-        return self.user_model.find_user_by_id(user_id)
+        return self.user_model.find_user_by_id(user_id, projection)
 
     def update_user(self, user_id, updates):
         """
@@ -43,7 +91,7 @@ class UserService:
             user_id = self.user_model.create_user(username, email, password, role=role)
             return user_id
         except ValueError as e:
-            logging.error(f"Error al registrar el usuario: {str(e)}")
+            logger.error("Error al registrar el usuario: %s", e)
             raise ValueError(str(e))
 
     def add_permission_to_user(self, user_id, permission_id):
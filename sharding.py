@@ -0,0 +1,52 @@
+"""
+Distribución de las colecciones en un clúster fragmentado.
+
+Las colecciones de alto volumen se fragmentan por centro de apuestas y todas
+sus consultas incluyen betting_center_id, de modo que mongos las envía a un
+solo fragmento. Las colecciones pequeñas (users, betting_centers, taquillas,
+configurations, races, runners, permisos) no se fragmentan: viven en el
+fragmento primario de la base de datos y tampoco generan consultas dispersas.
+
+- tickets: clave hasheada sobre betting_center_id. Reparte los centros de
+  forma uniforme aunque sus ObjectId sean crecientes.
+- ticket_counters: clave hasheada sobre _id, que es el id del centro.
+- liabilities: clave por rangos con el índice único completo. La reserva de
+  riesgo depende de ese índice único para rechazar las ventas que superan el
+  límite, y MongoDB solo admite unicidad sobre claves no hasheadas.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Colección -> (clave de fragmentación, única)
+SHARD_KEYS = {
+    "tickets": ({"betting_center_id": "hashed"}, False),
+    "ticket_counters": ({"_id": "hashed"}, False),
+    "liabilities": (
+        {"betting_center_id": 1, "date": 1, "race_id": 1, "runner_number": 1},
+        True,
+    ),
+}
+
+
+def shard_collections(db):
+    """
+    Habilita la fragmentación de la base de datos y fragmenta las colecciones
+    de SHARD_KEYS. Es idempotente: las colecciones ya fragmentadas se omiten.
+    """
+    admin = db.client.admin
+    admin.command("enableSharding", db.name)
+
+    sharded = {
+        doc["_id"]
+        for doc in db.client["config"]["collections"].find(
+            {"_id": {"$regex": f"^{db.name}\\."}, "dropped": {"$ne": True}}, {"_id": 1}
+        )
+    }
+    for name, (key, unique) in SHARD_KEYS.items():
+        namespace = f"{db.name}.{name}"
+        if namespace in sharded:
+            continue
+        admin.command("shardCollection", namespace, key=key, unique=unique)
+        logger.info("Colección %s fragmentada con la clave %s", namespace, key)
+
@@ -0,0 +1,126 @@
+import threading
+import time
+
+
+class EndpointClass:
+    """
+    Clase de endpoints con su límite de concurrencia, prioridad y cola de espera.
+    """
+
+    def __init__(self, name, limit, priority, max_queue=0, queue_timeout=1.0):
+        self.name = name
+        self.limit = limit
+        self.priority = priority
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.condition = threading.Condition()
+
+
+class AdmissionController:
+    """
+    Control de admisión en proceso. Cada clase de endpoints tiene un límite de
+    concurrencia; las peticiones que lo superan esperan en cola. Cuando la
+    latencia media supera el objetivo, las clases de menor prioridad reducen su
+    límite a la mitad y se descartan en lugar de encolarse.
+    """
+
+    def __init__(self, classes, latency_target_ms=250, protected_priority=3, alpha=0.2):
+        self.classes = {
+            name: EndpointClass(name, **options) for name, options in classes.items()
+        }
+        self.latency_target_ms = latency_target_ms
+        self.protected_priority = protected_priority
+        self.alpha = alpha
+        self.latency_ms = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.ADMISSION_CLASSES,
+            latency_target_ms=config.ADMISSION_LATENCY_TARGET_MS,
+            protected_priority=config.ADMISSION_PROTECTED_PRIORITY,
+        )
+
+    def is_overloaded(self):
+        """
+        Indica si la latencia media supera el objetivo.
+        """
+        return self.latency_ms > self.latency_target_ms
+
+    def _effective_limit(self, endpoint_class):
+        if endpoint_class.priority < self.protected_priority and self.is_overloaded():
+            return max(1, endpoint_class.limit // 2)
+        return endpoint_class.limit
+
+    def acquire(self, class_name):
+        """
+        Intenta admitir una petición. Devuelve False si la petición se descarta.
+        """
+        endpoint_class = self.classes[class_name]
+        with endpoint_class.condition:
+            if endpoint_class.in_flight < self._effective_limit(endpoint_class):
+                endpoint_class.in_flight += 1
+                endpoint_class.admitted += 1
+                return True
+
+            # Bajo sobrecarga las clases no protegidas no esperan en cola
+            shed_now = (
+                endpoint_class.priority < self.protected_priority
+                and self.is_overloaded()
+            )
+            if shed_now or endpoint_class.queued >= endpoint_class.max_queue:
+                endpoint_class.shed += 1
+                return False
+
+            endpoint_class.queued += 1
+            deadline = time.monotonic() + endpoint_class.queue_timeout
+            try:
+                while endpoint_class.in_flight >= self._effective_limit(endpoint_class):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        endpoint_class.shed += 1
+                        return False
+                    endpoint_class.condition.wait(remaining)
+                endpoint_class.in_flight += 1
+                endpoint_class.admitted += 1
+                return True
+            finally:
+                endpoint_class.queued -= 1
+
+    def release(self, class_name, elapsed_ms):
+        """
+        Libera el cupo de una petición y registra su latencia.
+        """
+        endpoint_class = self.classes[class_name]
+        with endpoint_class.condition:
+            endpoint_class.in_flight -= 1
+            endpoint_class.condition.notify()
+        with self._lock:
+            self.latency_ms += self.alpha * (elapsed_ms - self.latency_ms)
+
+    def metrics(self):
+        """
+        Devuelve el estado actual de las colas para exponerlo como métrica.
+        """
+        return {
+            "latency_ms": round(self.latency_ms, 2),
+            "latency_target_ms": self.latency_target_ms,
+            "overloaded": self.is_overloaded(),
+            "classes": {
+                name: {
+                    "priority": endpoint_class.priority,
+                    "limit": endpoint_class.limit,
+                    "effective_limit": self._effective_limit(endpoint_class),
+                    "in_flight": endpoint_class.in_flight,
+                    "queue_depth": endpoint_class.queued,
+                    "admitted": endpoint_class.admitted,
+                    "shed": endpoint_class.shed,
+                }
+                for name, endpoint_class in self.classes.items()
+            },
+        }
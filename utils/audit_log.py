@@ -0,0 +1,150 @@
+from datetime import datetime, timezone
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from flask import g, has_request_context
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Campos que nunca se guardan en el registro de auditoría
+REDACTED_FIELDS = {"password"}
+
+
+class AuditLog:
+    """
+    Registro de auditoría asíncrono. Los modelos encolan los cambios en memoria
+    y un hilo en segundo plano los escribe por lotes con insert_many, de modo
+    que las peticiones no pagan un viaje extra a la base de datos.
+
+    Con la política "drop" los eventos se descartan si la cola está llena;
+    con "block" la petición espera hasta block_timeout segundos.
+    """
+
+    def __init__(
+        self,
+        max_queue=10000,
+        flush_interval=1.0,
+        batch_size=500,
+        policy="drop",
+        block_timeout=0.5,
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError("Política no válida. Debe ser 'drop' o 'block'.")
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_queue=config.AUDIT_MAX_QUEUE,
+            flush_interval=config.AUDIT_FLUSH_INTERVAL,
+            batch_size=config.AUDIT_BATCH_SIZE,
+            policy=config.AUDIT_QUEUE_POLICY,
+        )
+
+    def _ensure_started(self):
+        # La cola y el hilo no sobreviven al fork: se recrean en cada proceso
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self.max_queue)
+                    self._thread = threading.Thread(
+                        target=self._run, name="audit-log-flush", daemon=True
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def record(self, action, collection, target_id, changes=None):
+        """
+        Encola un evento de auditoría. El autor se toma del usuario de la petición actual.
+        """
+        self._ensure_started()
+        event = {
+            "ts": datetime.now(timezone.utc),
+            "actor_id": g.get("current_user_id") if has_request_context() else None,
+            "request_id": g.get("request_id") if has_request_context() else None,
+            "action": action,
+            "collection": collection,
+            "target_id": target_id,
+            "changes": {
+                key: value for key, value in (changes or {}).items()
+                if key not in REDACTED_FIELDS
+            },
+        }
+        try:
+            if self.policy == "block":
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        from database import get_db
+
+        try:
+            get_db()["audit_log"].insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error("Error al escribir %s eventos de auditoría: %s", len(batch), e)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """
+        Escribe de inmediato los eventos pendientes del proceso actual.
+        """
+        if self._pid != os.getpid():
+            return
+        while True:
+            try:
+                first = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._write(self._drain(first))
+
+    def metrics(self):
+        """
+        Devuelve la profundidad de la cola y los contadores de eventos.
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._pid == os.getpid() else 0,
+            "max_queue": self.max_queue,
+            "policy": self.policy,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+# Registro compartido por todos los modelos del proceso
+audit_log = AuditLog.from_config(Config)
+atexit.register(audit_log.flush)
@@ -0,0 +1,32 @@
+from bson import ObjectId
+
+
+def parse_object_ids(raw, limit):
+    """
+    Convierte el parámetro ?ids=a,b,c en una lista de ObjectId sin duplicados,
+    conservando el orden en que se pidieron.
+    """
+    ids = []
+    seen = set()
+    for value in (raw or "").split(","):
+        value = value.strip()
+        if not value or value in seen:
+            continue
+        if not ObjectId.is_valid(value):
+            raise ValueError(f"ID inválido: {value}")
+        seen.add(value)
+        ids.append(ObjectId(value))
+    if not ids:
+        raise ValueError("Se requiere al menos un ID en el parámetro ids")
+    if len(ids) > limit:
+        raise ValueError(f"Se permiten como máximo {limit} IDs por petición")
+    return ids
+
+
+def order_by_ids(documents, ids):
+    """
+    Ordena los documentos según la lista de IDs pedida; los que no se
+    encontraron o no son accesibles se omiten.
+    """
+    by_id = {document["_id"]: document for document in documents}
+    return [by_id[object_id] for object_id in ids if object_id in by_id]
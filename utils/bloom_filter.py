@@ -0,0 +1,51 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom en memoria. Puede dar falsos positivos pero nunca falsos
+    negativos, por lo que una respuesta negativa es definitiva.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        if capacity <= 0:
+            raise ValueError("La capacidad del filtro debe ser mayor que cero.")
+        if not 0 < error_rate < 1:
+            raise ValueError("La tasa de error debe estar entre 0 y 1.")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        """
+        Calcula las posiciones de bits de un elemento mediante doble hashing.
+        """
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        """
+        Añade un elemento al filtro.
+        """
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def is_saturated(self):
+        """
+        Indica si el filtro superó su capacidad y su tasa de error ya no se garantiza.
+        """
+        return self.count >= self.capacity
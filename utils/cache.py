@@ -0,0 +1,247 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+import bson
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Caché en memoria con expiración por tiempo, segura entre hilos. Con
+    max_entries, al llenarse se descarta la entrada más antigua.
+    """
+
+    def __init__(self, ttl=60, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            if self.max_entries and len(self._data) >= self.max_entries:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (value, time.monotonic() + self.ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LRUCache:
+    """
+    Caché en memoria con expiración por tiempo y descarte de la entrada usada
+    hace más tiempo al llenarse, segura entre hilos.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value):
+        """
+        Guarda el valor solo si la clave no existe (o venció). Devuelve True
+        si lo guardó.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] >= time.monotonic():
+                return False
+            self._store(key, value, None)
+            return True
+
+    def _store(self, key, value, ttl):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """
+    Caché compartida por todos los procesos sobre un servidor que hable el
+    protocolo de Redis. El cliente se crea en el primer uso, de modo que el
+    paquete redis solo se necesita si se elige este backend.
+    """
+
+    def __init__(self, url, ttl=60, prefix=""):
+        self.url = url
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("El backend de caché redis requiere el paquete redis.")
+            # El pool de conexiones de redis-py se reinicia solo tras un fork
+            self._redis = redis.Redis.from_url(self.url)
+        return self._redis
+
+    def get(self, key, default=None):
+        value = self._client().get(self.prefix + key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        self._client().set(self.prefix + key, value, ex=self.ttl if ttl is None else ttl)
+
+    def add(self, key, value):
+        """
+        Guarda el valor solo si la clave no existe. Devuelve True si lo guardó.
+        """
+        return bool(self._client().set(self.prefix + key, value, ex=self.ttl, nx=True))
+
+    def delete(self, key):
+        self._client().delete(self.prefix + key)
+
+    def clear(self):
+        client = self._client()
+        for key in client.scan_iter(match=f"{self.prefix}*", count=500):
+            client.delete(key)
+
+
+def apply_projection(document, projection):
+    """
+    Aplica en memoria una proyección de MongoDB de primer nivel (de inclusión
+    o de exclusión) a un documento completo.
+    """
+    if document is None or not projection:
+        return document
+    inclusion = any(value for name, value in projection.items() if name != "_id")
+    if inclusion:
+        projected = {name: value for name, value in document.items() if projection.get(name)}
+        if projection.get("_id", 1) and "_id" in document:
+            projected["_id"] = document["_id"]
+        return projected
+    return {name: value for name, value in document.items() if projection.get(name, 1)}
+
+
+# Valor de una entrada invalidada; un documento codificado en BSON nunca está vacío
+TOMBSTONE = b""
+
+
+class DocumentCache:
+    """
+    Caché de lectura de documentos por ID. Los documentos se guardan completos
+    y codificados en BSON, así que cada lectura devuelve una copia con los
+    mismos tipos que daría MongoDB y cualquier proyección se resuelve en
+    memoria. Los modelos invalidan las entradas al modificar el documento.
+    Un fallo del backend nunca impide leer de la base de datos.
+
+    La invalidación deja una marca durante DOCUMENT_CACHE_TOMBSTONE_TTL
+    segundos y las lecturas solo llenan la caché si la clave no existe. Así
+    un lector que cargó el documento antes de la escritura no puede guardar
+    la versión antigua después de la invalidación. El loader debe leer del
+    primario.
+    """
+
+    def __init__(self, backend, namespace):
+        self.backend = backend
+        self.namespace = namespace
+
+    def _key(self, document_id):
+        return f"{self.namespace}:{document_id}"
+
+    def get(self, document_id, loader, projection=None):
+        """
+        Devuelve el documento desde la caché o, si no está, lo carga con
+        loader() y lo guarda. Los documentos inexistentes no se guardan.
+        """
+        key = self._key(document_id)
+        try:
+            cached = self.backend.get(key)
+        except Exception as e:
+            logger.warning("No se pudo leer la caché de %s: %s", self.namespace, e)
+            cached = None
+        if cached:
+            return apply_projection(bson.decode(cached), projection)
+
+        document = loader()
+        # Con la marca de invalidación vigente no se guarda nada
+        if document is not None and cached is None:
+            try:
+                self.backend.add(key, bson.encode(document))
+            except Exception as e:
+                logger.warning("No se pudo escribir la caché de %s: %s", self.namespace, e)
+        return apply_projection(document, projection)
+
+    def invalidate(self, *document_ids):
+        for document_id in document_ids:
+            try:
+                self.backend.set(self._key(document_id), TOMBSTONE, Config.DOCUMENT_CACHE_TOMBSTONE_TTL)
+            except Exception as e:
+                logger.error("No se pudo invalidar %s en la caché de %s: %s", document_id, self.namespace, e)
+
+
+def document_cache(namespace):
+    """
+    Crea la caché de documentos de una colección con el backend de
+    Config.DOCUMENT_CACHE_BACKEND ("memory" o "redis").
+    """
+    if Config.DOCUMENT_CACHE_BACKEND == "redis":
+        backend = RedisCache(
+            Config.DOCUMENT_CACHE_URL, Config.DOCUMENT_CACHE_TTL, Config.DOCUMENT_CACHE_PREFIX
+        )
+    elif Config.DOCUMENT_CACHE_BACKEND == "memory":
+        backend = LRUCache(Config.DOCUMENT_CACHE_TTL, Config.DOCUMENT_CACHE_MAX_ENTRIES)
+    else:
+        raise ValueError(
+            f"Backend de caché no válido: {Config.DOCUMENT_CACHE_BACKEND}. Debe ser 'memory' o 'redis'."
+        )
+    return DocumentCache(backend, namespace)
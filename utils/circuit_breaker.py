@@ -0,0 +1,190 @@
+import threading
+import time
+
+from pymongo import monitoring
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Disyuntor de la base de datos. Tras failure_threshold fallos de conexión
+    seguidos se abre y las peticiones se rechazan sin esperar a MongoDB.
+    Pasados reset_timeout segundos pasa a semiabierto y deja pasar una sola
+    petición de prueba: si funciona se cierra y si falla vuelve a abrirse.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=10):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+            self._last_error = None
+
+    def allow(self):
+        """
+        Indica si se puede usar la base de datos. En semiabierto solo lo
+        permite a una petición de prueba cada reset_timeout segundos.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at < self.reset_timeout:
+                return False
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                return False
+            # Primera prueba, o la anterior no llegó a la base de datos
+            self._state = HALF_OPEN
+            self._probe_started = now
+            return True
+
+    def record_success(self):
+        if self._state == CLOSED and self._failures == 0:
+            return
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error)
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+
+    @property
+    def state(self):
+        return self._state
+
+    def snapshot(self):
+        """
+        Estado actual para el endpoint de salud.
+        """
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "open_for_seconds": (
+                    round(time.monotonic() - self._opened_at, 1) if self._opened_at else None
+                ),
+                "last_error": self._last_error,
+            }
+
+
+# Tipos de error de PyMongo que indican que no se puede hablar con el servidor.
+# NetworkTimeout no está: un plazo vencido en el cliente señala una operación
+# lenta, no una caída, y los latidos ya detectan un servidor que no responde.
+NETWORK_ERROR_TYPES = {
+    "AutoReconnect",
+    "ConnectionFailure",
+    "ServerSelectionTimeoutError",
+}
+
+
+class BreakerCommandListener(monitoring.CommandListener):
+    """
+    Los comandos correctos cierran el disyuntor y los errores de red cuentan
+    como fallos; los errores del servidor (claves duplicadas, validación...)
+    no indican una caída y se ignoran.
+    """
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.breaker.record_success()
+
+    def failed(self, event):
+        if event.failure.get("errtype") in NETWORK_ERROR_TYPES:
+            self.breaker.record_failure(event.failure.get("errmsg"))
+
+
+class BreakerHeartbeatListener(monitoring.ServerHeartbeatListener):
+    """
+    Los latidos del monitor de PyMongo actúan también como prueba: detectan
+    la caída sin esperar a una petición y cierran el disyuntor en cuanto el
+    servidor vuelve a responder.
+    """
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.breaker.record_success()
+
+    def failed(self, event):
+        self.breaker.record_failure(event.reply)
+
+
+class BreakerPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Cuenta como fallo no poder abrir una conexión nueva.
+    """
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+
+    def connection_check_out_failed(self, event):
+        if event.reason == monitoring.ConnectionCheckOutFailedReason.CONN_ERROR:
+            self.breaker.record_failure("No se pudo abrir una conexión con MongoDB")
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_out(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+def breaker_listeners(breaker):
+    """
+    Devuelve los listeners de PyMongo que alimentan el disyuntor.
+    """
+    return [
+        BreakerCommandListener(breaker),
+        BreakerHeartbeatListener(breaker),
+        BreakerPoolListener(breaker),
+    ]
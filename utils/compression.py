@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import logging
+
+from flask import Response, g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/csv", "text/plain", "text/html"}
+
+# Cabeceras de la ruta que se guardan junto al cuerpo en caché
+CACHED_HEADERS = ("Link",)
+
+# None mientras no se haya intentado importar brotli; False si no está instalado
+_brotli = None
+
+
+def _get_brotli():
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli
+
+
+def negotiate_encoding():
+    """
+    Elige la codificación según Accept-Encoding: brotli si el cliente la
+    acepta y el paquete está instalado, si no gzip, o None.
+    """
+    accepted = request.accept_encodings
+    if accepted["br"] and _get_brotli():
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return _get_brotli().compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _etag_matches(etag):
+    # Los ETag de las variantes comprimidas llevan un sufijo; cualquiera de
+    # ellas identifica el mismo contenido
+    for candidate in request.headers.get("If-None-Match", "").split(","):
+        candidate = candidate.strip().removeprefix("W/").strip('"')
+        if candidate == "*" or candidate.split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+class CachedBody:
+    """
+    Cuerpo serializado de una respuesta con su ETag y sus variantes comprimidas.
+    """
+
+    def __init__(self, body, mimetype, headers=None):
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers or {}
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.variants = {}
+
+    def encoded(self, encoding):
+        if encoding is None:
+            return self.body
+        variant = self.variants.get(encoding)
+        if variant is None:
+            variant = compress(self.body, encoding)
+            self.variants[encoding] = variant
+        return variant
+
+
+def _finish(response, body, encoding, etag):
+    response.set_data(body)
+    response.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.headers["ETag"] = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+    return response
+
+
+def init_compression(app):
+    """
+    Comprime las respuestas grandes y guarda en caché los listados de
+    Config.RESPONSE_CACHE_ENDPOINTS ya serializados y comprimidos. Una petición
+    repetida con la misma identidad y URL se responde desde la caché (o con
+    304 si el cliente ya tiene ese ETag) sin ejecutar la ruta.
+    """
+    config = app.config
+    cache = TTLCache(config["RESPONSE_CACHE_TTL"], config["RESPONSE_CACHE_MAX_ENTRIES"])
+    app.extensions["response_cache"] = cache
+
+    def cache_key():
+        if request.method != "GET" or request.endpoint not in config["RESPONSE_CACHE_ENDPOINTS"]:
+            return None
+        try:
+            verify_jwt_in_request(optional=True)
+            claims = get_jwt()
+        except Exception:
+            # La ruta se encargará de rechazar el token
+            return None
+        if not claims:
+            return None
+        # El rol y los permisos del token forman parte de la clave: si cambian,
+        # el usuario recibe un token nuevo y no reutiliza respuestas anteriores
+        return (claims["sub"], claims.get("r"), claims.get("p"), request.full_path)
+
+    @app.before_request
+    def serve_cached_response():
+        key = cache_key()
+        g.response_cache_key = key
+        if key is None:
+            return None
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        if _etag_matches(cached.etag):
+            response = Response(status=304)
+            response.headers["ETag"] = f'"{cached.etag}"'
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        encoding = negotiate_encoding() if len(cached.body) >= config["COMPRESSION_MIN_SIZE"] else None
+        response = Response(mimetype=cached.mimetype, headers=cached.headers)
+        return _finish(response, cached.encoded(encoding), encoding, cached.etag)
+
+    @app.after_request
+    def compress_response(response):
+        if request.method not in ("GET", "HEAD"):
+            # Cualquier escritura deja obsoletos los listados de este worker;
+            # iniciar o cerrar sesión no modifica datos
+            if response.status_code < 400 and not (request.endpoint or "").startswith("auth_routes."):
+                cache.clear()
+            return response
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        key = g.get("response_cache_key")
+        body = response.get_data()
+        if key is not None:
+            headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+            cached = CachedBody(body, response.mimetype, headers)
+            cache.set(key, cached)
+            if _etag_matches(cached.etag):
+                response.status_code = 304
+                response.set_data(b"")
+                response.headers["ETag"] = f'"{cached.etag}"'
+                return response
+            if len(body) < config["COMPRESSION_MIN_SIZE"]:
+                response.headers["ETag"] = f'"{cached.etag}"'
+                return response
+            encoding = negotiate_encoding()
+            return _finish(response, cached.encoded(encoding), encoding, cached.etag)
+
+        if len(body) < config["COMPRESSION_MIN_SIZE"]:
+            return response
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+        return _finish(response, compress(body, encoding), encoding, None)
@@ -0,0 +1,50 @@
+def parse_fields(raw, field_map):
+    """
+    Convierte el parámetro ?fields=a,b,c en un conjunto de campos públicos.
+    Devuelve None si no se pidió ningún campo (respuesta completa).
+    """
+    if raw is None:
+        return None
+    fields = {field.strip() for field in raw.split(",") if field.strip()}
+    unknown = fields - set(field_map)
+    if unknown:
+        raise ValueError(
+            f"Campos no válidos: {', '.join(sorted(unknown))}. "
+            f"Disponibles: {', '.join(field_map)}."
+        )
+    return fields or None
+
+
+def build_projection(fields, field_map, required=()):
+    """
+    Traduce los campos públicos pedidos a una proyección de MongoDB. field_map
+    asocia cada campo público con los campos almacenados que necesita (vacío
+    para los que se calculan con otra consulta). `required` añade campos
+    almacenados que la ruta necesita aunque no se devuelvan, por ejemplo
+    para comprobar el acceso.
+    """
+    if fields is None:
+        return None
+    projection = {"_id": 1}
+    for field in fields:
+        for stored in field_map[field]:
+            projection[stored] = 1
+    for stored in required:
+        projection[stored] = 1
+    return projection
+
+
+def select_fields(serialized, fields):
+    """
+    Deja en la respuesta serializada solo los campos pedidos.
+    """
+    if fields is None:
+        return serialized
+    return {key: value for key, value in serialized.items() if key in fields}
+
+
+def wants(fields, field):
+    """
+    Indica si hay que calcular un campo que depende de otra consulta.
+    """
+    return fields is None or field in fields
@@ -0,0 +1,33 @@
+from urllib.parse import urlencode
+
+from bson import ObjectId
+from flask import request
+
+
+def parse_page(args, default_limit, max_limit):
+    """
+    Lee los parámetros ?after=<id>&limit=<n> de un listado paginado por ID.
+    Devuelve (after, limit), con after None en la primera página.
+    """
+    after = args.get("after")
+    if after is not None:
+        if not ObjectId.is_valid(after):
+            raise ValueError(f"ID inválido en after: {after}")
+        after = ObjectId(after)
+    try:
+        limit = int(args.get("limit", default_limit))
+    except ValueError:
+        raise ValueError("El parámetro limit debe ser un número entero")
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f"El parámetro limit debe estar entre 1 y {max_limit}")
+    return after, limit
+
+
+def next_page_link(**params):
+    """
+    Devuelve la cabecera Link que apunta a la página siguiente de la
+    petición actual, conservando el resto de parámetros.
+    """
+    args = request.args.to_dict()
+    args.update({name: str(value) for name, value in params.items()})
+    return f'<{request.path}?{urlencode(args)}>; rel="next"'
@@ -0,0 +1,44 @@
+import unicodedata
+
+
+def normalize_search_text(value):
+    """
+    Normaliza un texto para las búsquedas por prefijo: sin acentos y en
+    minúsculas, de modo que "José" se encuentra escribiendo "jose".
+    """
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value.strip())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def prefix_range(prefix):
+    """
+    Condición de rango equivalente a "empieza por prefix" sobre un campo
+    normalizado. A diferencia de una expresión regular, los límites del
+    recorrido del índice quedan siempre ajustados al prefijo.
+    """
+    last = ord(prefix[-1])
+    if last == 0x10FFFF:
+        return {"$gte": prefix}
+    return {"$gte": prefix, "$lt": prefix[:-1] + chr(last + 1)}
+
+
+def parse_search(args, default_limit, max_limit, max_offset):
+    """
+    Lee los parámetros ?q=&limit=&offset= de una búsqueda por prefijo.
+    Devuelve (prefijo normalizado, limit, offset).
+    """
+    prefix = normalize_search_text(args.get("q", ""))
+    if not prefix:
+        raise ValueError("Se requiere el parámetro q con el texto a buscar")
+    try:
+        limit = int(args.get("limit", default_limit))
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        raise ValueError("Los parámetros limit y offset deben ser números enteros")
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f"El parámetro limit debe estar entre 1 y {max_limit}")
+    if offset < 0 or offset > max_offset:
+        raise ValueError(f"El parámetro offset debe estar entre 0 y {max_offset}")
+    return prefix, limit, offset
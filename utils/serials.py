@@ -0,0 +1,47 @@
+# Codificación Crockford Base32: sin I, L, O ni U para evitar confusiones al leer
+# o escanear. El último carácter es un dígito de control (módulo 31) tomado del
+# mismo alfabeto, de modo que el serial solo contiene caracteres alfanuméricos
+# válidos en cualquier simbología de código de barras.
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+_DECODE.update({"O": 0, "I": 1, "L": 1})
+
+
+def encode_serial(number, min_length=6):
+    """
+    Codifica un número de secuencia como serial Base32 con carácter de control.
+    """
+    if number < 0:
+        raise ValueError("El número de secuencia no puede ser negativo.")
+    digits = []
+    value = number
+    while value:
+        value, remainder = divmod(value, 32)
+        digits.append(ALPHABET[remainder])
+    body = "".join(reversed(digits)).rjust(min_length, "0")
+    return body + ALPHABET[number % 31]
+
+
+def decode_serial(serial):
+    """
+    Decodifica un serial y valida su carácter de control. Devuelve el número de secuencia.
+    """
+    serial = (serial or "").strip().upper().replace("-", "")
+    if len(serial) < 2:
+        raise ValueError(f"Serial inválido: {serial}")
+    body, check = serial[:-1], serial[-1]
+    number = 0
+    for char in body:
+        if char not in _DECODE:
+            raise ValueError(f"Serial inválido: {serial}")
+        number = number * 32 + _DECODE[char]
+    if ALPHABET[number % 31] != check:
+        raise ValueError(f"Serial inválido: {serial}")
+    return number
+
+
+def normalize_serial(serial):
+    """
+    Devuelve la forma canónica de un serial leído por el usuario o el escáner.
+    """
+    return encode_serial(decode_serial(serial))
@@ -0,0 +1,80 @@
+import logging
+import os
+import time
+
+from database import get_db, get_service
+from models.configuration_model import ConfigurationModel
+from models.permission_model import PermissionModel
+from models.role_default_permissions_model import RoleDefaultPermissionsModel
+from services.auth_service import AuthService
+from services.betting_center_service import BettingCenterService
+from services.configuration_service import ConfigurationService
+from services.export_service import ExportService
+from services.job_service import JobService
+from services.permission_service import PermissionService
+from services.race_service import RaceService
+from services.ticket_service import TicketService
+from services.role_default_permissions_service import RoleDefaultPermissionsService
+from services.taquilla_service import TaquillaService
+from services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+# Estado de preparación del worker actual
+WORKER_STATE = {"pid": None, "ready": False, "warmup_ms": None, "error": None}
+
+# Servicios que usan las rutas; se crean antes de aceptar tráfico
+SERVICES = [
+    AuthService,
+    UserService,
+    BettingCenterService,
+    TaquillaService,
+    PermissionService,
+    RoleDefaultPermissionsService,
+    ConfigurationModel,
+    ConfigurationService,
+    RaceService,
+    TicketService,
+    ExportService,
+    JobService,
+]
+
+
+def warm_worker():
+    """
+    Prepara el worker actual: crea el cliente de MongoDB y los servicios,
+    carga las cachés de permisos, roles y configuraciones e inicia los
+    hilos en segundo plano. Debe llamarse después del fork.
+    """
+    started = time.perf_counter()
+    WORKER_STATE.update(pid=os.getpid(), ready=False, warmup_ms=None, error=None)
+    try:
+        db = get_db()
+        db.client.admin.command("ping")
+
+        for service_class in SERVICES:
+            get_service(service_class)
+
+        PermissionModel(db).warm_cache()
+        RoleDefaultPermissionsModel(db).warm_cache()
+        ConfigurationModel(db).warm_cache()
+
+        auth_service = get_service(AuthService)
+        auth_service.token_revocation.sync()
+        auth_service.token_revocation.start()
+        get_service(JobService).start()
+
+        WORKER_STATE["ready"] = True
+    except Exception as e:
+        WORKER_STATE["error"] = str(e)
+        logger.error("Error al preparar el worker %s: %s", os.getpid(), e)
+    finally:
+        WORKER_STATE["warmup_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    logger.info(
+        "Worker %s %s en %s ms",
+        os.getpid(),
+        "listo" if WORKER_STATE["ready"] else "no preparado",
+        WORKER_STATE["warmup_ms"],
+    )
+    return WORKER_STATE["ready"]
@@ -0,0 +1,12 @@
+"""
+Punto de entrada de producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+La aplicación se importa en el proceso maestro (preload_app) y cada worker
+crea su propio cliente de MongoDB y prepara sus cachés después del fork,
+antes de empezar a aceptar peticiones.
+"""
+from app import app
+
+__all__ = ["app"]